@@ -0,0 +1,64 @@
+####################################################
+# Measures how long `import gopigo3` and `import easygopigo3` take.
+#
+# Every sample runs in a fresh interpreter, so nothing is cached
+# in sys.modules. Run it from Software/Python:
+#
+#   python3 benchmarks/import_time.py
+#   python3 benchmarks/import_time.py --runs 50 --breakdown
+#
+# Importing must not touch the hardware: no SPI device is opened
+# and no systemctl call is made until a GoPiGo3 object is created.
+####################################################
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULES = ["gopigo3", "easygopigo3", "easysensors"]
+
+
+def time_import(module):
+    # -X importtime reports the cumulative time of every import in microseconds, on stderr
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    breakdown = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            cumulative = int(fields[1])
+        except ValueError:
+            continue  # header line
+        breakdown[fields[2].strip()] = cumulative
+    return breakdown
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GoPiGo3 import time benchmark")
+    parser.add_argument("--runs", type=int, default=20, help="number of fresh interpreters per module")
+    parser.add_argument("--breakdown", action="store_true", help="show the slowest imports of each module")
+    args = parser.parse_args()
+
+    for module in MODULES:
+        totals = []
+        samples = []
+        for _ in range(args.runs):
+            breakdown = time_import(module)
+            totals.append(breakdown[module])
+            samples.append(breakdown)
+        print("{:12} median {:7.2f} ms   min {:7.2f} ms   max {:7.2f} ms".format(
+            module, statistics.median(totals) / 1000, min(totals) / 1000, max(totals) / 1000))
+
+        if args.breakdown:
+            names = set().union(*samples)
+            medians = {name: statistics.median(s.get(name, 0) for s in samples) for name in names}
+            for name in sorted(medians, key=medians.get, reverse=True)[1:11]:
+                print("    {:40} {:7.2f} ms".format(name, medians[name] / 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,3 +2,4 @@
 # package is installed via pip (where easygopigo3 lives inside the gopigo3 package).
 from gopigo3.easygopigo3 import *
 from gopigo3.easygopigo3 import EasyGoPiGo3  # ensure explicit name is importable
+from gopigo3.easygopigo3 import __getattr__  # mutex and di_sensors_available, loaded on first use
@@ -1,3 +1,4 @@
 # Backward-compatibility shim: allows `import easysensors` to work when the
 # package is installed via pip (where easysensors lives inside the gopigo3 package).
 from gopigo3.easysensors import *
+from gopigo3.easysensors import __getattr__  # mutex and di_sensors_available, loaded on first use
@@ -1,5 +1,5 @@
 # GoPiGo3 Python package
-from .gopigo3 import GoPiGo3, FirmwareVersionError, GoPiGoValueError
+from .gopigo3 import GoPiGo3, FirmwareVersionError, GoPiGoValueError, SPIBatch, SPI_BUS, SPI_DEVICE, SPI_SPEED_HZ
 from .easygopigo3 import EasyGoPiGo3
 from .easysensors import (
     Sensor,
@@ -18,11 +18,100 @@ from .easysensors import (
     DHTSensor,
 )
 
+# the optional subsystems, imported on first use: name -> module
+_LAZY = {
+    "Transport": "transport",
+    "SpiDevTransport": "transport",
+    "GoPiGo3Simulator": "simulator",
+    "TelemetryPoller": "telemetry",
+    "TelemetrySnapshot": "telemetry",
+    "MotorsSnapshot": "telemetry",
+    "TelemetryPublisher": "telemetry_bus",
+    "TelemetryReader": "telemetry_bus",
+    "tune_spi_speed": "spi_tuning",
+    "LinkStats": "spi_tuning",
+    "WriteCache": "write_cache",
+    "SPIStats": "instrumentation",
+    "LatencyHistogram": "instrumentation",
+    "LockProfiler": "instrumentation",
+    "RecordingTransport": "recording",
+    "ReplayTransport": "recording",
+    "Recording": "recording",
+    "ReplayError": "recording",
+    "GroveI2CTransaction": "grove_i2c",
+    "I2CTimingModel": "grove_i2c",
+    "SPIBroker": "broker",
+    "BrokerTransport": "broker",
+    "SchedulingTransport": "scheduler",
+    "Odometry": "odometry",
+    "Pose": "odometry",
+    "MotionHandle": "motion",
+    "MotionQueue": "motion",
+    "StopHandle": "motion",
+    "VelocityProfile": "profiles",
+    "LockManager": "locks",
+    "ResourceLock": "locks",
+    "LockOrderError": "locks",
+    "get_lock_manager": "locks",
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
 __version__ = "1.0.3"
 __all__ = [
     "GoPiGo3",
     "FirmwareVersionError",
     "GoPiGoValueError",
+    "SPIBatch",
+    "SPI_BUS",
+    "SPI_DEVICE",
+    "SPI_SPEED_HZ",
+    "Transport",
+    "SpiDevTransport",
+    "GoPiGo3Simulator",
+    "TelemetryPoller",
+    "TelemetrySnapshot",
+    "MotorsSnapshot",
+    "TelemetryPublisher",
+    "TelemetryReader",
+    "tune_spi_speed",
+    "LinkStats",
+    "WriteCache",
+    "SPIStats",
+    "LatencyHistogram",
+    "LockProfiler",
+    "RecordingTransport",
+    "ReplayTransport",
+    "Recording",
+    "ReplayError",
+    "GroveI2CTransaction",
+    "I2CTimingModel",
+    "SPIBroker",
+    "BrokerTransport",
+    "SchedulingTransport",
+    "Odometry",
+    "Pose",
+    "MotionHandle",
+    "MotionQueue",
+    "StopHandle",
+    "VelocityProfile",
+    "LockManager",
+    "ResourceLock",
+    "LockOrderError",
+    "get_lock_manager",
     "EasyGoPiGo3",
     "Sensor",
     "DigitalSensor",
@@ -0,0 +1,547 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# SPI broker for the GoPiGo3
+#
+# When several processes drive the same GoPiGo3, the broker is the only one
+# opening the SPI device. The others send it their messages over a Unix
+# socket, through a BrokerTransport, which the GoPiGo3 constructor picks
+# when asked to and a broker is running:
+#
+#     sudo gopigo3-broker                    # or: python3 -m gopigo3.broker
+#
+#     gpg = GoPiGo3(use_broker=True)         # or GOPIGO3_BROKER=1 in the environment
+#
+# The broker puts the pending messages of all clients in one SPI batch,
+# motor commands first and telemetry last. It also polls the motor status
+# and voltages itself. A client that accepts slightly old readings gets them
+# from the broker's cache, so that any number of clients can watch the robot
+# without adding SPI traffic:
+#
+#     gpg.transport.max_age = 0.02           # motor and voltage reads up to 20 ms old
+#
+# Without a max_age, every read goes to the GoPiGo3. A motor command drops
+# the cached readings of the motors it's sent to.
+#
+# Protocol, little endian. A request is
+#
+#     request id u32, 0 u8, priority u8, message count u16, max age u32
+#
+# with the max age in microseconds, 0 for fresh replies only, followed by a
+# length u16 and the bytes of every message. The reply is
+#
+#     request id u32, status u8, 0 u8, count u16
+#
+# followed by a length u16 and the bytes of every reply, or, when the status
+# isn't STATUS_OK, by a length u16 and a UTF-8 error message.
+
+import os
+import socket
+import struct
+import threading
+import time
+
+from .periodic import PeriodicThread
+from .transport import Transport
+
+BROKER_DIR = "/run/gopigo3"
+
+PRIORITY_MOTOR = 0
+PRIORITY_NORMAL = 1
+PRIORITY_TELEMETRY = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+_HEADER = struct.Struct("<IBBH")
+_MAX_AGE = struct.Struct("<I")
+_LENGTH = struct.Struct("<H")
+
+
+def broker_socket_path(bus=0, device=1, broker_dir=BROKER_DIR):
+    """
+    :returns: The socket of the broker owning ``/dev/spidev<bus>.<device>``.
+    :rtype: str
+    """
+    return os.path.join(broker_dir, f"spidev{bus}.{device}.sock")
+
+
+def _recv_exactly(sock, length):
+    data = bytearray()
+    while len(data) < length:
+        chunk = sock.recv(length - len(data))
+        if not chunk:
+            raise ConnectionError("The GoPiGo3 broker connection was closed")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _read_items(sock, count):
+    items = []
+    for _ in range(count):
+        (length,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+        items.append(_recv_exactly(sock, length))
+    return items
+
+
+def _read_frame(sock):
+    request_id, flags, value, count = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return request_id, flags, value, _read_items(sock, count)
+
+
+def _read_request(sock):
+    """
+    :returns: ``(request_id, priority, max_age, messages)``, the max age in seconds.
+    """
+    request_id, _, priority, count = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    (max_age_us,) = _MAX_AGE.unpack(_recv_exactly(sock, _MAX_AGE.size))
+    return request_id, priority, max_age_us / 1e6, _read_items(sock, count)
+
+
+def _frame(request_id, flags, value, items, max_age=None):
+    frame = bytearray(_HEADER.pack(request_id, flags, value, len(items)))
+    if max_age is not None:
+        # requests only
+        frame.extend(_MAX_AGE.pack(min(int(max_age * 1e6), 0xFFFFFFFF)))
+    for item in items:
+        frame.extend(_LENGTH.pack(len(item)))
+        frame.extend(item)
+    return bytes(frame)
+
+
+class BrokerTransport(Transport):
+    """
+    Talk to the GoPiGo3 through the broker. See :py:mod:`gopigo3.broker`.
+    """
+
+    def __init__(self, path=None, priority=PRIORITY_NORMAL, timeout=1.0, max_age=0.0):
+        """
+        :param str path: The socket of the broker. By default the one of ``/dev/spidev0.1``.
+        :param int priority = PRIORITY_NORMAL: Priority of the messages of this transport. The broker sends
+                                               motor commands with ``PRIORITY_MOTOR`` whatever this is.
+        :param float timeout = 1.0: Seconds to wait for a reply.
+        :param float max_age = 0.0: How old, in seconds, a reply to a motor status, encoder or voltage read may be,
+                                    when the broker answers it from its cache. 0 to always read the GoPiGo3.
+        :raises OSError: If the broker can't be reached.
+        """
+        self.path = path if path is not None else broker_socket_path()
+        self.priority = priority
+        self.timeout = timeout
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._request_id = 0
+        self._sock = self._connect()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def transfer(self, data_out):
+        return self.transfer_many([data_out])[0]
+
+    def transfer_many(self, messages, max_age=None):
+        """
+        The broker sends all the messages in the same SPI batch, in order.
+
+        :param float max_age: Overrides the ``max_age`` of the transport for these messages.
+        """
+        items = [bytes(b & 0xFF for b in data_out) for data_out in messages]
+        if max_age is None:
+            max_age = self.max_age
+        with self._lock:
+            self._request_id = (self._request_id + 1) & 0xFFFFFFFF
+            try:
+                if self._sock is None:
+                    self._sock = self._connect()
+                self._sock.sendall(_frame(self._request_id, 0, self.priority, items, max_age))
+                while True:
+                    request_id, status, _, replies = _read_frame(self._sock)
+                    if request_id == self._request_id:
+                        break
+                    # the late reply to a request that timed out
+            except (OSError, ConnectionError, struct.error) as e:
+                # a reply may be left halfway in the stream: start over on a new connection
+                if self._sock is not None:
+                    self._sock.close()
+                    self._sock = None
+                raise IOError(f"GoPiGo3 broker error: {e}")
+        if status != STATUS_OK:
+            raise IOError("GoPiGo3 broker error: " + (replies[0].decode("utf-8", "replace") if replies else "unknown"))
+        return [list(reply) for reply in replies]
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def connect_broker(bus=0, device=1, broker_dir=BROKER_DIR):
+    """
+    :returns: A :py:class:`BrokerTransport` to the broker owning ``/dev/spidev<bus>.<device>``, or ``None`` if there's none running.
+    """
+    path = broker_socket_path(bus, device, broker_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        return BrokerTransport(path)
+    except OSError:
+        # a socket left behind by a broker that's gone
+        return None
+
+
+class _Request:
+    __slots__ = ("priority", "messages", "max_age", "replies", "error", "client", "request_id", "done")
+
+    def __init__(self, priority, messages, max_age=0.0, client=None, request_id=0):
+        self.priority = priority
+        self.messages = messages
+        self.max_age = max_age
+        self.replies = None
+        self.error = None
+        self.client = client
+        self.request_id = request_id
+        self.done = threading.Event() if client is None else None
+
+
+class _Client:
+    __slots__ = ("sock", "lock")
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.lock = threading.Lock()
+
+
+class SPIBroker:
+    """
+    Own the SPI link to a GoPiGo3 and serve it to other processes over a Unix socket.
+    """
+
+    def __init__(self, transport, path=None, address=8, telemetry_rate=100, cache_ttl=None, max_batch=32,
+                 device_path=None):
+        """
+        :param gopigo3.Transport transport: The link to the GoPiGo3, usually a :py:class:`~gopigo3.SpiDevTransport`.
+        :param str path: The socket to listen on. By default the one of ``/dev/spidev0.1``.
+        :param int address = 8: SPI address of the GoPiGo3, for the telemetry messages.
+        :param float telemetry_rate = 100: How many times per second the motor status and voltages get polled. 0 to disable.
+        :param float cache_ttl: How old, in seconds, a cached reply to a motor status, encoder or voltage read may be,
+                                whatever the ``max_age`` of the request. By default one and a half polling periods,
+                                or no caching without polling.
+        :param int max_batch = 32: Most messages sent in one SPI batch.
+        :param str device_path: The SPI device. When given, the socket gets the same group, so that whoever may open the device may use the broker.
+        """
+        self.transport = transport
+        self.path = path if path is not None else broker_socket_path()
+        self.address = address
+        self.telemetry_rate = telemetry_rate
+        if cache_ttl is None:
+            cache_ttl = 1.5 / telemetry_rate if telemetry_rate else 0.0
+        self.cache_ttl = cache_ttl
+        self.max_batch = max_batch
+        self.device_path = device_path
+
+        self.requests = 0
+        self.messages = 0
+        self.transfers = 0
+        self.cache_hits = 0
+
+        self._pending = []  # (priority, sequence, _Request), kept sorted
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._cache = {}
+        self._running = False
+        self._threads = []
+        self._telemetry = None
+        self._server = None
+
+        # replies that stay valid for the max age of a request, and the ones that never change
+        from .gopigo3 import GoPiGo3
+        T = GoPiGo3.SPI_MESSAGE_TYPE
+        self._motor_messages = frozenset((T.SET_MOTOR_PWM, T.SET_MOTOR_POSITION, T.SET_MOTOR_POSITION_KP,
+                                          T.SET_MOTOR_POSITION_KD, T.SET_MOTOR_DPS, T.SET_MOTOR_LIMITS,
+                                          T.OFFSET_MOTOR_ENCODER))
+        # what the cacheable reads read: a motor command to that motor makes their cached replies stale
+        self._cacheable = {T.GET_MOTOR_STATUS_LEFT: GoPiGo3.MOTOR_LEFT, T.GET_MOTOR_STATUS_RIGHT: GoPiGo3.MOTOR_RIGHT,
+                           T.GET_MOTOR_ENCODER_LEFT: GoPiGo3.MOTOR_LEFT, T.GET_MOTOR_ENCODER_RIGHT: GoPiGo3.MOTOR_RIGHT,
+                           T.GET_VOLTAGE_5V: 0, T.GET_VOLTAGE_VCC: 0}
+        self._static = frozenset((T.GET_MANUFACTURER, T.GET_NAME, T.GET_HARDWARE_VERSION,
+                                  T.GET_FIRMWARE_VERSION, T.GET_ID))
+        self._telemetry_messages = [bytes([address, T.GET_MOTOR_STATUS_LEFT] + [0] * 10),
+                                    bytes([address, T.GET_MOTOR_STATUS_RIGHT] + [0] * 10),
+                                    bytes([address, T.GET_VOLTAGE_VCC] + [0] * 4),
+                                    bytes([address, T.GET_VOLTAGE_5V] + [0] * 4)]
+
+    ###########################################################################
+    # Scheduling
+
+    def submit(self, messages, priority=PRIORITY_NORMAL, max_age=0.0):
+        """
+        Send messages from within the broker process, waiting for the replies.
+
+        :param float max_age = 0.0: How old, in seconds, a cached reply may be. 0 to always read the GoPiGo3.
+        :returns: The replies, as bytes.
+        """
+        request = _Request(self._priority(messages, priority), [bytes(m) for m in messages], max_age)
+        self._enqueue(request)
+        request.done.wait()
+        if request.error is not None:
+            raise IOError(request.error)
+        return request.replies
+
+    def _priority(self, messages, priority):
+        for data_out in messages:
+            if len(data_out) > 1 and data_out[1] in self._motor_messages:
+                return PRIORITY_MOTOR
+        return priority
+
+    def _enqueue(self, request):
+        with self._condition:
+            self._sequence += 1
+            self._pending.append((request.priority, self._sequence, request))
+            self._pending.sort(key=lambda item: item[:2])
+            self._condition.notify()
+
+    def _next_batch(self):
+        """
+        Wait for requests, and take as many as fit in a batch, the most urgent first.
+        """
+        with self._condition:
+            while self._running and not self._pending:
+                self._condition.wait(0.1)
+            batch = []
+            count = 0
+            while self._pending and (not batch or count + len(self._pending[0][2].messages) <= self.max_batch):
+                request = self._pending.pop(0)[2]
+                batch.append(request)
+                count += len(request.messages)
+            return batch
+
+    def _cached(self, data_out, now, max_age):
+        if len(data_out) < 2:
+            return None
+        message_type = data_out[1]
+        if message_type in self._static:
+            entry = self._cache.get(data_out)
+            return entry[1] if entry is not None else None
+        if message_type in self._cacheable and max_age > 0:
+            entry = self._cache.get(data_out)
+            if entry is not None and now - entry[0] <= min(max_age, self.cache_ttl):
+                return entry[1]
+        return None
+
+    def _written_motors(self, data_out):
+        """
+        :returns: The motors a motor command is sent to, as a MOTOR_LEFT / MOTOR_RIGHT mask. 0 for other messages.
+        """
+        if len(data_out) > 2 and data_out[1] in self._motor_messages:
+            return data_out[2]
+        return 0
+
+    def _invalidate(self, motors):
+        for data_out in [data_out for data_out in self._cache if self._cacheable.get(data_out[1], 0) & motors]:
+            del self._cache[data_out]
+
+    def _process(self, batch):
+        now = time.monotonic()
+        outgoing = []
+        written = 0  # the motors sent a command so far in this batch
+        for request in batch:
+            request.replies = [None] * len(request.messages)
+            for index, data_out in enumerate(request.messages):
+                written |= self._written_motors(data_out)
+                if len(data_out) > 1 and self._cacheable.get(data_out[1], 0) & written:
+                    reply = None  # the cached reply is stale once the command is sent
+                else:
+                    reply = self._cached(data_out, now, request.max_age)
+                if reply is not None:
+                    request.replies[index] = reply
+                    self.cache_hits += 1
+                else:
+                    outgoing.append((request, index, data_out))
+
+        if outgoing:
+            try:
+                replies = self.transport.transfer_many([list(data_out) for _, _, data_out in outgoing])
+                self.transfers += 1
+            except Exception as e:
+                for request, _, _ in outgoing:
+                    request.error = f"SPI transfer failed: {e}"
+            else:
+                now = time.monotonic()
+                for (request, index, data_out), reply in zip(outgoing, replies):
+                    reply = bytes(b & 0xFF for b in reply)
+                    request.replies[index] = reply
+                    message_type = data_out[1] if len(data_out) > 1 else 0
+                    motors = self._written_motors(data_out)
+                    if motors:
+                        self._invalidate(motors)
+                    elif (message_type in self._cacheable or message_type in self._static) and reply[3:4] == b"\xA5":
+                        self._cache[data_out] = (now, reply)
+
+        for request in batch:
+            self.requests += 1
+            self.messages += len(request.messages)
+            if request.client is None:
+                request.done.set()
+            else:
+                self._reply(request)
+
+    def _reply(self, request):
+        if request.error is not None:
+            frame = _frame(request.request_id, STATUS_ERROR, 0, [request.error.encode("utf-8")])
+        else:
+            frame = _frame(request.request_id, STATUS_OK, 0, request.replies)
+        client = request.client
+        try:
+            with client.lock:
+                client.sock.sendall(frame)
+        except OSError:
+            pass  # the client went away, its reader thread cleans up
+
+    def _run_worker(self):
+        while self._running:
+            batch = self._next_batch()
+            if batch:
+                self._process(batch)
+
+    def _poll_telemetry(self):
+        self.submit(self._telemetry_messages, PRIORITY_TELEMETRY)
+
+    ###########################################################################
+    # Clients
+
+    def _run_server(self):
+        while self._running:
+            try:
+                sock, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            thread = threading.Thread(target=self._run_client, args=(sock,), name="gopigo3-broker-client", daemon=True)
+            thread.start()
+
+    def _run_client(self, sock):
+        client = _Client(sock)
+        try:
+            while self._running:
+                request_id, priority, max_age, messages = _read_request(sock)
+                self._enqueue(_Request(self._priority(messages, priority), messages, max_age, client, request_id))
+        except (OSError, ConnectionError, struct.error):
+            pass
+        finally:
+            sock.close()
+
+    ###########################################################################
+    # Life cycle
+
+    def start(self):
+        """
+        Start listening, on background threads.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        if self.device_path is not None:
+            try:
+                os.chown(self.path, -1, os.stat(self.device_path).st_gid)
+                os.chmod(self.path, 0o660)
+            except OSError:
+                pass
+        self._server.listen(16)
+        self._server.settimeout(0.5)
+
+        self._running = True
+        targets = [(self._run_worker, "gopigo3-broker"), (self._run_server, "gopigo3-broker-server")]
+        self._threads = [threading.Thread(target=target, name=name, daemon=True) for target, name in targets]
+        for thread in self._threads:
+            thread.start()
+        if self.telemetry_rate:
+            self._telemetry = PeriodicThread(self.telemetry_rate, "gopigo3-broker-telemetry", self._poll_telemetry)
+            self._telemetry.start()
+
+    def stop(self):
+        """
+        Stop serving, and remove the socket.
+        """
+        if self._telemetry is not None:
+            # while the worker still runs, to answer the poll under way
+            self._telemetry.stop()
+            self._telemetry = None
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def serve_forever(self):
+        """
+        Serve until interrupted.
+        """
+        self.start()
+        try:
+            while True:
+                time.sleep(1)
+        finally:
+            self.stop()
+
+
+def main():
+    import argparse
+    import signal
+    from .gopigo3 import SPI_BUS, SPI_DEVICE, SPI_SPEED_HZ, _get_spi_device
+    from .spi_tuning import load_spi_speed
+    from .transport import SpiDevTransport
+
+    parser = argparse.ArgumentParser(description="Share the GoPiGo3 SPI link between processes")
+    parser.add_argument("--bus", type=int, default=SPI_BUS)
+    parser.add_argument("--device", type=int, default=SPI_DEVICE)
+    parser.add_argument("--speed-hz", type=int, default=None, help="SPI clock, 500kHz by default")
+    parser.add_argument("--tuned-spi", action="store_true", help="use the clock saved by gopigo3-tune-spi, if any")
+    parser.add_argument("--broker-dir", default=BROKER_DIR, help="directory of the socket")
+    parser.add_argument("--telemetry-rate", type=float, default=100, help="motor status and voltage polls per second, 0 to disable")
+    parser.add_argument("--cache-ttl", type=float, default=None, help="seconds a polled reply may be served to the clients accepting cached replies")
+    args = parser.parse_args()
+
+    spi, lock = _get_spi_device(args.bus, args.device)
+    speed_hz = args.speed_hz or (args.tuned_spi and load_spi_speed(args.bus, args.device)) or SPI_SPEED_HZ
+    transport = SpiDevTransport(spi, speed_hz=speed_hz, lock=lock)
+
+    broker = SPIBroker(transport, broker_socket_path(args.bus, args.device, args.broker_dir),
+                       telemetry_rate=args.telemetry_rate, cache_ttl=args.cache_ttl,
+                       device_path=f"/dev/spidev{args.bus}.{args.device}")
+
+    def _stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, _stop)
+
+    print(f"GoPiGo3 broker listening on {broker.path}")
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -4,23 +4,49 @@
 import time
 import os
 import math
-import json
 import easysensors
-from I2C_mutex import Mutex
 
 __version__ = "1.3.2.1"
 
-try:
-    from di_sensors import easy_line_follower, easy_distance_sensor, easy_light_color_sensor, easy_inertial_measurement_unit
-    di_sensors_available = True
-except ImportError as err:
-    di_sensors_available = False
-    print(f"Importing di_sensors error: {err}")
-except Exception as err:
-    di_sensors_available = False
-    print(f"Importing di_sensors error: {err}")
+# The I2C mutex and the di_sensors library are only loaded when first needed,
+# which keeps `import easygopigo3` fast and free of side effects. Reading
+# `mutex`, `di_sensors_available` or one of the di_sensors modules loads them,
+# see __getattr__ at the end of the module.
+_mutex = None
+_di_sensors_available = None  # None until _load_di_sensors() has tried to import the library
+_DI_SENSORS_MODULES = ("easy_line_follower", "easy_distance_sensor", "easy_light_color_sensor", "easy_inertial_measurement_unit")
+
+
+def _get_mutex():
+    """
+    Returns the I2C mutex, creating it on first use. It's the one of the lock manager, see :py:mod:`gopigo3.locks`.
+    """
+    global _mutex, mutex
+    if _mutex is None:
+        from gopigo3.locks import get_lock_manager
+        _mutex = mutex = get_lock_manager().i2c_mutex
+    return _mutex
 
-mutex = Mutex(debug=False)
+def _load_di_sensors():
+    """
+    Imports the di_sensors library on first use.
+
+    :returns: Whether the library is available.
+    """
+    global _di_sensors_available, di_sensors_available, easy_line_follower, easy_distance_sensor
+    global easy_light_color_sensor, easy_inertial_measurement_unit
+    if _di_sensors_available is None:
+        try:
+            from di_sensors import easy_line_follower, easy_distance_sensor, easy_light_color_sensor, easy_inertial_measurement_unit
+            _di_sensors_available = True
+        except ImportError as err:
+            _di_sensors_available = False
+            print(f"Importing di_sensors error: {err}")
+        except Exception as err:
+            _di_sensors_available = False
+            print(f"Importing di_sensors error: {err}")
+        di_sensors_available = _di_sensors_available
+    return _di_sensors_available
 
 hardware_connected = True
 try:
@@ -82,12 +108,19 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
 
     """
 
-    def __init__(self, config_file_path=None, use_mutex=False):
+    def __init__(self, config_file_path=None, use_mutex=False, transport=None,
+                 bus=gopigo3.SPI_BUS, device=gopigo3.SPI_DEVICE, speed_hz=None, use_broker=None, use_tuned_spi=None):
         """
         This constructor sets the variables to the following values:
 
         :param str config_file_path: Path to JSON config file that stores the wheel diameter and wheel base width for the GoPiGo3. If None, uses ~/.gpg3_config.json.
         :param boolean use_mutex = False: When using multiple threads/processes that access the same resource/device, mutex has to be enabled.
+        :param transport = None: Alternative link to the GoPiGo3 MCU, like a :py:class:`~gopigo3.simulator.GoPiGo3Simulator`. By default the SPI bus is used.
+        :param int bus = 0: SPI bus of the GoPiGo3. Ignored when a ``transport`` is given.
+        :param int device = 1: SPI chip select of the GoPiGo3. Ignored when a ``transport`` is given.
+        :param int speed_hz = None: SPI clock, 500 kHz by default. Ignored when a ``transport`` is given.
+        :param boolean use_tuned_spi = None: Without a ``speed_hz``, use the clock saved by ``gopigo3-tune-spi``. By default only if the ``GOPIGO3_TUNED_SPI`` environment variable is 1.
+        :param boolean use_broker = None: Go through the :py:mod:`gopigo3.broker` when one is running. By default only if the ``GOPIGO3_BROKER`` environment variable is 1.
         :var int speed = 300: The speed of the motors should go between **0-1000** DPS.
         :var tuple(int,int,int) left_eye_color = (0,255,255): Set Dex's left eye color to **turqoise**.
         :var tuple(int,int,int) right_eye_color = (0,255,255): Set Dex's right eye color to **turqoise**.
@@ -98,7 +131,9 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
 
         """
         try:
-            super().__init__(config_file_path=config_file_path)
+            super().__init__(config_file_path=config_file_path, transport=transport,
+                             bus=bus, device=device, speed_hz=speed_hz, use_broker=use_broker,
+                             use_tuned_spi=use_tuned_spi)
         except IOError as e:
             print("FATAL ERROR:\nGoPiGo3 is not detected.")
             raise e
@@ -116,6 +151,9 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
         self.left_eye_color = (0, 255, 255)
         self.right_eye_color = (0, 255, 255)
         self.use_mutex = use_mutex
+        self._motion_monitor = None
+        self._motion_queue = None
+        self.motion_profile = None
 
 
     def volt(self):
@@ -169,11 +207,28 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
         """
         self.set_speed(self.DEFAULT_SPEED)
 
-    def stop(self):
+    def stop(self, mode="brake_float", blocking=True, timeout=0.5):
         """
         This method stops the `GoPiGo3`_ from moving.
         It brings the `GoPiGo3`_ to a full stop.
 
+        :param str mode = "brake_float": How to stop.
+        :param boolean blocking = True: Set it as a blocking or non-blocking method.
+        :param float timeout = 0.5: Most seconds to wait for the wheels to stop turning before floating them, also when the motors can't be read.
+        :returns: For ``"brake_float"``, the :py:class:`~gopigo3.motion.StopHandle` completing once the motors float, otherwise ``None``.
+
+        ``mode`` parameter can take the following values:
+
+             * ``"brake"`` so that the wheels are actively held at a speed of 0. The method returns right away.
+             * ``"brake_float"`` so that the wheels are braked, then left free to turn as soon as they stopped turning.
+
+        ``blocking`` parameter can take the following values:
+
+             * ``True`` so that the method will wait for the motors to float.
+             * ``False`` so that the method will exit immediately while the `GoPiGo3`_ robot finishes stopping.
+
+        The wheels are considered stopped when the speed the motors measure gets to 0, rather than after a fixed delay.
+
         .. note::
 
              This method is used in conjuction with the following methods:
@@ -184,10 +239,127 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
                  * :py:meth:`~easygopigo3.EasyGoPiGo3.forward`
 
         """
+        if mode not in ("brake", "brake_float"):
+            raise ValueError(f"Unknown stop mode {mode!r}. Must be \"brake\" or \"brake_float\".")
+        if self._motion_queue is not None:
+            self._motion_queue.clear()
         self.set_motor_dps(self.MOTOR_LEFT + self.MOTOR_RIGHT, 0)
-        time.sleep(0.1)
-        self.set_motor_power(self.MOTOR_LEFT + self.MOTOR_RIGHT, self.MOTOR_FLOAT)
-        time.sleep(0.1)
+        if mode == "brake":
+            return None
+
+        from gopigo3.motion import StopHandle
+        handle = StopHandle(self, float_motors=True, timeout=timeout)
+        self._watch_move(handle)
+        if blocking and not handle.wait(timeout):
+            # the motors couldn't be read in time: float them anyway
+            handle._complete()
+        return handle
+
+    def set_motor_dps(self, port, dps):
+        # a speed replaces the target position of the moves under way, they won't complete anymore
+        self._forget_moves()
+        super().set_motor_dps(port, dps)
+
+    def set_motor_power(self, port, power):
+        self._forget_moves()
+        super().set_motor_power(port, power)
+
+    def _forget_moves(self):
+        self._preempt_profile()
+        if self._motion_monitor is not None:
+            self._motion_monitor.forget()
+
+    def _preempt_profile(self):
+        if self.motion_profile is not None:
+            self.motion_profile.preempt()
+
+    def _start_move(self, left_start, right_start, left_degrees, right_degrees, blocking):
+        """
+        Turn the wheels ``left_degrees`` and ``right_degrees`` from ``left_start`` and ``right_start``, along the motion profile
+        if enabled, and watch the move, waiting for it if ``blocking``.
+
+        :returns: The :py:class:`~gopigo3.motion.MotionHandle` of the move.
+        """
+        from gopigo3.motion import MotionHandle
+        handle = MotionHandle(self, left_start + left_degrees, right_start + right_degrees)
+        if self.motion_profile is not None:
+            self.motion_profile.run(handle, left_start, right_start, left_degrees, right_degrees, self.get_speed())
+        else:
+            self.set_motor_position(self.MOTOR_LEFT, handle.left_target)
+            self.set_motor_position(self.MOTOR_RIGHT, handle.right_target)
+            self._watch_move(handle)
+        if blocking:
+            handle.wait()
+        return handle
+
+    def enable_motion_profile(self, acceleration=1500, jerk=15000, rate=100):
+        """
+        Make :py:meth:`drive_cm`, :py:meth:`drive_inches`, :py:meth:`drive_degrees`, :py:meth:`turn_degrees` and :py:meth:`orbit`
+        speed up and slow down smoothly, rather than jumping to the speed limit and braking at the end.
+
+        :param float acceleration = 1500: Largest wheel acceleration, in degrees per second squared.
+        :param float jerk = 15000: How fast the acceleration changes, in degrees per second cubed. ``None`` for a constant acceleration.
+        :param float rate = 100: Times per second the wheel speeds are updated along the way.
+        :returns: The :py:class:`~gopigo3.profiles.ProfileStreamer` running the moves.
+
+        The moves of :py:meth:`motion_queue` don't follow the profile.
+
+        .. code-block:: python
+
+            gpg3_obj.set_speed(800)
+            gpg3_obj.enable_motion_profile(acceleration=2000)
+            gpg3_obj.drive_cm(100)
+
+        """
+        from gopigo3.profiles import ProfileStreamer
+        self.disable_motion_profile()
+        self.motion_profile = ProfileStreamer(self, acceleration, jerk, rate)
+        return self.motion_profile
+
+    def disable_motion_profile(self):
+        """
+        Go back to giving the motors their final position right away.
+        """
+        if self.motion_profile is not None:
+            self.motion_profile.stop()
+            self.motion_profile = None
+
+    def _watch_move(self, handle):
+        if self._motion_monitor is None:
+            from gopigo3.motion import MotionMonitor
+            self._motion_monitor = MotionMonitor(self)
+        self._motion_monitor.watch(handle)
+
+    def motion_queue(self, blend=False, blend_degrees=30, continue_on_error=False):
+        """
+        The queue of moves the robot runs in the background, one after the other.
+
+        :param boolean blend = False: Whether each move hands over to the next one before the robot stops.
+        :param float blend_degrees = 30: How far from its target, in wheel degrees, a move hands over to the next one when blending.
+        :param boolean continue_on_error = False: Whether the moves queued after one that fails still run. By default they get cancelled.
+        :returns: The :py:class:`~gopigo3.motion.MotionQueue` of the robot. There's only one, the parameters apply to the moves that didn't start yet.
+
+        The queue takes ``drive_cm``, ``drive_inches``, ``drive_degrees``, ``turn_degrees``, ``orbit`` and ``steer``, each
+        returning a :py:class:`~gopigo3.motion.MotionHandle`, and runs them at the speed set when they start.
+        :py:meth:`~easygopigo3.EasyGoPiGo3.stop` clears it.
+
+        .. code-block:: python
+
+            route = gpg3_obj.motion_queue(blend=True)
+            for side in range(4):
+                route.drive_cm(30)
+                route.turn_degrees(90)
+            # do something else while the robot drives a square
+            route.wait()
+
+        """
+        if self._motion_queue is None:
+            from gopigo3.motion import MotionQueue
+            self._motion_queue = MotionQueue(self)
+        self._motion_queue.blend = blend
+        self._motion_queue.blend_degrees = blend_degrees
+        self._motion_queue.continue_on_error = continue_on_error
+        return self._motion_queue
 
     def forward(self):
         """
@@ -215,6 +387,14 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
              * ``True`` so that the method will wait for the `GoPiGo3`_ robot to finish moving.
              * ``False`` so that the method will exit immediately while the `GoPiGo3`_ robot will continue moving.
 
+        :returns: The :py:class:`~gopigo3.motion.MotionHandle` of the move, completed already if ``blocking``.
+
+        .. code-block:: python
+
+            move = gpg3_obj.drive_cm(50, blocking=False)
+            # do something else while the robot drives
+            move.wait()
+
         """
         # dist is in cm
         # if dist is negative, this becomes a backward move
@@ -225,19 +405,11 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
         WheelTurnDegrees = ((dist_mm / self.WHEEL_CIRCUMFERENCE) * 360)
 
         # get the starting position of each motor
-        StartPositionLeft = self.get_motor_encoder(self.MOTOR_LEFT)
-        StartPositionRight = self.get_motor_encoder(self.MOTOR_RIGHT)
-
-        self.set_motor_position(self.MOTOR_LEFT,
-                                (StartPositionLeft + WheelTurnDegrees))
-        self.set_motor_position(self.MOTOR_RIGHT,
-                                (StartPositionRight + WheelTurnDegrees))
+        StartPositionLeft, StartPositionRight = self.read_encoders()
 
-        if blocking:
-            while not self.target_reached(
-                    StartPositionLeft + WheelTurnDegrees,
-                    StartPositionRight + WheelTurnDegrees):
-                time.sleep(0.1)
+        return self._start_move(StartPositionLeft, StartPositionRight,
+                                WheelTurnDegrees, WheelTurnDegrees,
+                                blocking)
 
     def drive_inches(self, dist, blocking=True):
         """
@@ -254,8 +426,10 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
              * ``True`` so that the method will wait for the `GoPiGo3`_ robot to finish moving.
              * ``False`` so that the method will exit immediately while the `GoPiGo3`_ robot will continue moving.
 
+        :returns: The :py:class:`~gopigo3.motion.MotionHandle` of the move, completed already if ``blocking``.
+
         """
-        self.drive_cm(dist * 2.54, blocking)
+        return self.drive_cm(dist * 2.54, blocking)
 
     def drive_degrees(self, degrees, blocking=True):
         """
@@ -272,6 +446,8 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
              * ``True`` so that the method will wait for the `GoPiGo3`_ robot to finish rotating.
              * ``False`` so that the method will exit immediately while the `GoPiGo3`_ robot will continue rotating.
 
+        :returns: The :py:class:`~gopigo3.motion.MotionHandle` of the move, completed already if ``blocking``.
+
         For instance, the following function call is going to drive the `GoPiGo3`_ robot forward for *310 / 360* wheel rotations, which equates to aproximately *86%*
         of the `GoPiGo3`_'s wheel circumference.
 
@@ -295,21 +471,11 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
         # if degrees is negative, this becomes a backward move
 
         # get the starting position of each motor
-        StartPositionLeft = self.get_motor_encoder(self.MOTOR_LEFT)
-        StartPositionRight = self.get_motor_encoder(self.MOTOR_RIGHT)
-
-        self.set_motor_position(self.MOTOR_LEFT,
-                                (StartPositionLeft + degrees))
-        self.set_motor_position(self.MOTOR_RIGHT,
-                                (StartPositionRight + degrees))
-
-
-        if blocking:
-            while not self.target_reached(
-                    StartPositionLeft + degrees,
-                    StartPositionRight + degrees):
-                time.sleep(0.1)
+        StartPositionLeft, StartPositionRight = self.read_encoders()
 
+        return self._start_move(StartPositionLeft, StartPositionRight,
+                                degrees, degrees,
+                                blocking)
 
     def backward(self):
         """
@@ -419,12 +585,43 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
         :param int degrees: Degrees to steer. **360** for full rotation. Negative for left turn.
         :param int radius_cm: Radius in `cm` of the circle to drive. Default is **0** (turn in place).
         :param boolean blocking = True: Set it as a blocking or non-blocking method.
+        :returns: The :py:class:`~gopigo3.motion.MotionHandle` of the orbit, completed already if ``blocking``.
 
         .. important::
            Note that while in non-blocking mode the speed cannot be changed before the end of the orbit as it would negate all orbit calculations.
            After a non-blocking call, :py:meth:`~easygopigo3.EasyGoPiGo3.set_speed` has to be called before any other movement.
         """
         speed = self.get_speed()
+        left_degrees, right_degrees, left_speed, right_speed = self._orbit_plan(degrees, radius_cm)
+
+        # set the motor speeds
+        self.set_motor_limits(self.MOTOR_LEFT, dps = left_speed)
+        self.set_motor_limits(self.MOTOR_RIGHT, dps = right_speed)
+
+        # get the starting position of each motor
+        StartPositionLeft, StartPositionRight = self.read_encoders()
+
+        # Set each motor target position
+        handle = self._start_move(StartPositionLeft, StartPositionRight,
+                                  left_degrees, right_degrees,
+                                  False)
+        if blocking:
+            try:
+                handle.wait()
+            finally:
+                # reset to original speed once done
+                # if non-blocking, then the user is responsible in resetting the speed
+                self.set_speed(speed)
+
+        return handle
+
+    def _orbit_plan(self, degrees, radius_cm):
+        """
+        The wheel rotations and speeds of an :py:meth:`orbit` at the current speed.
+
+        :returns: ``(left_degrees, right_degrees, left_dps, right_dps)``
+        """
+        speed = self.get_speed()
         radius = radius_cm * 10
 
         # the total distance to drive in mm
@@ -445,13 +642,9 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
 
         # if it's a left turn
         if degrees < 0:
-            MOTOR_FAST = self.MOTOR_RIGHT
-            MOTOR_SLOW = self.MOTOR_LEFT
             fast_target = right_target
             slow_target = left_target
         else:
-            MOTOR_FAST = self.MOTOR_LEFT
-            MOTOR_SLOW = self.MOTOR_RIGHT
             fast_target = left_target
             slow_target = right_target
 
@@ -466,29 +659,11 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
         fast_speed = speed_with_direction
         slow_speed = abs((speed_with_direction * slow_target) / fast_target)
 
-        # set the motor speeds
-        self.set_motor_limits(MOTOR_FAST, dps = fast_speed)
-        self.set_motor_limits(MOTOR_SLOW, dps = slow_speed)
-
-        # get the starting position of each motor
-        StartPositionLeft = self.get_motor_encoder(self.MOTOR_LEFT)
-        StartPositionRight = self.get_motor_encoder(self.MOTOR_RIGHT)
-
-        # Set each motor target position
-        self.set_motor_position(self.MOTOR_LEFT, (StartPositionLeft + (left_target * direction)))
-        self.set_motor_position(self.MOTOR_RIGHT, (StartPositionRight + (right_target * direction)))
-
-        if blocking:
-            while not self.target_reached(
-                    StartPositionLeft + (left_target * direction),
-                    StartPositionRight + (right_target * direction)):
-                time.sleep(0.1)
-
-            # reset to original speed once done
-            # if non-blocking, then the user is responsible in resetting the speed
-            self.set_speed(speed)
-
-        return
+        if degrees < 0:
+            left_speed, right_speed = slow_speed, fast_speed
+        else:
+            left_speed, right_speed = fast_speed, slow_speed
+        return (left_target * direction, right_target * direction, left_speed, right_speed)
 
 
     def target_reached(self, left_target_degrees, right_target_degrees):
@@ -572,8 +747,7 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
         min_right_target = right_target_degrees - tolerance
         max_right_target = right_target_degrees + tolerance
 
-        current_left_position = self.get_motor_encoder(self.MOTOR_LEFT)
-        current_right_position = self.get_motor_encoder(self.MOTOR_RIGHT)
+        current_left_position, current_right_position = self.read_encoders()
 
         if current_left_position > min_left_target and \
            current_left_position < max_left_target and \
@@ -596,8 +770,7 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
 
         """
         self.set_motor_power(self.MOTOR_LEFT + self.MOTOR_RIGHT, 0)
-        left_target = self.get_motor_encoder(self.MOTOR_LEFT)
-        right_target = self.get_motor_encoder(self.MOTOR_RIGHT)
+        left_target, right_target = self.read_encoders()
         self.offset_motor_encoder(self.MOTOR_LEFT, left_target)
         self.offset_motor_encoder(self.MOTOR_RIGHT, right_target)
 
@@ -620,13 +793,10 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
         :returns: A tuple containing the position in degrees of each encoder. The 1st element is for the left motor and the 2nd is for the right motor.
         :rtype: tuple(int,int)
 
-        """
+        Both encoders are read together with :py:meth:`~gopigo3.GoPiGo3.get_motors_snapshot`.
 
-        left_encoder = self.get_motor_encoder(self.MOTOR_LEFT)
-        right_encoder = self.get_motor_encoder(self.MOTOR_RIGHT)
-        encoders = (left_encoder, right_encoder)
-
-        return encoders
+        """
+        return self.get_motors_snapshot().encoders
 
     def read_encoders_average(self, units="cm"):
         """
@@ -661,6 +831,8 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
              * ``True`` so that the method will wait for the `GoPiGo3`_ robot to finish moving.
              * ``False`` so that the method will exit immediately while the `GoPiGo3`_ robot will continue moving.
 
+        :returns: The :py:class:`~gopigo3.motion.MotionHandle` of the turn, completed already if ``blocking``.
+
         In order to better understand what does this method do, let's take a look at the following graphical representation.
 
         .. image:: ../images/gpg3_robot.svg
@@ -692,20 +864,12 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
                             360)
 
         # get the starting position of each motor
-        StartPositionLeft = self.get_motor_encoder(self.MOTOR_LEFT)
-        StartPositionRight = self.get_motor_encoder(self.MOTOR_RIGHT)
+        StartPositionLeft, StartPositionRight = self.read_encoders()
 
         # Set each motor target
-        self.set_motor_position(self.MOTOR_LEFT,
-                                (StartPositionLeft + WheelTurnDegrees))
-        self.set_motor_position(self.MOTOR_RIGHT,
-                                (StartPositionRight - WheelTurnDegrees))
-
-        if blocking:
-            while not self.target_reached(
-                    StartPositionLeft + WheelTurnDegrees,
-                    StartPositionRight - WheelTurnDegrees):
-                time.sleep(0.1)
+        return self._start_move(StartPositionLeft, StartPositionRight,
+                                WheelTurnDegrees, -WheelTurnDegrees,
+                                blocking)
 
 
     def blinker_on(self, id):
@@ -983,7 +1147,7 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
         The ``use_mutex`` parameter of the :py:meth:`~easygopigo3.EasyGoPiGo3.__init__` constructor is passed down to the constructor of :py:class:`~di_sensors.easy_line_follower.EasyLineFollower` class.
 
         """
-        if not di_sensors_available:
+        if not _load_di_sensors():
             raise ImportError("di_sensors library not found")
 
         lf = easy_line_follower.EasyLineFollower(port, use_mutex=self.use_mutex)
@@ -1030,7 +1194,7 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
              | If the devices share the same address, like two distance sensors for example, you can still use them with the GoPiGo3 provided at least one is connected via the ``"AD1"``, or ``"AD2"``, port.
 
         """
-        if not di_sensors_available:
+        if not _load_di_sensors():
             raise ImportError("di_sensors library not available")
 
         try:
@@ -1066,7 +1230,7 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
              | If the devices share the same address, like two light/color sensors for example, you can still use them with the GoPiGo3 provided at least one is connected via the ``"AD1"``, or ``"AD2"``, port.
 
         """
-        if not di_sensors_available:
+        if not _load_di_sensors():
             raise ImportError("di_sensors library not available")
 
         try:
@@ -1102,7 +1266,7 @@ class EasyGoPiGo3(gopigo3.GoPiGo3):
 
         """
 
-        if not di_sensors_available:
+        if not _load_di_sensors():
             raise ImportError("di_sensors library not available")
 
         try:
@@ -1176,7 +1340,8 @@ def old_instantiation(fct_to_call,
         use_mutex=False):
     if not isinstance(gpg, gopigo3.GoPiGo3):
         raise TypeError("Use a GoPiGo3 object for the gpg parameter.")
-    if gpg.use_mutex != use_mutex and not mutex.overall_mutex():
+    from gopigo3.locks import get_lock_manager
+    if gpg.use_mutex != use_mutex and not get_lock_manager().overall_mutex():
         gpg_mutex = "uses" if gpg.use_mutex else "does not use"
         sensor_mutex = "does" if use_mutex else "does not"
         raise ValueError(f"Invalid use of mutex: the GoPiGo3 {gpg_mutex} mutex protection and the {sensor_description} {sensor_mutex}.")
@@ -1262,7 +1427,7 @@ def LineFollower(port="I2C", gpg=None, use_mutex=False):
     """
     Use :py:class:`di_sensors.easy_line_follower.EasyLineFollower` instead
     """
-    if di_sensors_available is False:
+    if not _load_di_sensors():
         raise ImportError("di_sensors library not available")
 
     lf = easy_line_follower.EasyLineFollower(port, use_mutex=use_mutex)
@@ -1300,3 +1465,14 @@ def DHTSensor(gpg=None, sensor_type=0, use_mutex=False):
     warnings.warn(msg, DeprecationWarning)
     print(msg)
     return gpg.init_dht_sensor(sensor_type=sensor_type)
+
+
+def __getattr__(name):
+    # the names that used to be set at import time
+    if name == "mutex":
+        return _get_mutex()
+    if name == "di_sensors_available":
+        return _load_di_sensors()
+    if name in _DI_SENSORS_MODULES and _load_di_sensors():
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,38 +1,82 @@
-from I2C_mutex import Mutex
 import time
 
 # needed for duck typing
 import gopigo3
 import operator
+from gopigo3.locks import get_lock_manager, grove_resource, RESOURCE_HW_I2C, RESOURCE_SERIAL
 
-mutex = Mutex()
+# The I2C mutex and the di_sensors library are only loaded when first needed,
+# which keeps `import easysensors` fast and free of side effects. Reading
+# `mutex`, `di_sensors_available` or one of the di_sensors modules loads them,
+# see __getattr__ at the end of the module.
+_mutex = None
+_di_sensors_available = None  # None until _load_di_sensors() has tried to import the library
+_DI_SENSORS_MODULES = ("easy_line_follower", "easy_distance_sensor")
 
-try:
-    from di_sensors import easy_line_follower, easy_distance_sensor
-    di_sensors_available = True
-except ImportError as err:
-    di_sensors_available = False
-    print(str(err))
-except Exception as err:
-    di_sensors_available = False
-    print(str(err))
 
+def _get_mutex():
+    """
+    Returns the I2C mutex, creating it on first use. It's the one of the lock manager, see :py:mod:`gopigo3.locks`.
+    """
+    global _mutex, mutex
+    if _mutex is None:
+        _mutex = mutex = get_lock_manager().i2c_mutex
+    return _mutex
+
+def _load_di_sensors():
+    """
+    Imports the di_sensors library on first use.
 
-def _ifMutexAcquire(mutex_enabled=False):
+    :returns: Whether the library is available.
     """
-    Acquires the I2C if the ``use_mutex`` parameter of the constructor was set to ``True``.
+    global _di_sensors_available, di_sensors_available, easy_line_follower, easy_distance_sensor
+    if _di_sensors_available is None:
+        try:
+            from di_sensors import easy_line_follower, easy_distance_sensor
+            _di_sensors_available = True
+        except ImportError as err:
+            _di_sensors_available = False
+            print(str(err))
+        except Exception as err:
+            _di_sensors_available = False
+            print(str(err))
+        di_sensors_available = _di_sensors_available
+    return _di_sensors_available
+
+def _ifMutexAcquire(mutex_enabled=False, resource=RESOURCE_HW_I2C):
+    """
+    Acquires the lock of ``resource`` if the ``use_mutex`` parameter of the constructor was set to ``True``.
     Always acquires if system-wide mutex has been set.
 
+    :param str resource: What gets accessed, see :py:mod:`gopigo3.locks`. The hardware I2C bus by default.
+    :returns: Whether the lock was acquired, to pass on to :py:func:`_ifLockedRelease`.
+    :rtype: bool
+    """
+    manager = get_lock_manager()
+    if mutex_enabled or manager.overall_mutex():
+        manager.acquire(resource)
+        return True
+    return False
+
+def _ifMutexRelease(mutex_enabled=False, resource=RESOURCE_HW_I2C):
     """
-    if mutex_enabled or mutex.overall_mutex():
-        mutex.acquire()
+    Releases the lock of ``resource`` if the ``use_mutex`` parameter of the constructor was set to ``True``.
 
-def _ifMutexRelease(mutex_enabled=False):
+    The system-wide mutex flag may have changed since the lock was acquired: prefer :py:func:`_ifLockedRelease`.
     """
-    Releases the I2C if the ``use_mutex`` parameter of the constructor was set to ``True``.
+    manager = get_lock_manager()
+    if mutex_enabled or manager.overall_mutex():
+        manager.release(resource)
+
+def _ifLockedRelease(locked, resource=RESOURCE_HW_I2C):
+    """
+    Releases the lock of ``resource`` if :py:func:`_ifMutexAcquire` acquired it.
+
+    :param bool locked: What :py:func:`_ifMutexAcquire` returned.
+    :param str resource: The resource given to :py:func:`_ifMutexAcquire`.
     """
-    if mutex_enabled or mutex.overall_mutex():
-        mutex.release()
+    if locked:
+        get_lock_manager().release(resource)
 
 def debug(in_str):
     if False:
@@ -129,15 +173,21 @@ class Sensor:
         self.set_pin_mode(pinmode)
         self.use_mutex = use_mutex
 
-        self.reconfig_bus()
+        # a port that's already set up for this kind of sensor doesn't need to be written again
+        self.reconfig_bus(force=False)
 
-    def reconfig_bus(self):
+    def reconfig_bus(self, force=True):
         """
         Sets the bus properly. Sometimes this needs to be done even after instantiation when two processes are
         trying to connect to the GoPiGo and one re-initialises the ports.
+
+        :param boolean force = True: Send the grove type and mode even if the write cache of the GoPiGo3 (see :py:meth:`~gopigo3.GoPiGo3.enable_write_cache`) says the port is already configured that way.
         """
         pinmode = self.get_pin_mode()
         try:
+            if force and self.portID > 0:
+                self.gpg.invalidate_write_cache("grove_type", self.portID)
+                self.gpg.invalidate_write_cache("grove_mode", self.portID)
             # I2C sensors don't need a valid gpg
             if pinmode == "INPUT":
                 self.gpg.set_grove_type(self.portID,
@@ -1441,9 +1491,12 @@ class Remote(Sensor):
 
         """
         try:
-            _ifMutexAcquire(self.use_mutex)
-            val = self.gpg.get_grove_value(self.get_port_ID())
-            _ifMutexRelease(self.use_mutex)
+            resource = grove_resource(self.get_port_ID())
+            locked = _ifMutexAcquire(self.use_mutex, resource)
+            try:
+                val = self.gpg.get_grove_value(self.get_port_ID())
+            finally:
+                _ifLockedRelease(locked, resource)
             return val
         except gopigo3.SensorError as e:
             print("Invalid Reading")
@@ -1646,13 +1699,13 @@ class DHTSensor(Sensor):
 
         from di_sensors import DHT
 
-        _ifMutexAcquire(self.use_mutex)
+        locked = _ifMutexAcquire(self.use_mutex, RESOURCE_SERIAL)
         try:
             temp = DHT.dht(self.sensor_type)[0]
         except Exception:
             raise
         finally:
-            _ifMutexRelease(self.use_mutex)
+            _ifLockedRelease(locked, RESOURCE_SERIAL)
 
         if temp == -2:
             return "Bad reading, try again"
@@ -1675,13 +1728,13 @@ class DHTSensor(Sensor):
         """
         from di_sensors import DHT
 
-        _ifMutexAcquire(self.use_mutex)
+        locked = _ifMutexAcquire(self.use_mutex, RESOURCE_SERIAL)
         try:
             humidity = DHT.dht(self.sensor_type)[1]
         except Exception:
             raise
         finally:
-            _ifMutexRelease(self.use_mutex)
+            _ifLockedRelease(locked, RESOURCE_SERIAL)
 
         if humidity == -2:
             return "Bad reading, try again"
@@ -1704,13 +1757,13 @@ class DHTSensor(Sensor):
         """
         from di_sensors import DHT
 
-        _ifMutexAcquire(self.use_mutex)
+        locked = _ifMutexAcquire(self.use_mutex, RESOURCE_SERIAL)
         try:
             [temp, humidity]=DHT.dht(self.sensor_type)
         except Exception:
             raise
         finally:
-            _ifMutexRelease(self.use_mutex)
+            _ifLockedRelease(locked, RESOURCE_SERIAL)
 
         if temp ==-2.0 or humidity == -2.0:
             return "Bad reading, try again"
@@ -1733,7 +1786,7 @@ def LineFollower(port="I2C", gpg=None, use_mutex=False):
     :raises IOError: If the line follower is not responding.
 
     """
-    if di_sensors_available is False:
+    if not _load_di_sensors():
         raise ImportError("di_sensors library not available")
 
     lf = easy_line_follower.EasyLineFollower(port, use_mutex=use_mutex)
@@ -1780,3 +1833,14 @@ def LineFollower(port="I2C", gpg=None, use_mutex=False):
 
 if __name__ == '__main__':
     print("No default test")
+
+
+def __getattr__(name):
+    # the names that used to be set at import time
+    if name == "mutex":
+        return _get_mutex()
+    if name == "di_sensors_available":
+        return _load_di_sensors()
+    if name in _DI_SENSORS_MODULES and _load_di_sensors():
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
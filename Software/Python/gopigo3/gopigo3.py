@@ -19,14 +19,91 @@ except Exception:
 
 import math       # import math for math.pi constant
 import time
-import json
-import subprocess
+import struct
 import sys
-from pathlib import Path
+import threading
+import logging
+
+from .transport import SpiDevTransport, SPIBuffer
+from .telemetry import TelemetryPoller, MotorsSnapshot
+from .spi_tuning import load_spi_speed
+from .grove_i2c import GroveI2CTransaction, I2CTimingModel
+
+_logger = logging.getLogger(__name__)
 
 FIRMWARE_VERSION_REQUIRED = "1.0.x" # Make sure the top 2 of 3 numbers match
 
-if hardware_connected:
+# Precompiled decoders/encoders for the SPI replies and messages.
+# Replies start with 3 bytes of don't care, the 0xA5 marker and then the payload.
+_UINT8     = struct.Struct(">B")
+_UINT16    = struct.Struct(">H")
+_UINT32    = struct.Struct(">I")
+_INT32     = struct.Struct(">i")
+_STATE_U8  = struct.Struct(">BB")   # grove state, 8-bit value
+_STATE_U16 = struct.Struct(">BH")   # grove state, 16-bit value
+_GROVE_U8  = struct.Struct(">BBB")  # grove type, grove state, 8-bit value
+_GROVE_U16 = struct.Struct(">BBH")  # grove type, grove state, 16-bit value
+_MOTOR_STATUS = struct.Struct(">Bbih")  # flags, power, encoder, dps
+
+# The SPI devices are opened, and the power service checked, by the first GoPiGo3
+# object that needs them rather than at import time. See _get_spi_device().
+SPI_BUS = 0
+SPI_DEVICE = 1
+SPI_SPEED_HZ = 500000
+
+GPG_SPI = None  # the device on SPI_BUS/SPI_DEVICE, once it has been opened
+
+# (bus, device) -> (spidev.SpiDev, threading.Lock), shared by every GoPiGo3 on that chip select
+_spi_devices = {}
+_spi_devices_lock = threading.Lock()
+
+_power_service_checked = False
+
+
+def _power_service_marker():
+    """
+    Return the file remembering the boot during which the power service was last found running.
+
+    It's in the runtime directory of the user, or else in their cache directory, and only if
+    no one else may write to the directory: a marker planted by another user would skip the check.
+    """
+    import os
+    directory = os.environ.get("XDG_RUNTIME_DIR")
+    if not directory:
+        cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        directory = os.path.join(cache, "gopigo3")
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    status = os.stat(directory)
+    if status.st_uid != os.geteuid() or status.st_mode & 0o022:
+        raise PermissionError(f"{directory} is writable by other users")
+    return os.path.join(directory, "gopigo3_power")
+
+
+def _check_power_service():
+    """
+    Make sure the gopigo3_power service is running.
+
+    The check runs ``systemctl`` once per boot: a successful check is remembered for
+    the rest of the process, and in a marker file holding the kernel boot id so
+    that the following processes can skip it too.
+    """
+    global _power_service_checked
+    if _power_service_checked:
+        return
+
+    marker = None
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            boot_id = f.read().strip()
+        marker = _power_service_marker()
+        with open(marker) as f:
+            if f.read() == boot_id:
+                _power_service_checked = True
+                return
+    except OSError:
+        pass
+
+    import subprocess
     _svc = subprocess.run(
         ["systemctl", "is-active", "--quiet", "gopigo3_power"],
         capture_output=True
@@ -38,19 +115,53 @@ if hardware_connected:
             "Start it with:\n"
             "  sudo systemctl start gopigo3_power"
         )
+    _power_service_checked = True
 
-    GPG_SPI = spidev.SpiDev()
-    try:
-        GPG_SPI.open(0, 1)
-    except FileNotFoundError:
-        raise SystemExit(
-            "SPI is not enabled. Please enable it with:\n"
-            "  sudo raspi-config  ->  Interface Options  ->  SPI  ->  Enable\n"
-            "then reboot and try again."
-        )
-    GPG_SPI.max_speed_hz = 500000
-    GPG_SPI.mode = 0b00
-    GPG_SPI.bits_per_word = 8
+    if marker is not None:
+        try:
+            with open(marker, "w") as f:
+                f.write(boot_id)
+        except OSError:
+            pass
+
+
+def _get_spi_device(bus = SPI_BUS, device = SPI_DEVICE):
+    """
+    Return the SPI device on a bus and chip select, and the lock that goes with it, opening the device on first use.
+
+    Every GoPiGo3 object on the same chip select shares the device and the lock. Objects on
+    different chip selects or buses don't share anything, so they never wait on each other.
+    The lock only works within this process, see GoPiGo3.spi_session for the other processes.
+    """
+    global GPG_SPI
+    with _spi_devices_lock:
+        entry = _spi_devices.get((bus, device))
+        if entry is None:
+            _check_power_service()
+
+            spi = spidev.SpiDev()
+            try:
+                spi.open(bus, device)
+            except FileNotFoundError:
+                raise SystemExit(
+                    f"SPI device /dev/spidev{bus}.{device} not found. If SPI is not enabled, enable it with:\n"
+                    "  sudo raspi-config  ->  Interface Options  ->  SPI  ->  Enable\n"
+                    "then reboot and try again."
+                )
+            spi.max_speed_hz = SPI_SPEED_HZ
+            spi.mode = 0b00
+            spi.bits_per_word = 8
+            entry = _spi_devices[(bus, device)] = (spi, threading.Lock())
+            if (bus, device) == (SPI_BUS, SPI_DEVICE):
+                GPG_SPI = spi
+    return entry
+
+
+def _get_gpg_spi():
+    """
+    Return the SPI device of the GoPiGo3 on the default bus and chip select, opening it on first use.
+    """
+    return _get_spi_device()[0]
 
 
 class Enumeration:
@@ -83,6 +194,135 @@ class GoPiGoValueError(Exception):
     """Exception raised if trying to read an invalid value"""
 
 
+class _BatchCapture(BaseException):
+    """
+    Raised by GoPiGo3.spi_transfer_array while an SPIBatch collects messages.
+    Derived from BaseException so that the ``except Exception`` blocks in the
+    GoPiGo3 methods don't swallow it.
+    """
+    def __init__(self, data_out):
+        self.data_out = data_out
+
+
+class SPIBatch:
+    """
+    Collect calls to GoPiGo3 methods and send all of their SPI messages with one transport call.
+
+    Every call made through the batch returns a ``concurrent.futures.Future`` which gets its result
+    (or exception) once the batch is flushed, which happens when leaving the ``with`` block.
+
+    .. code-block:: python
+
+        with gpg.batch() as batch:
+            left = batch.get_motor_encoder(gpg.MOTOR_LEFT)
+            right = batch.get_motor_encoder(gpg.MOTOR_RIGHT)
+            battery = batch.get_voltage_battery()
+            batch.set_motor_dps(gpg.MOTOR_LEFT + gpg.MOTOR_RIGHT, 300)
+
+        print(left.result(), right.result(), battery.result())
+
+    Each method is run twice: once to capture the message it sends, and once more after the
+    transfer to decode its reply. Methods which need more than one SPI transaction (for instance
+    :py:meth:`~gopigo3.GoPiGo3.reset_motor_encoder`) only get their first message batched, the
+    following ones are sent right away while the method is decoding.
+    """
+
+    def __init__(self, gpg):
+        self._gpg = gpg
+        self._calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self._gpg, name)
+        if not callable(method):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            return self.submit(method, *args, **kwargs)
+        return queue
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        else:
+            for call in self._calls:
+                call[3].cancel()
+            self._calls = []
+        return False
+
+    def submit(self, method, *args, **kwargs):
+        """
+        Queue a call to ``method(*args, **kwargs)``. ``method`` has to be a method of the batched GoPiGo3 object.
+
+        Returns a ``concurrent.futures.Future`` for the result of the call.
+        """
+        from concurrent.futures import Future
+        future = Future()
+        self._calls.append((method, args, kwargs, future))
+        return future
+
+    def flush(self):
+        """
+        Send the messages of all the queued calls and resolve their futures.
+        """
+        calls, self._calls = self._calls, []
+        state = self._gpg._batch_state
+
+        messages = []
+        captured = []
+        state.active = True
+        for call in calls:
+            method, args, kwargs, future = call
+            if not future.set_running_or_notify_cancel():
+                continue
+            state.capture = True
+            try:
+                result = method(*args, **kwargs)
+            except _BatchCapture as capture:
+                messages.append(capture.data_out)
+                captured.append(call)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                # nothing had to be sent
+                future.set_result(result)
+            finally:
+                state.capture = False
+
+        if not messages:
+            state.active = False
+            return
+        stats = self._gpg.stats
+        start = time.perf_counter()
+        try:
+            replies = self._gpg.transport.transfer_many(messages)
+        except Exception as e:
+            state.active = False
+            if stats is not None:
+                for data_out in messages:
+                    stats.record_exception(data_out[1], len(data_out))
+            for call in captured:
+                call[3].set_exception(e)
+            return
+        if stats is not None:
+            # the messages of a batch share the time of the whole transfer
+            elapsed = (time.perf_counter() - start) / len(messages)
+            for data_out, reply in zip(messages, replies):
+                stats.record(data_out[1], len(data_out), elapsed, reply)
+
+        for (method, args, kwargs, future), reply in zip(captured, replies):
+            state.reply = reply
+            try:
+                future.set_result(method(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                state.reply = None
+        state.active = False
+
+
 class GoPiGo3:
     WHEEL_BASE_WIDTH         = 117  # distance (mm) from left wheel to right wheel. This works with the initial GPG3 prototype. Will need to be adjusted.
     WHEEL_DIAMETER           = 66.5 # wheel diameter (mm)
@@ -170,6 +410,14 @@ class GoPiGo3:
         I2C_ERROR,
     """)
 
+    # priority classes of the SPI scheduler, the most urgent first (see enable_scheduler)
+    SPI_PRIORITY = Enumeration("""
+        SAFETY,
+        CONTROL,
+        TELEMETRY,
+        DIAGNOSTICS,
+    """)
+
     LED_EYE_LEFT      = 0x02
     LED_EYE_RIGHT     = 0x01
     LED_BLINKER_LEFT  = 0x04
@@ -211,13 +459,25 @@ class GoPiGo3:
     GROVE_LOW  = 0
     GROVE_HIGH = 1
 
-    def __init__(self, addr = 8, detect = True, config_file_path=None):
+    def __init__(self, addr = 8, detect = True, config_file_path=None, transport=None,
+                 bus = SPI_BUS, device = SPI_DEVICE, speed_hz = None, use_broker = None, use_tuned_spi = None):
         """
         Do any necessary configuration, and optionally detect the GoPiGo3
 
         * Optionally set the SPI address to something other than 8
+        * Optionally use another SPI ``bus``, chip select (``device``) or clock (``speed_hz``), to drive
+          several GoPiGo3 boards from the same process. Each board gets its own transport and lock.
+          Without a ``speed_hz``, the clock is 500 kHz. With ``use_tuned_spi`` set to True or the ``GOPIGO3_TUNED_SPI``
+          environment variable set to 1, the clock found by ``gopigo3-tune-spi`` (see :py:mod:`gopigo3.spi_tuning`) is
+          used instead, if the board was tuned. Should the board not answer at the tuned clock, 500 kHz is used instead.
         * Optionally disable the detection of the GoPiGo3 hardware. This can be used for debugging
           and testing when the GoPiGo3 would otherwise not pass the detection tests.
+        * Optionally talk to the GoPiGo3 through another ``transport`` than the SPI bus, like
+          :py:class:`~gopigo3.simulator.GoPiGo3Simulator` when no GoPiGo3 is attached.
+          Without a ``transport``, the SPI device is opened.
+        * Optionally share the SPI device with other processes through the :py:mod:`gopigo3.broker`, with
+          ``use_broker`` set to True or the ``GOPIGO3_BROKER`` environment variable set to 1. The device is
+          opened directly if no broker is running for it.
 
         The ``config_file_path`` parameter represents the path to a JSON file. The presence of this configuration file is optional and is only required in cases where
         the GoPiGo3 has a skewed trajectory due to minor differences in these two constants: the **wheel diameter** and the **wheel base width**. In most cases, this won't be the case.
@@ -237,12 +497,65 @@ class GoPiGo3:
         # Ensure SPI is enabled via 'dtparam=spi=on' in /boot/firmware/config.txt
         # (use 'sudo raspi-config' -> Interface Options -> SPI).
 
+        tuned = False
+        if transport is not None:
+            _logger.info("GoPiGo3 using the %s transport", type(transport).__name__)
+        else:
+            if use_broker is None:
+                import os
+                use_broker = os.environ.get("GOPIGO3_BROKER", "") in ("1", "true", "yes")
+            if use_broker:
+                # share the SPI device through the broker, see gopigo3.broker
+                from .broker import connect_broker
+                transport = connect_broker(bus, device)
+                if transport is not None:
+                    _logger.info("GoPiGo3 using the broker at %s", transport.path)
+                else:
+                    _logger.info("No GoPiGo3 broker running for /dev/spidev%d.%d, opening the device", bus, device)
+        if transport is None:
+            if not hardware_connected:
+                raise IOError("spidev is not available. Pass a transport to talk to the GoPiGo3.")
+            spi, lock = _get_spi_device(bus, device)
+            if speed_hz is None:
+                if use_tuned_spi is None:
+                    import os
+                    use_tuned_spi = os.environ.get("GOPIGO3_TUNED_SPI", "") in ("1", "true", "yes")
+                if use_tuned_spi:
+                    speed_hz = load_spi_speed(bus, device, config_file_path)
+                    tuned = speed_hz is not None
+                if not tuned:
+                    speed_hz = SPI_SPEED_HZ
+            transport = SpiDevTransport(spi, speed_hz=speed_hz, lock=lock)
+            _logger.info("GoPiGo3 using /dev/spidev%d.%d at %d Hz", bus, device, speed_hz)
+        self.transport = transport
+        self._batch_state = threading.local()
+        self._spi_buffers = threading.local()
+        self.telemetry = None
+        self.odometry = None
+        self.write_cache = None
+        self.stats = None
+        self.stats_dumper = None
+        self.scheduler = None
+        self._replaced_transport = None
+        self.i2c_timing = I2CTimingModel()
+        # held from grove_i2c_begin to grove_i2c_collect, see GroveI2CTransaction
+        self._grove_i2c_locks = [threading.Lock(), threading.Lock()]
+
+        # the grove configuration is kept per board
+        self.GroveType = [0, 0]
+        self.GroveI2CInBytes = [0, 0]
+
         self.SPI_Address = addr
         if detect:
             try:
-                manufacturer = self.get_manufacturer()
-                board = self.get_board()
-                vfw = self.get_version_firmware()
+                try:
+                    manufacturer, board, vfw = self._identify()
+                except IOError:
+                    if not tuned:
+                        raise
+                    print(f"No SPI response at the tuned clock of {speed_hz} Hz. Falling back to {SPI_SPEED_HZ} Hz.")
+                    self.transport.speed_hz = SPI_SPEED_HZ
+                    manufacturer, board, vfw = self._identify()
             except IOError:
                 raise IOError(f"No SPI response. GoPiGo3 with address {addr} not connected.")
             if manufacturer not in ("Dexter Industries", "Modular Robotics") or board != "GoPiGo3":
@@ -260,6 +573,12 @@ class GoPiGo3:
             print(f"Error loading robot constants from file: {e}. Saving default constants to file.")
             self.save_robot_constants(config_file_path)
 
+    def _identify(self):
+        """
+        Read the manufacturer, board name and firmware version
+        """
+        return self.get_manufacturer(), self.get_board(), self.get_version_firmware()
+
     def spi_transfer_array(self, data_out):
         """
         Conduct a SPI transaction
@@ -269,9 +588,428 @@ class GoPiGo3:
 
         Returns a list of the bytes read.
         """
-        result = GPG_SPI.xfer2(data_out)
+        state = self._batch_state
+        if getattr(state, "capture", False):
+            raise _BatchCapture(list(data_out))
+        reply = getattr(state, "reply", None)
+        if reply is not None:
+            state.reply = None
+            return reply
+        stats = self.stats
+        if stats is None:
+            return self.transport.transfer(data_out)
+
+        start = time.perf_counter()
+        try:
+            result = self.transport.transfer(data_out)
+        except Exception:
+            stats.record_exception(data_out[1], len(data_out))
+            raise
+        stats.record(data_out[1], len(data_out), time.perf_counter() - start, result)
         return result
 
+    def spi_transfer_buffer(self, buffer):
+        """
+        Conduct a SPI transaction with preallocated buffers
+
+        Keyword arguments:
+        buffer -- an SPIBuffer. The bytes of buffer.tx are sent, and the bytes read are written to buffer.rx.
+
+        Returns buffer.rx
+        """
+        if getattr(self._batch_state, "active", False):
+            buffer.rx[:] = bytes(self.spi_transfer_array(list(buffer.tx)))
+            return buffer.rx
+        stats = self.stats
+        if stats is None:
+            self.transport.transfer_buffer(buffer)
+            return buffer.rx
+
+        start = time.perf_counter()
+        try:
+            self.transport.transfer_buffer(buffer)
+        except Exception:
+            stats.record_exception(buffer.tx[1], len(buffer.tx))
+            raise
+        stats.record(buffer.tx[1], len(buffer.tx), time.perf_counter() - start, buffer.rx)
+        return buffer.rx
+
+    def _spi_buffer(self, message_type, length):
+        """
+        Get this thread's preallocated buffer for a message type and length.
+        The address and message type are already filled in, the rest of the message is zeroed.
+        """
+        buffers = self._spi_buffers.__dict__
+        key = (self.SPI_Address, message_type, length)
+        buffer = buffers.get(key)
+        if buffer is None:
+            data_out = [0] * length
+            data_out[0] = self.SPI_Address
+            data_out[1] = message_type
+            buffer = buffers[key] = SPIBuffer(data_out)
+        return buffer
+
+    def _spi_read(self, message_type, length):
+        """
+        Send a read message of ``length`` bytes and return the reply, checking it for the 0xA5 marker.
+        """
+        reply = self.spi_transfer_buffer(self._spi_buffer(message_type, length))
+        if reply[3] != 0xA5:
+            raise IOError("No SPI response")
+        return reply
+
+    def start_telemetry(self, rate = 100, grove_ports = (), publish = False, publish_path = None):
+        """
+        Start sampling the GoPiGo3 on a background thread
+
+        Keyword arguments:
+        rate -- samples per second
+        grove_ports -- grove ports (GROVE_1 and/or GROVE_2) whose value gets sampled too
+        publish -- also publish the samples to shared memory, for other processes calling use_shared_telemetry
+        publish_path -- the shared memory file to publish to, by default gopigo3.telemetry_bus.DEFAULT_PATH
+
+        Once started, get_motor_status, get_motor_encoder, get_voltage_battery, get_voltage_5v and
+        get_grove_value return the sampled value when called with a max_age and the latest sample is
+        at most max_age seconds old. Without a max_age they keep reading the GoPiGo3.
+
+        Returns the TelemetryPoller.
+        """
+        self.stop_telemetry()
+        publisher = None
+        if publish or publish_path is not None:
+            from .telemetry_bus import TelemetryPublisher, DEFAULT_PATH
+            publisher = TelemetryPublisher(publish_path if publish_path is not None else DEFAULT_PATH)
+        self.telemetry = TelemetryPoller(self, rate, grove_ports, publisher)
+        self.telemetry.start()
+        return self.telemetry
+
+    def use_shared_telemetry(self, path = None):
+        """
+        Use the samples another process publishes with start_telemetry(publish=True) instead of sampling
+
+        Keyword arguments:
+        path -- the shared memory file, by default gopigo3.telemetry_bus.DEFAULT_PATH
+
+        The getters then behave as after start_telemetry: called with a max_age, they return the published
+        value if it's recent enough, otherwise they read the GoPiGo3. Stop with stop_telemetry.
+
+        Returns the TelemetryReader.
+        """
+        from .telemetry_bus import TelemetryReader, DEFAULT_PATH
+        self.stop_telemetry()
+        self.telemetry = TelemetryReader(path if path is not None else DEFAULT_PATH)
+        return self.telemetry
+
+    def stop_telemetry(self):
+        """
+        Stop the background sampling started with start_telemetry, or the use of the shared telemetry
+        """
+        if self.telemetry is not None:
+            self.telemetry.stop()
+            self.telemetry = None
+
+    def start_odometry(self, rate = 100, history = 1000):
+        """
+        Start tracking the pose of the robot from the wheel encoders, on a background thread
+
+        Keyword arguments:
+        rate -- updates per second
+        history -- how many poses are kept for Odometry.pose_at
+
+        The pose starts at x = y = theta = 0. When telemetry is running at least as fast, the odometry
+        uses its samples instead of reading the encoders itself.
+
+        Returns the Odometry.
+        """
+        from .odometry import Odometry
+        self.stop_odometry()
+        self.odometry = Odometry(self, rate, history)
+        self.odometry.start()
+        return self.odometry
+
+    def stop_odometry(self):
+        """
+        Stop the pose tracking started with start_odometry
+        """
+        if self.odometry is not None:
+            self.odometry.stop()
+            self.odometry = None
+
+    def _telemetry_snapshot(self, max_age):
+        """
+        Return the latest telemetry snapshot if there's one at most max_age seconds old, otherwise None
+        """
+        telemetry = self.telemetry
+        if max_age is None or telemetry is None:
+            return None
+        return telemetry.fresh_snapshot(max_age)
+
+    def enable_write_cache(self):
+        """
+        Skip writes that wouldn't change anything
+
+        Once enabled, set_led, set_servo, set_motor_power, set_motor_position, set_motor_dps, set_grove_type
+        and set_grove_mode don't send anything when the LEDs, servos, motors or grove pins they address
+        already got the same value from this object. reset_all empties the cache.
+
+        Only enable it when this object is the only one writing to the GoPiGo3: writes from other
+        objects or processes aren't seen by the cache. Call invalidate_write_cache after another
+        program may have changed the GoPiGo3 state.
+
+        Returns the WriteCache.
+        """
+        if self.write_cache is None:
+            from .write_cache import WriteCache
+            self.write_cache = WriteCache()
+        return self.write_cache
+
+    def disable_write_cache(self):
+        """
+        Send every write again, see enable_write_cache
+        """
+        self.write_cache = None
+
+    def invalidate_write_cache(self, register = None, mask = None):
+        """
+        Forget the cached writes, so that the next ones are sent
+
+        Keyword arguments:
+        register -- optional. Only forget this register: "led", "servo", "motor", "grove_type" or "grove_mode"
+        mask -- optional. Only forget these LEDs, servos, motor ports or grove pins of the register
+        """
+        if self.write_cache is not None:
+            self.write_cache.forget(register, mask)
+
+    def get_write_cache_stats(self):
+        """
+        Get how many writes were sent and skipped since enable_write_cache
+
+        Returns a dict of register -> {"sent": count, "skipped": count}. Empty when the cache isn't enabled.
+        """
+        if self.write_cache is None:
+            return {}
+        return self.write_cache.stats()
+
+    def enable_stats(self):
+        """
+        Start counting the SPI transactions
+
+        Once enabled, every SPI transaction is counted per message type, with the bytes transferred,
+        the replies missing the 0xA5 marker, the transfers that raised and a latency histogram.
+        Grove I2C retries and timeouts are counted too. See get_stats.
+
+        Returns the SPIStats.
+        """
+        if self.stats is None:
+            from .instrumentation import SPIStats
+            names = {value: name for name, value in vars(self.SPI_MESSAGE_TYPE).items()}
+            read_types = [value for name, value in vars(self.SPI_MESSAGE_TYPE).items()
+                          if name.startswith("GET_") or name.startswith("START_GROVE_I2C_")]
+            self.stats = SPIStats(names, read_types)
+        return self.stats
+
+    def disable_stats(self):
+        """
+        Stop counting the SPI transactions, and stop the periodic dump
+        """
+        self.stop_stats_dump()
+        self.stats = None
+
+    def reset_stats(self):
+        """
+        Set all the SPI counters back to 0
+        """
+        if self.stats is not None:
+            self.stats = None
+            self.enable_stats()
+
+    def get_stats(self):
+        """
+        Get the SPI statistics collected since enable_stats
+
+        Returns a dict with the "elapsed" seconds, the "messages" by message type name, each with
+        "count", "errors", "exceptions", "bytes" and a "latency" summary in microseconds, and the
+        "events" counts. Empty when the statistics aren't enabled.
+        """
+        if self.stats is None:
+            return {}
+        return self.stats.as_dict()
+
+    def start_stats_dump(self, interval = 60.0, log = None):
+        """
+        Log the SPI statistics every interval seconds, on a background thread
+
+        Keyword arguments:
+        interval -- seconds between two dumps
+        log -- function called with the text of each dump. Defaults to print.
+
+        Enables the statistics if they aren't yet. Returns the StatsDumper.
+        """
+        self.enable_stats()
+        self.stop_stats_dump()
+        from .instrumentation import StatsDumper
+        self.stats_dumper = StatsDumper(self, interval, log)
+        self.stats_dumper.start()
+        return self.stats_dumper
+
+    def stop_stats_dump(self):
+        """
+        Stop the periodic dump started with start_stats_dump
+        """
+        if self.stats_dumper is not None:
+            self.stats_dumper.stop()
+            self.stats_dumper = None
+
+    def enable_scheduler(self, priorities = None):
+        """
+        Send the SPI messages of all threads by priority instead of first come first served, see :py:mod:`gopigo3.scheduler`
+
+        Keyword arguments:
+        priorities -- optional. A dict of SPI message type -> SPI_PRIORITY, overriding the default priority classes
+
+        Motor commands go first (SPI_PRIORITY.SAFETY), then motor status and encoder reads and the other writes
+        (CONTROL), then voltage and grove reads (TELEMETRY), then the identification reads (DIAGNOSTICS). Identical
+        reads queued at the same time share one transfer. Use spi_priority to change the class of a thread's messages.
+
+        Returns the SchedulingTransport.
+        """
+        if self.scheduler is None:
+            from .scheduler import SchedulingTransport
+            self.scheduler = SchedulingTransport(self.transport, priorities)
+            self.transport = self.scheduler
+        return self.scheduler
+
+    def disable_scheduler(self):
+        """
+        Go back to sending the SPI messages in the order they come
+        """
+        scheduler = self.scheduler
+        if scheduler is None:
+            return
+        if self.transport is scheduler:
+            self.transport = scheduler.transport
+        elif getattr(self.transport, "transport", None) is scheduler:
+            # recording on top of the scheduler
+            self.transport.transport = scheduler.transport
+        self.scheduler = None
+
+    def spi_priority(self, priority):
+        """
+        Give the SPI messages the calling thread sends within a with block another priority class
+
+        Keyword arguments:
+        priority -- one of SPI_PRIORITY. Motor commands stay SPI_PRIORITY.SAFETY whatever this is.
+
+        Does nothing unless enable_scheduler was called.
+
+        .. code-block:: python
+
+            with gpg.spi_priority(gpg.SPI_PRIORITY.DIAGNOSTICS):
+                log(gpg.get_voltage_battery())
+        """
+        if self.scheduler is None:
+            from contextlib import nullcontext
+            return nullcontext()
+        return self.scheduler.priority(priority)
+
+    def get_scheduler_stats(self):
+        """
+        Get the queueing statistics of the SPI scheduler
+
+        Returns a dict of priority class name -> {"requests": count, "coalesced": count, "delay": summary}, where
+        delay summarizes in microseconds the time messages spent queued, plus "max_queue_depth". Empty when the
+        scheduler isn't enabled.
+        """
+        if self.scheduler is None:
+            return {}
+        return self.scheduler.get_stats()
+
+    def start_recording(self, path):
+        """
+        Log every SPI message and its reply to a file, see :py:mod:`gopigo3.recording`
+
+        Keyword arguments:
+        path -- the log file. It gets overwritten.
+
+        Returns the RecordingTransport.
+        """
+        from .recording import RecordingTransport
+        self.stop_recording()
+        self.transport = RecordingTransport(self.transport, path)
+        return self.transport
+
+    def stop_recording(self):
+        """
+        Stop the log started with start_recording
+        """
+        from .recording import RecordingTransport
+        # the recording may be under the scheduler, if it was enabled afterwards
+        outer = None
+        transport = self.transport
+        while transport is not None and not isinstance(transport, RecordingTransport):
+            outer = transport
+            transport = getattr(transport, "transport", None)
+        if transport is None:
+            return
+        transport.stop()
+        if outer is None:
+            self.transport = transport.transport
+        else:
+            outer.transport = transport.transport
+
+    def start_replay(self, path, realtime = False, strict = True):
+        """
+        Answer the SPI messages from a log written by start_recording instead of the GoPiGo3
+
+        Keyword arguments:
+        path -- the log file
+        realtime -- hold every reply back to the pace of the recording, instead of answering as fast as possible
+        strict -- raise gopigo3.recording.ReplayError when a message differs from the recorded one
+
+        Returns the ReplayTransport.
+        """
+        from .recording import ReplayTransport
+        self.stop_replay()
+        replay = ReplayTransport(path, realtime, strict)
+        self._replaced_transport = self.transport
+        self.transport = replay
+        return replay
+
+    def stop_replay(self):
+        """
+        Go back to the transport used before start_replay
+        """
+        if self._replaced_transport is not None:
+            self.transport.close()
+            self.transport = self._replaced_transport
+            self._replaced_transport = None
+
+    def batch(self):
+        """
+        Start a batch of SPI transactions. See :py:class:`~gopigo3.SPIBatch`.
+
+        :returns: A :py:class:`~gopigo3.SPIBatch` meant to be used as a context manager.
+        """
+        return SPIBatch(self)
+
+    def spi_session(self):
+        """
+        Keep the other processes taking the MCU link lock off the GoPiGo3 within a with block
+
+        The SPI transfers only lock against the other threads of this process, which keeps them cheap.
+        Processes that open the SPI device on their own, rather than through the broker, and run
+        sequences that mustn't interleave with each other hold the RESOURCE_MCU_SPI lock of
+        gopigo3.locks around them with this. It's taken through the LockManager, so after the other
+        resources a sequence needs.
+
+        .. code-block:: python
+
+            with gpg.spi_session():
+                gpg.offset_motor_encoder(gpg.MOTOR_LEFT, gpg.get_motor_encoder(gpg.MOTOR_LEFT))
+        """
+        from .locks import get_lock_manager, RESOURCE_MCU_SPI
+        return get_lock_manager().locked(RESOURCE_MCU_SPI)
+
     def spi_read_8(self, MessageType):
         """
         Read an 8-bit value over SPI
@@ -282,11 +1020,7 @@ class GoPiGo3:
         Returns touple:
         value, error
         """
-        outArray = [self.SPI_Address, MessageType, 0, 0, 0]
-        reply = self.spi_transfer_array(outArray)
-        if(reply[3] == 0xA5):
-            return reply[4]
-        raise IOError("No SPI response")
+        return _UINT8.unpack_from(self._spi_read(MessageType, 5), 4)[0]
 
     def spi_read_16(self, MessageType):
         """
@@ -298,11 +1032,7 @@ class GoPiGo3:
         Returns touple:
         value, error
         """
-        outArray = [self.SPI_Address, MessageType, 0, 0, 0, 0]
-        reply = self.spi_transfer_array(outArray)
-        if(reply[3] == 0xA5):
-            return (reply[4] << 8) | reply[5]
-        raise IOError("No SPI response")
+        return _UINT16.unpack_from(self._spi_read(MessageType, 6), 4)[0]
 
     def spi_read_32(self, MessageType):
         """
@@ -314,11 +1044,7 @@ class GoPiGo3:
         Returns touple:
         value, error
         """
-        outArray = [self.SPI_Address, MessageType, 0, 0, 0, 0, 0, 0]
-        reply = self.spi_transfer_array(outArray)
-        if(reply[3] == 0xA5):
-            return (reply[4] << 24) | (reply[5] << 16) | (reply[6] << 8) | reply[7]
-        raise IOError("No SPI response")
+        return _UINT32.unpack_from(self._spi_read(MessageType, 8), 4)[0]
 
     def spi_write_32(self, MessageType, Value):
         """
@@ -388,6 +1114,8 @@ class GoPiGo3:
         If the file has content, the robot constants are redefined based on that content. Should tick and gear_ratio be missing, default values will be supplied.
         """
 
+        import json
+
         # Default config file path: user home directory
         if config_file_path is None:
             import os
@@ -457,6 +1185,8 @@ class GoPiGo3:
             }
 
         """
+        import json
+
         # Default config file path: user home directory
         if config_file_path is None:
             import os
@@ -602,26 +1332,45 @@ class GoPiGo3:
         if blue < 0:
             blue = 0
 
+        cache = self.write_cache
+        if cache is not None and cache.unchanged("led", led, (red, green, blue)):
+            return
+
         outArray = [self.SPI_Address, self.SPI_MESSAGE_TYPE.SET_LED, led, red, green, blue]
         reply = self.spi_transfer_array(outArray)
 
-    def get_voltage_5v(self):
+        if cache is not None:
+            cache.update("led", led, (red, green, blue))
+
+    def get_voltage_5v(self, max_age = None):
         """
         Get the 5v circuit voltage
 
+        Keyword arguments:
+        max_age -- optional. Accept a telemetry sample up to this many seconds old (see start_telemetry)
+
         Returns touple:
         5v circuit voltage, error
         """
+        snapshot = self._telemetry_snapshot(max_age)
+        if snapshot is not None:
+            return snapshot.voltage_5v
         value = self.spi_read_16(self.SPI_MESSAGE_TYPE.GET_VOLTAGE_5V)
         return (value / 1000.0)
 
-    def get_voltage_battery(self):
+    def get_voltage_battery(self, max_age = None):
         """
         Get the battery voltage
 
+        Keyword arguments:
+        max_age -- optional. Accept a telemetry sample up to this many seconds old (see start_telemetry)
+
         Returns touple:
         battery voltage, error
         """
+        snapshot = self._telemetry_snapshot(max_age)
+        if snapshot is not None:
+            return snapshot.voltage_battery
         value = self.spi_read_16(self.SPI_MESSAGE_TYPE.GET_VOLTAGE_VCC)
         return (value / 1000.0)
 
@@ -633,10 +1382,17 @@ class GoPiGo3:
         servo -- The servo(s). SERVO_1 and/or SERVO_2.
         us -- The pulse width in microseconds (0-16666)
         """
+        cache = self.write_cache
+        if cache is not None and cache.unchanged("servo", servo, us):
+            return
+
         outArray = [self.SPI_Address, self.SPI_MESSAGE_TYPE.SET_SERVO, servo,\
                     ((us >> 8) & 0xFF), (us & 0xFF)]
         reply = self.spi_transfer_array(outArray)
 
+        if cache is not None:
+            cache.update("servo", servo, us)
+
     def set_motor_power(self, port, power):
         """
         Set the motor power in percent
@@ -649,9 +1405,19 @@ class GoPiGo3:
             power = 127
         if(power < -128):
             power = -128
-        outArray = [self.SPI_Address, self.SPI_MESSAGE_TYPE.SET_MOTOR_PWM, port, int(power)]
+        power = int(power)
+
+        # the motor targets are cached together with their mode, as each of them replaces the others
+        cache = self.write_cache
+        if cache is not None and cache.unchanged("motor", port, ("power", power)):
+            return
+
+        outArray = [self.SPI_Address, self.SPI_MESSAGE_TYPE.SET_MOTOR_PWM, port, power]
         self.spi_transfer_array(outArray)
 
+        if cache is not None:
+            cache.update("motor", port, ("power", power))
+
     def set_motor_position(self, port, position):
         """
         Set the motor target position in degrees
@@ -661,10 +1427,18 @@ class GoPiGo3:
         position -- The target position
         """
         position_raw = int(position * self.MOTOR_TICKS_PER_DEGREE)
-        outArray = [self.SPI_Address, self.SPI_MESSAGE_TYPE.SET_MOTOR_POSITION, port,\
-                    ((position_raw >> 24) & 0xFF), ((position_raw >> 16) & 0xFF),\
-                    ((position_raw >> 8) & 0xFF), (position_raw & 0xFF)]
-        reply = self.spi_transfer_array(outArray)
+
+        cache = self.write_cache
+        if cache is not None and cache.unchanged("motor", port, ("position", position_raw)):
+            return
+
+        buffer = self._spi_buffer(self.SPI_MESSAGE_TYPE.SET_MOTOR_POSITION, 7)
+        buffer.tx[2] = int(port) & 0xFF
+        _UINT32.pack_into(buffer.tx, 3, position_raw & 0xFFFFFFFF)
+        self.spi_transfer_buffer(buffer)
+
+        if cache is not None:
+            cache.update("motor", port, ("position", position_raw))
 
     def set_motor_dps(self, port, dps):
         """
@@ -675,9 +1449,18 @@ class GoPiGo3:
         dps -- The target speed in degrees per second
         """
         dps = int(dps * self.MOTOR_TICKS_PER_DEGREE)
-        outArray = [self.SPI_Address, self.SPI_MESSAGE_TYPE.SET_MOTOR_DPS, int(port),\
-                    ((dps >> 8) & 0xFF), (dps & 0xFF)]
-        self.spi_transfer_array(outArray)
+
+        cache = self.write_cache
+        if cache is not None and cache.unchanged("motor", port, ("dps", dps)):
+            return
+
+        buffer = self._spi_buffer(self.SPI_MESSAGE_TYPE.SET_MOTOR_DPS, 5)
+        buffer.tx[2] = int(port) & 0xFF
+        _UINT16.pack_into(buffer.tx, 3, dps & 0xFFFF)
+        self.spi_transfer_buffer(buffer)
+
+        if cache is not None:
+            cache.update("motor", port, ("dps", dps))
 
     def set_motor_limits(self, port, power = 0, dps = 0):
         """
@@ -693,12 +1476,13 @@ class GoPiGo3:
                     ((dps >> 8) & 0xFF), (dps & 0xFF)]
         self.spi_transfer_array(outArray)
 
-    def get_motor_status(self, port):
+    def get_motor_status(self, port, max_age = None):
         """
         Read a motor status
 
         Keyword arguments:
         port -- The motor port (one at a time). MOTOR_LEFT or MOTOR_RIGHT.
+        max_age -- optional. Accept a telemetry sample up to this many seconds old (see start_telemetry)
 
         Returns a list:
             flags -- 8-bits of bit-flags that indicate motor status:
@@ -715,30 +1499,42 @@ class GoPiGo3:
         else:
             raise IOError("get_motor_status error. Must be one motor port at a time. MOTOR_LEFT or MOTOR_RIGHT.")
 
-        outArray = [self.SPI_Address, message_type, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-        reply = self.spi_transfer_array(outArray)
-        if(reply[3] == 0xA5):
-            power = reply[5]
-            if power & 0x80:
-                power -= 0x100
+        snapshot = self._telemetry_snapshot(max_age)
+        if snapshot is not None:
+            return list(snapshot.motor_status[port])
 
-            encoder = (reply[6] << 24) | (reply[7] << 16) | (reply[8] << 8) | reply[9]
-            if encoder & 0x80000000:
-                encoder -= 0x100000000
+        flags, power, encoder, dps = _MOTOR_STATUS.unpack_from(self._spi_read(message_type, 12), 4)
+        return [flags, power, int(encoder / self.MOTOR_TICKS_PER_DEGREE), int(dps / self.MOTOR_TICKS_PER_DEGREE)]
 
-            dps = (reply[10] << 8) | reply[11]
-            if dps & 0x8000:
-                dps -= 0x10000
+    def get_motors_snapshot(self, max_age = None):
+        """
+        Read the status of both motors at once
 
-            return [reply[4], power, int(encoder / self.MOTOR_TICKS_PER_DEGREE), int(dps / self.MOTOR_TICKS_PER_DEGREE)]
-        raise IOError("No SPI response")
+        Keyword arguments:
+        max_age -- optional. Accept a telemetry sample up to this many seconds old (see start_telemetry)
+
+        Both motors are read in a single SPI batch, so the two readings are as close in time as possible.
+
+        Returns a MotorsSnapshot with flags, power, encoder and dps for each motor, and a host timestamp.
+        """
+        snapshot = self._telemetry_snapshot(max_age)
+        if snapshot is not None:
+            return MotorsSnapshot(snapshot.timestamp,
+                                  snapshot.motor_status[self.MOTOR_LEFT],
+                                  snapshot.motor_status[self.MOTOR_RIGHT])
+
+        with self.batch() as batch:
+            left = batch.get_motor_status(self.MOTOR_LEFT)
+            right = batch.get_motor_status(self.MOTOR_RIGHT)
+        return MotorsSnapshot(time.monotonic(), left.result(), right.result())
 
-    def get_motor_encoder(self, port):
+    def get_motor_encoder(self, port, max_age = None):
         """
         Read a motor encoder in degrees
 
         Keyword arguments:
         port -- The motor port (one at a time). MOTOR_LEFT or MOTOR_RIGHT.
+        max_age -- optional. Accept a telemetry sample up to this many seconds old (see start_telemetry)
 
         Returns the encoder position in degrees
         """
@@ -749,9 +1545,11 @@ class GoPiGo3:
         else:
             raise IOError("Port(s) unsupported. Must be one at a time.")
 
-        encoder = self.spi_read_32(message_type)
-        if encoder & 0x80000000:
-            encoder -= 0x100000000
+        snapshot = self._telemetry_snapshot(max_age)
+        if snapshot is not None:
+            return snapshot.motor_status[port][2]
+
+        encoder = _INT32.unpack_from(self._spi_read(message_type, 8), 4)[0]
         return int(encoder / self.MOTOR_TICKS_PER_DEGREE)
 
     def offset_motor_encoder(self, port, offset):
@@ -769,6 +1567,12 @@ class GoPiGo3:
                     ((offset >> 24) & 0xFF), ((offset >> 16) & 0xFF), ((offset >> 8) & 0xFF), (offset & 0xFF)]
         self.spi_transfer_array(outArray)
 
+        # a position target means something else once the encoder moved
+        self.invalidate_write_cache("motor", int(port))
+        # and the odometry would take the jump for a move
+        if self.odometry is not None:
+            self.odometry.encoders_offset()
+
     def reset_motor_encoder(self, port):
         """
         Reset a motor encoder to 0
@@ -793,9 +1597,19 @@ class GoPiGo3:
         for p in range(2):
             if ((port >> (p * 2)) & 3) == 3:
                 self.GroveType[p] = type
+
+        cache = self.write_cache
+        if cache is not None and cache.unchanged("grove_type", port, type):
+            return
+
         outArray = [self.SPI_Address, self.SPI_MESSAGE_TYPE.SET_GROVE_TYPE, port, type]
         reply = self.spi_transfer_array(outArray)
 
+        if cache is not None:
+            cache.update("grove_type", port, type)
+            # changing the type reconfigures the pins
+            cache.forget("grove_mode", port)
+
     def set_grove_mode(self, pin, mode):
         """
         Set grove analog digital pin mode as INPUT/OUTPUT
@@ -804,9 +1618,16 @@ class GoPiGo3:
         pin -- The grove pin(s). GROVE_1_1, GROVE_1_2, GROVE_2_1, and/or GROVE_2_2.
         mode -- The pin mode. GROVE_INPUT_DIGITAL, GROVE_OUTPUT_DIGITAL, GROVE_INPUT_DIGITAL_PULLUP, GROVE_INPUT_DIGITAL_PULLDOWN, GROVE_INPUT_ANALOG, GROVE_OUTPUT_PWM, GROVE_INPUT_ANALOG_PULLUP, or GROVE_INPUT_ANALOG_PULLDOWN.
         """
+        cache = self.write_cache
+        if cache is not None and cache.unchanged("grove_mode", pin, mode):
+            return
+
         outArray = [self.SPI_Address, self.SPI_MESSAGE_TYPE.SET_GROVE_MODE, pin, mode]
         reply = self.spi_transfer_array(outArray)
 
+        if cache is not None:
+            cache.update("grove_mode", pin, mode)
+
     def set_grove_state(self, pin, state):
         """
         Set grove output pin LOW/HIGH
@@ -865,36 +1686,253 @@ class GoPiGo3:
         Returns:
         list of bytes read from the slave
         """
-        # start an I2C transaction as soon as the bus is available
-        Timeout = time.time() + 0.005 # timeout after 5ms of failed attempted starts
-        Continue = False
-        while not Continue:
+        transaction = self.grove_i2c_begin(port, addr, outArr, inBytes)
+        return self.grove_i2c_collect(transaction)
+
+    def grove_i2c_begin(self, port, addr, outArr, inBytes = 0, timeout = 0.005):
+        """
+        Start an I2C transaction as soon as the grove port is available
+
+        Keyword arguments:
+        port -- The grove port. GROVE_1 or GROVE_2.
+        addr -- The I2C address of the slave to be addressed.
+        outArr -- A list of bytes to send.
+        inBytes -- The number of bytes to read.
+        timeout -- How long to keep trying, in seconds, while the port is busy.
+
+        The MCU runs the transaction on its own. Do other work meanwhile, and get the bytes
+        read with grove_i2c_collect. Until then, the port is reserved for this transaction: other
+        threads calling grove_i2c_begin on the same port wait for it to be collected.
+
+        Returns a GroveI2CTransaction to pass to grove_i2c_collect.
+        """
+        lock = self._acquire_grove_i2c(port, timeout)
+        try:
+            transaction = self._start_grove_i2c(port, addr, outArr, inBytes, timeout)
+        except BaseException:
+            lock.release()
+            raise
+        transaction.lock = lock
+        return transaction
+
+    def _acquire_grove_i2c(self, port, timeout):
+        """
+        Reserve a grove port for I2C transactions, and return its lock
+        """
+        if port == self.GROVE_1:
+            lock = self._grove_i2c_locks[0]
+        elif port == self.GROVE_2:
+            lock = self._grove_i2c_locks[1]
+        else:
+            raise RuntimeError("Port unsupported. Must get one at a time.")
+
+        # a transaction of another thread takes its own start and collect timeouts at most
+        if not lock.acquire(timeout = timeout + 0.020 + 0.100):
+            raise IOError("grove_i2c_transfer error: Timeout waiting for the grove port")
+        return lock
+
+    def _start_grove_i2c(self, port, addr, outArr, inBytes, timeout):
+        """
+        Start an I2C transaction on an already reserved grove port, retrying while the port is busy
+        """
+        deadline = time.monotonic() + timeout
+        interval = 0.0001
+        while True:
             try:
-                self.grove_i2c_start(port, addr, outArr, inBytes)
-                Continue = True
+                return self.grove_i2c_start(port, addr, outArr, inBytes)
             except (IOError, I2CError):
-                if time.time() > Timeout:
+                if self.stats is not None:
+                    self.stats.event("grove_i2c_start_retry")
+                if time.monotonic() > deadline:
+                    if self.stats is not None:
+                        self.stats.event("grove_i2c_start_timeout")
                     raise IOError("grove_i2c_transfer error: Timeout trying to start transaction")
+                # the port is busy with the previous transaction, back off instead of flooding the SPI bus
+                time.sleep(interval)
+                interval = min(interval * 2, 0.001)
 
-        DelayTime = 0
-        if len(outArr):
-            DelayTime += 1 + len(outArr)
-        if inBytes:
-            DelayTime += 1 + inBytes
-        DelayTime *= (0.000115) # each I2C byte takes about 115uS at full speed (about 100kbps)
-        # No point trying to read the values before they are ready.
-        time.sleep(DelayTime) # delay for as long as it will take to do the I2C transaction.
+    def grove_i2c_collect(self, transaction, timeout = 0.020):
+        """
+        Get the bytes read by an I2C transaction started with grove_i2c_begin
+
+        Keyword arguments:
+        transaction -- What grove_i2c_begin returned.
+        timeout -- How long to keep trying, in seconds, once the transaction should be complete.
 
-        Timeout = time.time() + 0.020 # timeout after 20ms of failed attempted reads
+        Waits until the transaction is expected to be complete, based on the previous transactions
+        with the same device and lengths, then reads the result. The grove port is released, whether
+        the result could be read or not.
+
+        Returns:
+        list of bytes read from the slave
+        """
+        try:
+            return self._collect_grove_i2c(transaction, timeout)
+        finally:
+            transaction.release()
+
+    def _collect_grove_i2c(self, transaction, timeout):
+        delay = transaction.ready_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        deadline = time.monotonic() + timeout
+        interval = max((transaction.ready_at - transaction.started) / 8, 0.00005)
+        first_read = True
         while True:
+            read_at = time.monotonic()
             try:
-                # read the results as soon as they are available
-                values = self.get_grove_value(port)
-                return values
+                values = self._get_grove_i2c_value(transaction.port, transaction.in_bytes)
             except (ValueError, SensorError, GoPiGoValueError, IOError):
                 # IOError covers transient "No SPI response" glitches from the MCU
-                if time.time() > Timeout:
+                if self.stats is not None:
+                    self.stats.event("grove_i2c_read_retry")
+                if time.monotonic() > deadline:
+                    if self.stats is not None:
+                        self.stats.event("grove_i2c_read_timeout")
                     raise IOError("grove_i2c_transfer error: Timeout waiting for data")
+                first_read = False
+                time.sleep(interval)
+                interval = min(interval * 2, 0.001)
+                continue
+            self.i2c_timing.update(transaction.key, read_at - transaction.started, first_read)
+            return values
+
+    def grove_i2c_bulk_read(self, port, addr, length, outArr = None):
+        """
+        Read more bytes than fit in one I2C transaction
+
+        Keyword arguments:
+        port -- The grove port. GROVE_1 or GROVE_2.
+        addr -- The I2C address of the slave to be addressed.
+        length -- The number of bytes to read.
+        outArr -- Bytes to send before reading, like a register address. Only sent with the first transaction.
+
+        The read is split in transactions of up to GROVE_I2C_LENGTH_LIMIT bytes, which suits FIFOs and
+        registers that auto increment. The port stays reserved for the whole read, so no other thread
+        gets a transaction in between. The next transaction is started as soon as the previous one is
+        collected, and its bytes are copied while the MCU runs it.
+
+        Returns:
+        a bytearray of the bytes read
+        """
+        if outArr is None:
+            outArr = []
+        data = bytearray()
+        if length <= 0 and not outArr:
+            return data
+
+        lock = self._acquire_grove_i2c(port, 0.005)
+        try:
+            out = list(outArr)
+            remaining = length
+            pending = None
+            while True:
+                transaction = None
+                if remaining > 0 or out:
+                    chunk = min(remaining, self.GROVE_I2C_LENGTH_LIMIT)
+                    transaction = self._start_grove_i2c(port, addr, out, chunk, 0.005)
+                    out = []
+                    remaining -= chunk
+                if pending is not None:
+                    data.extend(pending)
+                if transaction is None:
+                    return data
+                pending = self._collect_grove_i2c(transaction, 0.020)
+        finally:
+            lock.release()
+
+    def grove_i2c_bulk_write(self, port, addr, outArr, prefix = None):
+        """
+        Write more bytes than fit in one I2C transaction
+
+        Keyword arguments:
+        port -- The grove port. GROVE_1 or GROVE_2.
+        addr -- The I2C address of the slave to be addressed.
+        outArr -- The bytes to write.
+        prefix -- Bytes sent at the start of every transaction, like the data control byte of an OLED display.
+
+        The bytes are split in transactions of up to GROVE_I2C_LENGTH_LIMIT bytes, prefix included.
+        The port stays reserved for the whole write. Checking that a transaction went through and
+        starting the next one share a single SPI batch.
+        """
+        prefix = list(prefix) if prefix is not None else []
+        chunk_size = self.GROVE_I2C_LENGTH_LIMIT - len(prefix)
+        if chunk_size <= 0:
+            raise RuntimeError(f"Write length error. The prefix has to be shorter than {self.GROVE_I2C_LENGTH_LIMIT} bytes.")
+        chunks = [prefix + list(outArr[i:i + chunk_size]) for i in range(0, len(outArr), chunk_size)]
+        if not chunks:
+            return
+
+        lock = self._acquire_grove_i2c(port, 0.005)
+        try:
+            transaction = self._start_grove_i2c(port, addr, chunks[0], 0, 0.005)
+            for chunk in chunks[1:]:
+                delay = transaction.ready_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                with self.batch() as batch:
+                    done = batch._get_grove_i2c_value(port, 0)
+                    started = batch.grove_i2c_start(port, addr, chunk, 0)
+
+                if done.exception() is None:
+                    self.i2c_timing.update(transaction.key, time.monotonic() - transaction.started, True)
+                elif isinstance(done.exception(), I2CError):
+                    raise done.exception()
+                elif started.exception() is not None:
+                    # the previous transaction was still running
+                    self._collect_grove_i2c(transaction, 0.020)
+                    transaction = self._start_grove_i2c(port, addr, chunk, 0, 0.005)
+                    continue
+                # else the previous transaction completed right between the two messages: the next one
+                # got started, so the bytes went out, only the status of the previous one is unknown
+
+                if started.exception() is not None:
+                    transaction = self._start_grove_i2c(port, addr, chunk, 0, 0.005)
+                else:
+                    transaction = started.result()
+            self._collect_grove_i2c(transaction, 0.020)
+        finally:
+            lock.release()
+
+    def grove_i2c_transfer_concurrent(self, transfers):
+        """
+        Conduct I2C transactions on several grove ports at the same time
+
+        Keyword arguments:
+        transfers -- a list of (port, addr, outArr, inBytes) tuples, one per grove port.
+
+        All the transactions are started before any is collected, so the MCU runs them side by side,
+        and the whole takes about as long as the slowest of them.
+
+        Returns:
+        a list with the bytes read by each transaction, in the order of transfers
+        """
+        ports = [transfer[0] for transfer in transfers]
+        if len(set(ports)) != len(ports):
+            raise RuntimeError("grove_i2c_transfer_concurrent error: One transaction per grove port.")
+
+        transactions = []
+        try:
+            for port, addr, outArr, inBytes in transfers:
+                transactions.append(self.grove_i2c_begin(port, addr, outArr, inBytes))
+        except BaseException:
+            for transaction in transactions:
+                transaction.release()
+            raise
+
+        results = [None] * len(transactions)
+        error = None
+        # the earliest one first, the others keep running meanwhile
+        for index in sorted(range(len(transactions)), key = lambda i: transactions[i].ready_at):
+            try:
+                results[index] = self.grove_i2c_collect(transactions[index])
+            except Exception as e:
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+        return results
 
     def grove_i2c_start(self, port, addr, outArr, inBytes = 0):
         """
@@ -905,6 +1943,10 @@ class GoPiGo3:
         addr -- The I2C address of the slave to be addressed.
         outArr -- A list of bytes to send.
         inBytes -- The number of bytes to read.
+
+        Makes a single attempt, raising I2CError if the port is busy. See grove_i2c_begin.
+
+        Returns a GroveI2CTransaction to pass to grove_i2c_collect.
         """
         if port == self.GROVE_1:
             message_type = self.SPI_MESSAGE_TYPE.START_GROVE_I2C_1
@@ -933,12 +1975,19 @@ class GoPiGo3:
         if(reply[4] != 0):
             raise I2CError("start_grove_i2c error: Not ready to start I2C transaction")
 
-    def get_grove_value(self, port):
+        started = time.monotonic()
+        addr = int(addr) & 0x7F
+        return GroveI2CTransaction(port, port_index, addr, outBytes, inBytes, started,
+                                   started + self.i2c_timing.estimate(addr, outBytes, inBytes))
+
+    def get_grove_value(self, port, max_age = None):
         """
         Get a grove port value
 
         Keyword arguments:
         port -- The grove port. GROVE_1 or GROVE_2.
+        max_age -- optional. Accept a telemetry sample up to this many seconds old (see start_telemetry).
+                   Only ports passed to start_telemetry are sampled.
         """
         if port == self.GROVE_1:
             message_type = self.SPI_MESSAGE_TYPE.GET_GROVE_VALUE_1
@@ -949,34 +1998,37 @@ class GoPiGo3:
         else:
             raise IOError("Port unsupported. Must get one at a time.")
 
-        if self.GroveType[port_index] == self.GROVE_TYPE.IR_DI_REMOTE:
-            outArray = [self.SPI_Address, message_type, 0, 0, 0, 0, 0]
-            reply = self.spi_transfer_array(outArray)
+        snapshot = self._telemetry_snapshot(max_age)
+        if snapshot is not None and snapshot.grove_values.get(port) is not None:
+            return snapshot.grove_values[port]
+
+        grove_type = self.GroveType[port_index]
+        if grove_type == self.GROVE_TYPE.IR_DI_REMOTE:
+            reply = self.spi_transfer_buffer(self._spi_buffer(message_type, 7))
             if(reply[3] == 0xA5):
-                if(reply[4] == self.GroveType[port_index] and reply[5] == 0):
-                    return reply[6]
+                reply_type, state, value = _GROVE_U8.unpack_from(reply, 4)
+                if(reply_type == grove_type and state == 0):
+                    return value
                 else:
                     raise SensorError("get_grove_value error: Invalid value")
             else:
                 raise IOError("get_grove_value error: No SPI response")
 
-        elif self.GroveType[port_index] == self.GROVE_TYPE.IR_EV3_REMOTE:
-            outArray = [self.SPI_Address, message_type, 0, 0, 0, 0, 0, 0, 0, 0]
-            reply = self.spi_transfer_array(outArray)
+        elif grove_type == self.GROVE_TYPE.IR_EV3_REMOTE:
+            reply = self.spi_transfer_buffer(self._spi_buffer(message_type, 10))
             if(reply[3] == 0xA5):
-                if(reply[4] == self.GroveType[port_index] and reply[5] == 0):
-                    return [reply[6], reply[7], reply[8], reply[9]]
+                if(reply[4] == grove_type and reply[5] == 0):
+                    return list(reply[6:10])
                 else:
                     raise SensorError("get_grove_value error: Invalid value")
             else:
                 raise IOError("get_grove_value error: No SPI response")
 
-        elif self.GroveType[port_index] == self.GROVE_TYPE.US:
-            outArray = [self.SPI_Address, message_type, 0, 0, 0, 0, 0, 0]
-            reply = self.spi_transfer_array(outArray)
+        elif grove_type == self.GROVE_TYPE.US:
+            reply = self.spi_transfer_buffer(self._spi_buffer(message_type, 8))
             if(reply[3] == 0xA5):
-                if(reply[4] == self.GroveType[port_index] and reply[5] == 0):
-                    value = (((reply[6] << 8) & 0xFF00) | (reply[7] & 0xFF))
+                reply_type, state, value = _GROVE_U16.unpack_from(reply, 4)
+                if(reply_type == grove_type and state == 0):
                     if value == 0:
                         raise SensorError("get_grove_value error: Sensor not responding")
                     elif value == 1:
@@ -988,25 +2040,33 @@ class GoPiGo3:
             else:
                 raise IOError("get_grove_value error: No SPI response")
 
-        elif self.GroveType[port_index] == self.GROVE_TYPE.I2C:
-            outArray = [self.SPI_Address, message_type, 0, 0, 0, 0]
-            outArray.extend([0 for i in range(self.GroveI2CInBytes[port_index])])
-            reply = self.spi_transfer_array(outArray)
-            if(reply[3] == 0xA5):
-                if(reply[4] == self.GroveType[port_index]):
-                    if(reply[5] == self.GROVE_STATE.VALID_DATA):  # no error
-                        return reply[6:]
-                    elif(reply[5] == self.GROVE_STATE.I2C_ERROR): # I2C bus error
-                        raise I2CError("get_grove_value error: I2C bus error")
-                    else:
-                        raise GoPiGoValueError("get_grove_value error: Invalid value")
-                else:
-                    raise SensorError("get_grove_value error: Grove type mismatch")
-            else:
-                raise IOError("get_grove_value error: No SPI response")
+        elif grove_type == self.GROVE_TYPE.I2C:
+            return self._get_grove_i2c_value(port, self.GroveI2CInBytes[port_index])
         value = self.spi_read_8(message_type)
         return value
 
+    def _get_grove_i2c_value(self, port, in_bytes):
+        """
+        Read the result of the I2C transaction of a grove port which reads in_bytes bytes
+        """
+        if port == self.GROVE_1:
+            message_type = self.SPI_MESSAGE_TYPE.GET_GROVE_VALUE_1
+        else:
+            message_type = self.SPI_MESSAGE_TYPE.GET_GROVE_VALUE_2
+        reply = self.spi_transfer_buffer(self._spi_buffer(message_type, 6 + in_bytes))
+        if(reply[3] == 0xA5):
+            if(reply[4] == self.GROVE_TYPE.I2C):
+                if(reply[5] == self.GROVE_STATE.VALID_DATA):  # no error
+                    return list(reply[6:])
+                elif(reply[5] == self.GROVE_STATE.I2C_ERROR): # I2C bus error
+                    raise I2CError("get_grove_value error: I2C bus error")
+                else:
+                    raise GoPiGoValueError("get_grove_value error: Invalid value")
+            else:
+                raise SensorError("get_grove_value error: Grove type mismatch")
+        else:
+            raise IOError("get_grove_value error: No SPI response")
+
     def get_grove_state(self, pin):
         """
         Get a grove input pin state
@@ -1025,11 +2085,11 @@ class GoPiGo3:
         else:
             raise IOError("Pin(s) unsupported. Must get one at a time.")
 
-        outArray = [self.SPI_Address, message_type, 0, 0, 0, 0]
-        reply = self.spi_transfer_array(outArray)
+        reply = self.spi_transfer_buffer(self._spi_buffer(message_type, 6))
         if(reply[3] == 0xA5):
-            if(reply[4] == self.GROVE_STATE.VALID_DATA): # no error
-                return reply[5]
+            state, value = _STATE_U8.unpack_from(reply, 4)
+            if(state == self.GROVE_STATE.VALID_DATA): # no error
+                return value
             else:
                 raise GoPiGoValueError("get_grove_state error: Invalid value")
         else:
@@ -1053,11 +2113,11 @@ class GoPiGo3:
         else:
             raise IOError("Pin(s) unsupported. Must get one at a time.")
 
-        outArray = [self.SPI_Address, message_type, 0, 0, 0, 0, 0]
-        reply = self.spi_transfer_array(outArray)
+        reply = self.spi_transfer_buffer(self._spi_buffer(message_type, 7))
         if(reply[3] == 0xA5):
-            if(reply[4] == self.GROVE_STATE.VALID_DATA): # no error
-                return ((((reply[5] << 8) & 0xFF00) | (reply[6] & 0xFF)) / 1000.0)
+            state, value = _STATE_U16.unpack_from(reply, 4)
+            if(state == self.GROVE_STATE.VALID_DATA): # no error
+                return (value / 1000.0)
             else:
                 raise GoPiGoValueError("get_grove_voltage error: Invalid value")
         else:
@@ -1081,11 +2141,11 @@ class GoPiGo3:
         else:
             raise IOError("Pin(s) unsupported. Must get one at a time.")
 
-        outArray = [self.SPI_Address, message_type, 0, 0, 0, 0, 0]
-        reply = self.spi_transfer_array(outArray)
+        reply = self.spi_transfer_buffer(self._spi_buffer(message_type, 7))
         if(reply[3] == 0xA5):
-            if(reply[4] == self.GROVE_STATE.VALID_DATA): # no error
-                return (((reply[5] << 8) & 0xFF00) | (reply[6] & 0xFF))
+            state, value = _STATE_U16.unpack_from(reply, 4)
+            if(state == self.GROVE_STATE.VALID_DATA): # no error
+                return value
             else:
                 raise GoPiGoValueError("get_grove_analog error: Invalid value")
         else:
@@ -1095,6 +2155,9 @@ class GoPiGo3:
         """
         Reset the GoPiGo3.
         """
+        # send everything, whatever was written before
+        self.invalidate_write_cache()
+
         # reset all sensors
         self.set_grove_type(self.GROVE_1 + self.GROVE_2, self.GROVE_TYPE.CUSTOM)
         self.set_grove_mode(self.GROVE_1 + self.GROVE_2, self.GROVE_INPUT_DIGITAL)
@@ -0,0 +1,127 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# Grove I2C transactions of the GoPiGo3
+#
+# The MCU runs a grove I2C transaction on its own once it's started: the
+# GoPiGo3 object only has to start it, and later on collect the bytes read.
+# GroveI2CTransaction keeps what the collecting needs, and I2CTimingModel
+# learns how long the transactions to each device take, so that collecting
+# waits about the right amount of time instead of polling the MCU.
+
+import threading
+
+
+class GroveI2CTransaction:
+    """
+    A grove I2C transaction started on the MCU. See :py:meth:`~gopigo3.GoPiGo3.grove_i2c_begin`.
+
+    :var int port: ``GROVE_1`` or ``GROVE_2``.
+    :var int address: The 7-bit I2C address.
+    :var int out_bytes: How many bytes were written.
+    :var int in_bytes: How many bytes are being read.
+    :var float started: ``time.monotonic()`` when the MCU accepted the transaction.
+    :var float ready_at: When the transaction is expected to be complete.
+
+    A transaction started with :py:meth:`~gopigo3.GoPiGo3.grove_i2c_begin` holds its grove port
+    until it's collected or released, so that no other thread can start a transaction on the port
+    and overwrite the result before it's read.
+    """
+    __slots__ = ("port", "port_index", "address", "out_bytes", "in_bytes", "started", "ready_at", "lock")
+
+    def __init__(self, port, port_index, address, out_bytes, in_bytes, started, ready_at):
+        self.port = port
+        self.port_index = port_index
+        self.address = address
+        self.out_bytes = out_bytes
+        self.in_bytes = in_bytes
+        self.started = started
+        self.ready_at = ready_at
+        self.lock = None
+
+    def release(self):
+        """
+        Give the grove port back without collecting the result. Does nothing if it's already released.
+        """
+        lock, self.lock = self.lock, None
+        if lock is not None:
+            lock.release()
+
+    @property
+    def key(self):
+        return (self.address, self.out_bytes, self.in_bytes)
+
+    def __repr__(self):
+        return (f"GroveI2CTransaction(port={self.port}, address=0x{self.address:02X}, "
+                f"out_bytes={self.out_bytes}, in_bytes={self.in_bytes})")
+
+
+class I2CTimingModel:
+    """
+    How long grove I2C transactions take, learned per (address, bytes written, bytes read).
+
+    Until a transaction has been measured, it's assumed to take ``byte_time`` per byte on the bus,
+    address bytes included. Every collected transaction then updates the estimate:
+
+    * if the data was there on the first read, the transaction may have completed earlier, so the
+      estimate shrinks a little to probe for it
+    * otherwise the estimate moves towards the measured time
+    """
+    BYTE_TIME = 0.000115  # each I2C byte takes about 115uS at full speed (about 100kbps)
+
+    def __init__(self, byte_time=BYTE_TIME, smoothing=0.25, shrink=0.98):
+        """
+        :param float byte_time: Seconds per I2C byte, for transactions never measured.
+        :param float smoothing = 0.25: Weight of a new measurement.
+        :param float shrink = 0.98: Factor applied to the estimate when the data was there on the first read.
+        """
+        self.byte_time = byte_time
+        self.smoothing = smoothing
+        self.shrink = shrink
+        self._estimates = {}
+        self._lock = threading.Lock()
+
+    def default_estimate(self, out_bytes, in_bytes):
+        delay = 0
+        if out_bytes:
+            delay += 1 + out_bytes
+        if in_bytes:
+            delay += 1 + in_bytes
+        return delay * self.byte_time
+
+    def estimate(self, address, out_bytes, in_bytes):
+        """
+        :returns: Expected duration in seconds of a transaction, from the MCU accepting it to the data being ready.
+        """
+        estimate = self._estimates.get((address, out_bytes, in_bytes))
+        if estimate is None:
+            return self.default_estimate(out_bytes, in_bytes)
+        return estimate
+
+    def update(self, key, elapsed, first_read):
+        """
+        :param key: ``(address, out_bytes, in_bytes)``
+        :param float elapsed: Seconds from the start of the transaction to the read that got the data.
+        :param boolean first_read: Whether that was the first read.
+        """
+        with self._lock:
+            estimate = self._estimates.get(key)
+            if estimate is None:
+                estimate = self.default_estimate(key[1], key[2])
+            if first_read:
+                estimate = min(estimate, elapsed) * self.shrink
+            else:
+                estimate += self.smoothing * (elapsed - estimate)
+            self._estimates[key] = estimate
+
+    def estimates(self):
+        """
+        :returns: ``(address, out_bytes, in_bytes)`` -> estimated seconds, for every measured transaction.
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._estimates)
@@ -0,0 +1,376 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# SPI statistics for the GoPiGo3
+#
+# Counts the SPI transactions of a GoPiGo3 per message type, together with
+# the bytes transferred, the replies missing their 0xA5 marker, the transfers
+# that raised, and a latency histogram. Grove I2C retries and timeouts are
+# counted as events.
+#
+#     gpg.enable_stats()
+#     gpg.start_stats_dump(interval=10)
+#     ...
+#     print(gpg.get_stats())
+#
+# While disabled, the only cost is one attribute check per transaction. The
+# counters aren't locked: with several threads a count can occasionally be
+# lost, which is fine for statistics and keeps the enabled cost low too.
+#
+# LockProfiler does the same for the locks of gopigo3.locks: how long each
+# call site waits for a resource and holds it, and what checking the
+# system-wide overall_mutex flag costs.
+#
+#     get_lock_manager().enable_profiling()
+#     ...
+#     print(format_contention_report(get_lock_manager().profiler.as_dict()))
+
+import os
+import time
+
+from .periodic import PeriodicThread
+
+
+class LatencyHistogram:
+    """
+    HDR style histogram of durations, in microseconds.
+
+    Values below 32us get a bucket each. Above that, each power of two is split into 16 buckets,
+    so every recorded value is known within about 6%, from microseconds up to minutes, with a
+    few hundred counters.
+    """
+    SUB_BUCKETS = 16
+    MAX_BUCKETS = 32 + 16 * 26  # up to 2**30 us, about 18 minutes
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * self.MAX_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def merge(self, other):
+        """
+        Add the values recorded by another histogram.
+        """
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    @classmethod
+    def bucket_index(cls, value):
+        if value < 2 * cls.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - 5
+        index = cls.SUB_BUCKETS * (shift + 1) + (value >> shift) - cls.SUB_BUCKETS
+        return min(index, cls.MAX_BUCKETS - 1)
+
+    @classmethod
+    def bucket_value(cls, index):
+        """
+        :returns: The smallest value going into bucket ``index``.
+        """
+        if index < 2 * cls.SUB_BUCKETS:
+            return index
+        shift = index // cls.SUB_BUCKETS - 1
+        return (index % cls.SUB_BUCKETS + cls.SUB_BUCKETS) << shift
+
+    def record(self, seconds):
+        us = int(seconds * 1000000)
+        if us < 0:
+            us = 0
+        self.counts[self.bucket_index(us)] += 1
+        self.count += 1
+        self.total += us
+        if self.min is None or us < self.min:
+            self.min = us
+        if us > self.max:
+            self.max = us
+
+    def percentile(self, percent):
+        """
+        :param float percent: 0 to 100.
+        :returns: The duration in microseconds that ``percent`` % of the recorded values don't exceed, or ``None`` if nothing was recorded.
+        """
+        if self.count == 0:
+            return None
+        threshold = self.count * percent / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= threshold:
+                # the top of the bucket, but never more than what was actually seen
+                return min(self.bucket_value(index + 1) - 1, self.max) if index + 1 < self.MAX_BUCKETS else self.max
+        return self.max
+
+    def summary(self):
+        """
+        :returns: count, min, mean, p50, p90, p99 and max, in microseconds.
+        :rtype: dict
+        """
+        return {
+            "count": self.count,
+            "min_us": self.min,
+            "mean_us": self.total / self.count if self.count else None,
+            "p50_us": self.percentile(50),
+            "p90_us": self.percentile(90),
+            "p99_us": self.percentile(99),
+            "max_us": self.max if self.count else None,
+        }
+
+
+class _MessageStats:
+    __slots__ = ("count", "errors", "exceptions", "bytes", "latency")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.exceptions = 0
+        self.bytes = 0
+        self.latency = LatencyHistogram()
+
+
+class SPIStats:
+    """
+    SPI counters of one :py:class:`~gopigo3.GoPiGo3`.
+
+    Use :py:meth:`~gopigo3.GoPiGo3.enable_stats` rather than creating one directly.
+    """
+
+    def __init__(self, message_names, read_message_types):
+        """
+        :param dict message_names: SPI message type -> name, used as keys by :py:meth:`as_dict`.
+        :param read_message_types: The message types whose replies carry the 0xA5 marker.
+        """
+        self.message_names = message_names
+        self.read_message_types = frozenset(read_message_types)
+        self.messages = {}
+        self.events = {}
+        self.started = time.monotonic()
+
+    def _message(self, message_type):
+        stats = self.messages.get(message_type)
+        if stats is None:
+            stats = self.messages[message_type] = _MessageStats()
+        return stats
+
+    def record(self, message_type, length, elapsed, reply):
+        """
+        Count a transaction that went through.
+
+        :param int message_type: The SPI message type.
+        :param int length: Bytes transferred.
+        :param float elapsed: Duration of the transaction in seconds.
+        :param reply: The bytes read.
+        """
+        stats = self._message(message_type)
+        stats.count += 1
+        stats.bytes += length
+        stats.latency.record(elapsed)
+        if message_type in self.read_message_types and (len(reply) < 4 or reply[3] != 0xA5):
+            stats.errors += 1
+
+    def record_exception(self, message_type, length):
+        """
+        Count a transaction whose transfer raised.
+        """
+        stats = self._message(message_type)
+        stats.count += 1
+        stats.bytes += length
+        stats.exceptions += 1
+
+    def event(self, name):
+        """
+        Count an event, like a grove I2C retry.
+        """
+        self.events[name] = self.events.get(name, 0) + 1
+
+    def as_dict(self):
+        """
+        :returns: ``{"elapsed": seconds, "messages": {name: {...}}, "events": {name: count}}``. Each message
+                  has ``count``, ``errors`` (replies without the 0xA5 marker), ``exceptions``, ``bytes``
+                  and the :py:meth:`LatencyHistogram.summary` under ``latency``.
+        :rtype: dict
+        """
+        messages = {}
+        for message_type, stats in sorted(self.messages.items()):
+            messages[self.message_names.get(message_type, str(message_type))] = {
+                "count": stats.count,
+                "errors": stats.errors,
+                "exceptions": stats.exceptions,
+                "bytes": stats.bytes,
+                "latency": stats.latency.summary(),
+            }
+        return {"elapsed": time.monotonic() - self.started, "messages": messages, "events": dict(self.events)}
+
+
+def format_stats(stats):
+    """
+    :param dict stats: What :py:meth:`SPIStats.as_dict` returned.
+    :returns: The statistics as a text table.
+    :rtype: str
+    """
+    def us(value):
+        return "-" if value is None else f"{value:.0f}"
+
+    lines = [f"SPI statistics over {stats['elapsed']:.1f}s",
+             f"{'message':<26}{'count':>9}{'errors':>8}{'exc':>6}{'bytes':>10}{'mean':>8}{'p50':>8}{'p99':>8}{'max':>8}  (us)"]
+    for name, message in stats["messages"].items():
+        latency = message["latency"]
+        lines.append(f"{name:<26}{message['count']:>9}{message['errors']:>8}{message['exceptions']:>6}{message['bytes']:>10}"
+                     f"{us(latency['mean_us']):>8}{us(latency['p50_us']):>8}{us(latency['p99_us']):>8}{us(latency['max_us']):>8}")
+    for name, count in sorted(stats["events"].items()):
+        lines.append(f"{name:<26}{count:>9}")
+    return "\n".join(lines)
+
+
+class StatsDumper(PeriodicThread):
+    """
+    Logs the SPI statistics of a :py:class:`~gopigo3.GoPiGo3` at a fixed interval, on a background thread.
+
+    Use :py:meth:`~gopigo3.GoPiGo3.start_stats_dump` rather than creating one directly.
+    """
+
+    def __init__(self, gpg, interval=60.0, log=None):
+        """
+        :param gopigo3.GoPiGo3 gpg: The GoPiGo3 whose statistics get logged.
+        :param float interval = 60.0: Seconds between two dumps.
+        :param log: Function called with the text of each dump. Defaults to ``print``.
+        """
+        PeriodicThread.__init__(self, name="gopigo3-stats", wait_first=True)
+        self.gpg = gpg
+        self.interval = interval
+        self.log = log if log is not None else print
+
+    @property
+    def rate(self):
+        return 1.0 / self.interval
+
+    @rate.setter
+    def rate(self, rate):
+        if rate:
+            self.interval = 1.0 / rate
+
+    def _tick(self):
+        stats = self.gpg.get_stats()
+        if stats:
+            self.log(format_stats(stats))
+
+
+class _LockSiteStats:
+    __slots__ = ("acquisitions", "wait", "hold")
+
+    def __init__(self):
+        self.acquisitions = 0
+        self.wait = LatencyHistogram()
+        self.hold = LatencyHistogram()
+
+
+class LockProfiler:
+    """
+    Wait and hold times of the resource locks of one process, per resource and call site.
+
+    Use :py:meth:`~gopigo3.LockManager.enable_profiling` rather than creating one directly.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.sites = {}
+        self.overall_mutex = LatencyHistogram()
+        self.started = time.monotonic()
+
+    def _site(self, resource, site):
+        stats = self.sites.get((resource, site))
+        if stats is None:
+            stats = self.sites[(resource, site)] = _LockSiteStats()
+        return stats
+
+    def record_wait(self, resource, site, elapsed):
+        """
+        :param str resource: The resource acquired.
+        :param str site: Where it was acquired, ``"file:line function"``.
+        :param float elapsed: Seconds spent waiting for it.
+        """
+        stats = self._site(resource, site)
+        stats.acquisitions += 1
+        stats.wait.record(elapsed)
+
+    def record_hold(self, resource, site, elapsed):
+        """
+        :param float elapsed: Seconds between acquiring ``resource`` at ``site`` and releasing it.
+        """
+        self._site(resource, site).hold.record(elapsed)
+
+    def record_overall_mutex(self, elapsed):
+        """
+        :param float elapsed: Seconds one check of the system-wide overall_mutex flag took. Answers from the cache aren't recorded.
+        """
+        self.overall_mutex.record(elapsed)
+
+    def as_dict(self):
+        """
+        :returns: ``{"pid": pid, "elapsed": seconds, "locks": [...], "overall_mutex": summary}``. Each entry of
+                  ``locks`` has ``resource``, ``site``, ``acquisitions``, and the :py:meth:`LatencyHistogram.summary`
+                  of the waits under ``wait`` and of the holds under ``hold``. The most waited for come first.
+        :rtype: dict
+        """
+        locks = []
+        for (resource, site), stats in self.sites.items():
+            locks.append({
+                "resource": resource,
+                "site": site,
+                "acquisitions": stats.acquisitions,
+                "wait_total_us": stats.wait.total,
+                "wait": stats.wait.summary(),
+                "hold": stats.hold.summary(),
+            })
+        locks.sort(key=lambda entry: entry["wait_total_us"], reverse=True)
+        return {"pid": self.pid, "elapsed": time.monotonic() - self.started, "locks": locks,
+                "overall_mutex": self.overall_mutex.summary()}
+
+    def export(self, path=None):
+        """
+        Write the :py:meth:`as_dict` report as JSON.
+
+        :param str path: The file. By default ``gopigo3-locks-<pid>.json`` in the current directory, so that several processes don't overwrite each other's reports.
+        :returns: The path written.
+        """
+        import json
+        if path is None:
+            path = f"gopigo3-locks-{self.pid}.json"
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+        return path
+
+
+def format_contention_report(report):
+    """
+    :param dict report: What :py:meth:`LockProfiler.as_dict` returned.
+    :returns: The report as a text table.
+    :rtype: str
+    """
+    def us(value):
+        return "-" if value is None else f"{value:.0f}"
+
+    lines = [f"Lock contention of process {report['pid']} over {report['elapsed']:.1f}s",
+             f"{'resource':<10}{'site':<40}{'count':>8}{'wait p50':>10}{'p99':>8}{'max':>8}{'hold p50':>10}{'p99':>8}{'max':>8}  (us)"]
+    for entry in report["locks"]:
+        wait, hold = entry["wait"], entry["hold"]
+        lines.append(f"{entry['resource']:<10}{entry['site'][-39:]:<40}{entry['acquisitions']:>8}"
+                     f"{us(wait['p50_us']):>10}{us(wait['p99_us']):>8}{us(wait['max_us']):>8}"
+                     f"{us(hold['p50_us']):>10}{us(hold['p99_us']):>8}{us(hold['max_us']):>8}")
+    check = report["overall_mutex"]
+    if check["count"]:
+        lines.append(f"overall_mutex checks: {check['count']}, mean {us(check['mean_us'])}us, "
+                     f"p99 {us(check['p99_us'])}us, max {us(check['max_us'])}us")
+    return "\n".join(lines)
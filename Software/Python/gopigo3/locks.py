@@ -0,0 +1,373 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# Per resource locks for the GoPiGo3
+#
+# The robot has several independent buses: the SPI link to the MCU, the two
+# grove ports the MCU drives, the Raspberry Pi's own I2C bus, where the
+# DI sensors live, and the serial pins the DHT sensor is bit-banged on. The
+# LockManager has one lock per bus, so that a slow DHT read doesn't hold up
+# a distance sensor or a motor command:
+#
+#     with get_lock_manager().locked(RESOURCE_GROVE_1):
+#         ...
+#
+# Every lock works across threads and across processes. The one of the
+# hardware I2C bus is the I2C_mutex the DI sensors libraries use, so the
+# locking stays compatible with them. The others are flock()ed files in
+# /run/lock.
+#
+# The SPI transfers of the GoPiGo3 only lock within the process. The MCU
+# link lock is for the processes that open /dev/spidev0.1 on their own and
+# need a sequence of transfers not to interleave with another process's:
+# GoPiGo3.spi_session() holds it through the LockManager.
+#
+# To avoid deadlocks, resources are always taken in the order of LOCK_ORDER:
+# locked() sorts them, and acquiring a resource while holding one that comes
+# later raises LockOrderError.
+#
+# LockManager.enable_profiling() records how long every call site waits for
+# and holds each resource, see gopigo3.instrumentation.LockProfiler.
+#
+# Whether the system-wide overall_mutex flag is on is a file check. The
+# LockManager caches the answer for overall_mutex_ttl seconds, so that a
+# sensor loop doesn't stat a file twice per reading.
+
+import os
+import sys
+import threading
+import time
+import warnings
+
+RESOURCE_HW_I2C = "hw_i2c"
+RESOURCE_SERIAL = "serial"
+RESOURCE_GROVE_1 = "grove_1"
+RESOURCE_GROVE_2 = "grove_2"
+RESOURCE_MCU_SPI = "mcu_spi"
+
+# the slowest buses first, the MCU link, which everything else may need, last
+LOCK_ORDER = (RESOURCE_HW_I2C, RESOURCE_SERIAL, RESOURCE_GROVE_1, RESOURCE_GROVE_2, RESOURCE_MCU_SPI)
+
+LOCK_DIR = "/run/lock"
+
+
+# functions that only pass a lock request on, skipped when looking for the call site
+_WRAPPERS = frozenset(("_ifMutexAcquire", "_ifMutexRelease", "_ifLockedRelease", "__enter__", "__exit__"))
+
+
+def _call_site():
+    frame = sys._getframe(2)
+    while frame is not None and (frame.f_code.co_filename == __file__ or frame.f_code.co_name in _WRAPPERS):
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+class LockOrderError(RuntimeError):
+    """Exception raised when a resource is acquired while holding one that comes after it in LOCK_ORDER"""
+
+
+def grove_resource(port):
+    """
+    :param int port: ``GoPiGo3.GROVE_1`` or ``GoPiGo3.GROVE_2``, or one of their pins.
+    :returns: The resource of the grove port.
+    """
+    return RESOURCE_GROVE_1 if port & 0x03 else RESOURCE_GROVE_2
+
+
+class ResourceLock:
+    """
+    A lock shared by the threads of this process and by the other processes.
+
+    It's reentrant: a thread holding it may acquire it again, and has to release it as many times.
+    """
+
+    def __init__(self, name, path=None):
+        """
+        :param str name: The resource.
+        :param str path: The file to ``flock``. Without one, or if it can't be opened, the lock only works within this process,
+                         with a ``RuntimeWarning``.
+        """
+        self.name = name
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        if path is not None:
+            self._fd = self._open(path)
+
+    @staticmethod
+    def _open(path):
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+        except PermissionError:
+            # created by another user without write access for us: flock only needs the file open for reading
+            try:
+                return os.open(path, os.O_RDONLY)
+            except OSError as e:
+                error = e
+        except OSError as e:
+            error = e
+        else:
+            try:
+                # os.open applies the umask: let the processes of the other users open the file too
+                os.fchmod(fd, 0o666)
+            except OSError:
+                pass  # created by another user
+            return fd
+        warnings.warn(f"Can't open the lock file {path} ({error}), the lock only works within this process", RuntimeWarning)
+        return None
+
+    def _acquire_process(self):
+        if self._fd is not None:
+            import fcntl
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def _release_process(self):
+        if self._fd is not None:
+            import fcntl
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def acquire(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                self._acquire_process()
+            except BaseException:
+                self._lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self._release_process()
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+
+class _I2CMutexLock(ResourceLock):
+    """
+    The lock of the hardware I2C bus, on top of the I2C_mutex of the DI sensors libraries.
+    """
+
+    def __init__(self, name, mutex):
+        ResourceLock.__init__(self, name)
+        self.mutex = mutex
+
+    def _acquire_process(self):
+        self.mutex.acquire()
+
+    def _release_process(self):
+        self.mutex.release()
+
+
+class LockManager:
+    """
+    One :py:class:`ResourceLock` per resource of the robot, taken in a consistent order.
+
+    Use :py:func:`get_lock_manager` rather than creating one, so that the whole process shares the same locks.
+    """
+
+    def __init__(self, lock_dir=None, i2c_mutex=None, overall_mutex_ttl=1.0):
+        """
+        :param str lock_dir: Where the lock files go. ``LOCK_DIR`` by default.
+        :param i2c_mutex: The ``I2C_mutex.Mutex`` to use for the hardware I2C bus. Created on first use by default.
+        :param float overall_mutex_ttl = 1.0: Seconds the overall_mutex flag is cached for. 0 checks it on every call.
+        """
+        self.lock_dir = lock_dir if lock_dir is not None else LOCK_DIR
+        self.overall_mutex_ttl = overall_mutex_ttl
+        self.profiler = None
+        self._overall_mutex = None  # (flag, time.monotonic() it expires at)
+        self._i2c_mutex = i2c_mutex
+        self._locks = {}
+        self._create_lock = threading.Lock()
+        self._held = threading.local()
+
+    def enable_profiling(self):
+        """
+        Start recording wait and hold times, per resource and call site. Does nothing if already recording.
+
+        :returns: The :py:class:`~gopigo3.instrumentation.LockProfiler`.
+        """
+        if self.profiler is None:
+            from .instrumentation import LockProfiler
+            self.profiler = LockProfiler()
+        return self.profiler
+
+    def disable_profiling(self):
+        self.profiler = None
+
+    def overall_mutex(self):
+        """
+        :returns: Whether the system-wide mutex is on, in which case every sensor locks whatever its ``use_mutex``.
+                  The flag is checked at most once every ``overall_mutex_ttl`` seconds.
+        """
+        now = time.monotonic()
+        cached = self._overall_mutex
+        if cached is not None and now < cached[1]:
+            return cached[0]
+        profiler = self.profiler
+        if profiler is None:
+            result = self.i2c_mutex.overall_mutex()
+        else:
+            start = time.perf_counter()
+            result = self.i2c_mutex.overall_mutex()
+            profiler.record_overall_mutex(time.perf_counter() - start)
+        self._overall_mutex = (result, now + self.overall_mutex_ttl)
+        return result
+
+    def refresh_overall_mutex(self):
+        """
+        Forget the cached overall_mutex flag, so that the next :py:meth:`overall_mutex` checks it.
+        """
+        self._overall_mutex = None
+
+    @property
+    def i2c_mutex(self):
+        """
+        The ``I2C_mutex.Mutex`` of the hardware I2C bus. There should be one per process: two of them in the same process block each other.
+        """
+        if self._i2c_mutex is None:
+            with self._create_lock:
+                if self._i2c_mutex is None:
+                    from I2C_mutex import Mutex
+                    self._i2c_mutex = Mutex(debug=False)
+        return self._i2c_mutex
+
+    def lock(self, resource):
+        """
+        :param str resource: One of ``LOCK_ORDER``.
+        :returns: The lock of ``resource``.
+        :rtype: gopigo3.ResourceLock
+        :raises ValueError: If ``resource`` isn't known.
+        """
+        lock = self._locks.get(resource)
+        if lock is not None:
+            return lock
+        if resource not in LOCK_ORDER:
+            raise ValueError(f"Unknown resource {resource!r}. Must be one of {', '.join(LOCK_ORDER)}.")
+        i2c_mutex = self.i2c_mutex if resource == RESOURCE_HW_I2C else None
+        with self._create_lock:
+            lock = self._locks.get(resource)
+            if lock is None:
+                if resource == RESOURCE_HW_I2C:
+                    lock = _I2CMutexLock(resource, i2c_mutex)
+                else:
+                    lock = ResourceLock(resource, os.path.join(self.lock_dir, f"gopigo3_{resource}.lock"))
+                self._locks[resource] = lock
+        return lock
+
+    def held(self):
+        """
+        :returns: The resources the calling thread holds, in the order they were acquired.
+        :rtype: list
+        """
+        held = getattr(self._held, "resources", None)
+        if held is None:
+            held = self._held.resources = []
+            self._held.profiles = []
+        return held
+
+    def acquire(self, resource, site=None):
+        """
+        Acquire one resource.
+
+        :param str site: Where the resource is acquired from, for the profiler. Found from the stack by default.
+        :raises LockOrderError: If the calling thread holds a resource that comes after ``resource`` in ``LOCK_ORDER``.
+        """
+        lock = self.lock(resource)
+        held = self.held()
+        if resource not in held:
+            rank = LOCK_ORDER.index(resource)
+            for other in held:
+                if LOCK_ORDER.index(other) > rank:
+                    raise LockOrderError(f"Can't acquire {resource} while holding {other}: "
+                                         f"resources must be acquired in the order {', '.join(LOCK_ORDER)}")
+        profiler = self.profiler
+        if profiler is None:
+            lock.acquire()
+            profile = None
+        else:
+            if site is None:
+                site = _call_site()
+            start = time.perf_counter()
+            lock.acquire()
+            acquired = time.perf_counter()
+            profiler.record_wait(resource, site, acquired - start)
+            profile = (site, acquired)
+        held.append(resource)
+        self._held.profiles.append(profile)
+
+    def release(self, resource):
+        """
+        Release a resource acquired with :py:meth:`acquire`.
+        """
+        held = self.held()
+        # the latest acquisition, in case the resource was acquired more than once
+        index = len(held) - 1 - held[::-1].index(resource)
+        del held[index]
+        profile = self._held.profiles.pop(index)
+        self.lock(resource).release()
+        profiler = self.profiler
+        if profile is not None and profiler is not None:
+            site, acquired = profile
+            profiler.record_hold(resource, site, time.perf_counter() - acquired)
+
+    def locked(self, *resources):
+        """
+        :returns: A context manager holding all of ``resources``, acquired in ``LOCK_ORDER`` and released in reverse.
+        """
+        return _Locked(self, sorted(set(resources), key=LOCK_ORDER.index))
+
+
+class _Locked:
+    __slots__ = ("manager", "resources", "acquired")
+
+    def __init__(self, manager, resources):
+        self.manager = manager
+        self.resources = resources
+        self.acquired = []
+
+    def __enter__(self):
+        try:
+            for resource in self.resources:
+                self.manager.acquire(resource)
+                self.acquired.append(resource)
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        while self.acquired:
+            self.manager.release(self.acquired.pop())
+        return False
+
+
+_lock_manager = None
+_lock_manager_lock = threading.Lock()
+
+
+def get_lock_manager():
+    """
+    :returns: The :py:class:`LockManager` of the process, created on first use.
+    """
+    global _lock_manager
+    if _lock_manager is None:
+        with _lock_manager_lock:
+            if _lock_manager is None:
+                _lock_manager = LockManager()
+    return _lock_manager
@@ -0,0 +1,539 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# Completion of the moves of an EasyGoPiGo3
+#
+# drive_cm, drive_degrees, turn_degrees and orbit give the MCU a target
+# position for each wheel and return a MotionHandle, which completes once
+# both wheels are within MotionHandle.TOLERANCE degrees of their target:
+#
+#     move = gpg.drive_cm(50, blocking=False)
+#     move.add_done_callback(lambda move: print("arrived"))
+#     ...
+#     move.wait()
+#
+# One MotionMonitor thread per robot watches every pending move, reading
+# both motors in one SPI batch. It polls slowly while the wheels are far
+# from their target and faster as they get close, so a move is noticed as
+# done within a few milliseconds of the wheels arriving.
+#
+# A MotionQueue runs a whole route in the background, optionally blending
+# each move into the next without stopping in between:
+#
+#     route = gpg.motion_queue(blend=True)
+#     for _ in range(4):
+#         route.drive_cm(30)
+#         route.turn_degrees(90)
+#     route.wait()
+
+import threading
+import time
+
+from .periodic import PeriodicThread
+
+
+class MotionHandle:
+    """
+    A move started by :py:class:`~easygopigo3.EasyGoPiGo3`, like :py:meth:`~easygopigo3.EasyGoPiGo3.drive_cm`.
+
+    It completes in one of three ways:
+
+    * both wheels reached their target: :py:meth:`result` returns ``True``
+    * :py:meth:`cancel` was called, or another move replaced it: :py:meth:`cancelled` is ``True``
+    * the motors were disabled because the battery is too low, or couldn't be read: :py:meth:`result` and
+      :py:meth:`wait` raise the error
+    """
+    TOLERANCE = 5  # degrees, as in EasyGoPiGo3.target_reached
+
+    def __init__(self, gpg, left_target, right_target, on_done=None, tolerance=TOLERANCE):
+        """
+        :param easygopigo3.EasyGoPiGo3 gpg: The robot moving.
+        :param float left_target: Encoder position, in degrees, the left wheel is heading for. ``None`` until a queued move starts.
+        :param float right_target: Encoder position, in degrees, the right wheel is heading for. ``None`` until a queued move starts.
+        :param on_done: Called with the handle when the move completes, before the callbacks added with :py:meth:`add_done_callback`.
+        :param float tolerance = TOLERANCE: How close to their target, in degrees, the wheels have to get.
+        """
+        self.gpg = gpg
+        self.left_target = left_target
+        self.right_target = right_target
+        self.tolerance = tolerance
+        self.started = time.monotonic()
+        self.finished = None
+        self._cancelled = False
+        self._exception = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = [on_done] if on_done is not None else []
+
+    def __repr__(self):
+        state = "pending" if not self.done() else "cancelled" if self._cancelled else "failed" if self._exception else "reached"
+        if self.left_target is None:
+            return f"{type(self).__name__}({state})"
+        return f"MotionHandle(left_target={self.left_target:.1f}, right_target={self.right_target:.1f}, {state})"
+
+    def reached(self, left, right):
+        """
+        :returns: Whether wheels at ``left`` and ``right`` degrees are close enough to the targets.
+        """
+        return (abs(left - self.left_target) < self.tolerance and
+                abs(right - self.right_target) < self.tolerance)
+
+    def remaining(self, left, right):
+        """
+        :returns: How many degrees the wheel furthest from its target still has to turn.
+        """
+        return max(abs(left - self.left_target), abs(right - self.right_target))
+
+    def done(self):
+        """
+        :returns: Whether the move completed, whichever way.
+        """
+        return self._event.is_set()
+
+    def cancelled(self):
+        return self._cancelled
+
+    def wait(self, timeout=None):
+        """
+        Wait for the move to complete.
+
+        :param float timeout: Most seconds to wait. Forever by default.
+        :returns: Whether the move completed.
+        :raises IOError: If the move failed, see :py:meth:`result`.
+        """
+        if not self._event.wait(timeout):
+            return False
+        if self._exception is not None:
+            raise self._exception
+        return True
+
+    def result(self, timeout=None):
+        """
+        Wait for the move to complete.
+
+        :param float timeout: Most seconds to wait. Forever by default.
+        :returns: ``True`` once both wheels reached their target.
+        :raises TimeoutError: If the move didn't complete within ``timeout``.
+        :raises concurrent.futures.CancelledError: If the move was cancelled.
+        :raises IOError: If the motors were disabled.
+        """
+        if not self._event.wait(timeout):
+            raise TimeoutError("The move didn't complete in time")
+        if self._cancelled:
+            from concurrent.futures import CancelledError
+            raise CancelledError()
+        if self._exception is not None:
+            raise self._exception
+        return True
+
+    def exception(self, timeout=None):
+        """
+        :returns: The exception :py:meth:`result` would raise for a failed move, otherwise ``None``.
+        """
+        if not self._event.wait(timeout):
+            raise TimeoutError("The move didn't complete in time")
+        return self._exception
+
+    def cancel(self):
+        """
+        Stop the robot where it is, unless the move already completed.
+
+        :returns: Whether the move got cancelled.
+        """
+        if not self._finish(cancelled=True):
+            return False
+        self.gpg.set_motor_dps(self.gpg.MOTOR_LEFT + self.gpg.MOTOR_RIGHT, 0)
+        return True
+
+    def add_done_callback(self, callback):
+        """
+        Call ``callback(handle)`` once the move completes, from the thread watching the moves.
+        If the move already completed, it's called right away.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _update(self, snapshot):
+        """
+        Complete the move if the motors read in ``snapshot`` got there.
+
+        :returns: ``None`` once completed, otherwise the most seconds to wait before the next check.
+        """
+        if self.reached(snapshot.left_encoder, snapshot.right_encoder):
+            self._finish()
+            return None
+        if (snapshot.left_flags | snapshot.right_flags) & MotionMonitor.LOW_VOLTAGE_FLOAT:
+            self._finish(exception=IOError("The motors were disabled: the battery voltage is too low"))
+            return None
+        # check again at about half the time the wheels need to get there
+        speed = max(abs(snapshot.left_dps), abs(snapshot.right_dps), 1)
+        return (self.remaining(snapshot.left_encoder, snapshot.right_encoder) - self.tolerance) / speed / 2
+
+    def _fail(self, exception):
+        """
+        Complete the move with ``exception``, the motors can't be read anymore.
+        """
+        self._finish(exception=exception)
+
+    def _finish(self, cancelled=False, exception=None):
+        """
+        Mark the move as completed, and run the callbacks. Returns False if it already was.
+        """
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self._cancelled = cancelled
+            self._exception = exception
+            self.finished = time.monotonic()
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Exception in the callback of {self!r}: {e}")
+        return True
+
+
+class StopHandle(MotionHandle):
+    """
+    A stop of the robot, see :py:meth:`~easygopigo3.EasyGoPiGo3.stop`. It completes once both wheels stopped
+    turning, or after ``timeout`` if they keep turning, for instance because the robot is pushed.
+    """
+    CHECK_INTERVAL = 0.005  # seconds between two checks of the wheel speeds
+
+    def __init__(self, gpg, float_motors=True, timeout=0.5):
+        """
+        :param easygopigo3.EasyGoPiGo3 gpg: The robot stopping. It was already given a speed of 0.
+        :param boolean float_motors = True: Let the wheels turn freely once stopped.
+        :param float timeout = 0.5: Most seconds to wait for the wheels to stop.
+        """
+        MotionHandle.__init__(self, gpg, None, None)
+        self.float_motors = float_motors
+        self.deadline = self.started + timeout
+
+    def _update(self, snapshot):
+        if snapshot.left_dps or snapshot.right_dps:
+            if snapshot.timestamp < self.deadline:
+                return self.CHECK_INTERVAL
+        self._complete()
+        return None
+
+    def _fail(self, exception):
+        # the wheels can't be watched anymore: float them without waiting for them to stop
+        self._complete()
+
+    def _complete(self):
+        """
+        Complete the stop and float the motors. Does nothing if the stop already completed or got cancelled
+        by a new command, which the float would override.
+        """
+        if not self._finish():
+            return
+        if self.float_motors:
+            # the GoPiGo3 method: the EasyGoPiGo3 one would cancel the moves watched
+            from .gopigo3 import GoPiGo3
+            GoPiGo3.set_motor_power(self.gpg, self.gpg.MOTOR_LEFT + self.gpg.MOTOR_RIGHT, self.gpg.MOTOR_FLOAT)
+
+
+class MotionMonitor(PeriodicThread):
+    """
+    Watches the pending moves of a robot on a background thread, and completes them.
+
+    The :py:class:`~easygopigo3.EasyGoPiGo3` creates its own, there's no need to create one.
+    """
+    MIN_INTERVAL = 0.002  # seconds between two reads when the wheels are about to arrive
+    MAX_INTERVAL = 0.05   # seconds between two reads when they are far away
+    MAX_ERRORS = 5        # failed reads in a row after which the moves watched fail
+
+    LOW_VOLTAGE_FLOAT = 0x01  # motor status flag: the motors were disabled
+
+    def __init__(self, gpg):
+        """
+        :param easygopigo3.EasyGoPiGo3 gpg: The robot whose moves get watched.
+        """
+        PeriodicThread.__init__(self, name="gopigo3-motion")
+        self.gpg = gpg
+        self.reads = 0
+        self._failed_reads = 0  # in a row
+        self._handles = []
+        self._condition = threading.Condition()
+
+    def watch(self, handle):
+        """
+        Watch a move until it completes. The moves already watched are cancelled: the MCU only has one
+        target per wheel, the new move replaced theirs.
+        """
+        with self._condition:
+            replaced, self._handles = self._handles, [handle]
+            self.start()
+            self._condition.notify()
+        for previous in replaced:
+            previous._finish(cancelled=True)
+
+    def forget(self):
+        """
+        Cancel the moves watched without stopping the motors, after a command that isn't a move.
+        """
+        with self._condition:
+            replaced, self._handles = self._handles, []
+        for previous in replaced:
+            previous._finish(cancelled=True)
+
+    def pending(self):
+        """
+        :returns: The moves not completed yet.
+        :rtype: list
+        """
+        with self._condition:
+            return [handle for handle in self._handles if not handle.done()]
+
+    def _wake(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    def _tick(self):
+        with self._condition:
+            self._handles = [handle for handle in self._handles if not handle.done()]
+            if not self._handles:
+                if not self._stop_event.is_set():
+                    self._condition.wait()
+                return 0
+            handles = list(self._handles)
+
+        try:
+            snapshot = self.gpg.get_motors_snapshot()
+            self.reads += 1
+            self._failed_reads = 0
+        except Exception as e:
+            self.errors += 1
+            self._failed_reads += 1
+            if self._failed_reads < self.MAX_ERRORS:
+                return self.MAX_INTERVAL
+            # the robot can't be followed anymore: let whoever waits for the moves know
+            self._failed_reads = 0
+            with self._condition:
+                self._handles = [handle for handle in self._handles if handle not in handles]
+            for handle in handles:
+                try:
+                    handle._fail(e)
+                except Exception:
+                    self.errors += 1
+            return 0
+
+        interval = self.MAX_INTERVAL
+        for handle in handles:
+            wait = handle._update(snapshot)
+            if wait is not None:
+                interval = min(interval, max(self.MIN_INTERVAL, wait))
+        return interval
+
+
+class _Segment:
+    __slots__ = ("kind", "args", "handle")
+
+    def __init__(self, kind, args, handle):
+        self.kind = kind
+        self.args = args
+        self.handle = handle
+
+
+class MotionQueue(PeriodicThread):
+    """
+    Moves queued up and run one after the other by a background thread, see :py:meth:`~easygopigo3.EasyGoPiGo3.motion_queue`.
+
+    Each move starts from where the previous one was headed rather than from where the wheels stopped, so the
+    small errors of each move don't add up along a route. With ``blend``, a move hands over to the next one
+    already queued as soon as the wheels get within ``blend_degrees`` of its target: the robot doesn't stop
+    between the two. A move only blends into one queued before it started.
+
+    When a move fails, the moves queued after it are cancelled, since they were meant to start from where it
+    would have taken the robot, unless ``continue_on_error`` is set.
+    """
+    BLEND_DEGREES = 30
+
+    def __init__(self, gpg, blend=False, blend_degrees=BLEND_DEGREES, continue_on_error=False):
+        """
+        :param easygopigo3.EasyGoPiGo3 gpg: The robot to move.
+        :param boolean blend = False: Whether to blend each move into the next one.
+        :param float blend_degrees = BLEND_DEGREES: How far from its target, in wheel degrees, a move hands over to the next one when blending.
+        :param boolean continue_on_error = False: Whether to carry on with the next moves when one fails.
+        """
+        PeriodicThread.__init__(self, name="gopigo3-motion-queue")
+        self.gpg = gpg
+        self.blend = blend
+        self.blend_degrees = blend_degrees
+        self.continue_on_error = continue_on_error
+        self._segments = []
+        self._current = None
+        self._previous = None  # where the previous move was headed, if it got there
+        self._restore_speed = False  # an orbit changed the motor limits
+        self._condition = threading.Condition()
+
+    def drive_cm(self, dist):
+        """
+        Queue a straight move, like :py:meth:`~easygopigo3.EasyGoPiGo3.drive_cm`.
+
+        :returns: The :py:class:`MotionHandle` of the move.
+        """
+        return self._enqueue("drive", ((dist * 10 / self.gpg.WHEEL_CIRCUMFERENCE) * 360,))
+
+    def drive_inches(self, dist):
+        return self.drive_cm(dist * 2.54)
+
+    def drive_degrees(self, degrees):
+        """
+        Queue a straight move of ``degrees`` wheel rotation, like :py:meth:`~easygopigo3.EasyGoPiGo3.drive_degrees`.
+        """
+        return self._enqueue("drive", (degrees,))
+
+    def turn_degrees(self, degrees):
+        """
+        Queue a turn in place, like :py:meth:`~easygopigo3.EasyGoPiGo3.turn_degrees`.
+        """
+        return self._enqueue("orbit", (degrees, 0))
+
+    def orbit(self, degrees, radius_cm=0):
+        """
+        Queue an orbit, like :py:meth:`~easygopigo3.EasyGoPiGo3.orbit`. The speed is restored once the queue is done.
+        """
+        return self._enqueue("orbit", (degrees, radius_cm))
+
+    def steer(self, left_percent, right_percent, seconds):
+        """
+        Queue driving each wheel at a percentage of the speed for ``seconds``, like :py:meth:`~easygopigo3.EasyGoPiGo3.steer`.
+        """
+        return self._enqueue("steer", (left_percent, right_percent, seconds))
+
+    def _enqueue(self, kind, args):
+        handle = MotionHandle(self.gpg, None, None)
+        with self._condition:
+            self._segments.append(_Segment(kind, args, handle))
+            self.start()
+            self._condition.notify_all()
+        return handle
+
+    def pending(self):
+        """
+        :returns: How many moves are queued or under way.
+        """
+        with self._condition:
+            return len(self._segments) + (self._current is not None)
+
+    def wait(self, timeout=None):
+        """
+        Wait for every queued move to complete.
+
+        :param float timeout: Most seconds to wait. Forever by default.
+        :returns: Whether the queue is empty.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._segments and self._current is None, timeout)
+
+    def clear(self):
+        """
+        Cancel the moves that didn't start yet. The one under way carries on.
+        """
+        with self._condition:
+            segments, self._segments = self._segments, []
+        for segment in segments:
+            segment.handle._finish(cancelled=True)
+
+    def cancel(self):
+        """
+        Cancel every queued move and stop the robot where it is.
+        """
+        self.clear()
+        current = self._current
+        if current is not None:
+            current.handle.cancel()
+
+    def stop(self):
+        """
+        :py:meth:`cancel` and stop the background thread.
+        """
+        self._stop_event.set()
+        self.cancel()
+        PeriodicThread.stop(self)
+        self._previous = None
+
+    def _wake(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    def _tick(self):
+        gpg = self.gpg
+        with self._condition:
+            self._current = None
+            if not self._segments:
+                if self._restore_speed:
+                    self._restore_speed = False
+                    gpg.set_speed(gpg.get_speed())
+                self._condition.notify_all()
+            while not self._segments and not self._stop_event.is_set():
+                self._condition.wait()
+            if self._stop_event.is_set():
+                return
+            segment = self._current = self._segments.pop(0)
+
+        try:
+            self._previous = self._execute(segment, self._previous)
+        except Exception as e:
+            segment.handle._finish(exception=e)
+            self._previous = None
+        if segment.handle.exception() is not None and not self.continue_on_error:
+            self.clear()
+
+    def _blending(self):
+        with self._condition:
+            return self.blend and bool(self._segments)
+
+    def _execute(self, segment, previous):
+        """
+        Run one move. Returns where the wheels were headed if they got there, otherwise ``None``.
+        """
+        gpg = self.gpg
+        handle = segment.handle
+        if segment.kind == "steer":
+            left_percent, right_percent, seconds = segment.args
+            speed = gpg.get_speed()
+            gpg.set_motor_limits(gpg.MOTOR_LEFT + gpg.MOTOR_RIGHT, dps=speed)
+            gpg.set_motor_dps(gpg.MOTOR_LEFT, speed * left_percent / 100)
+            gpg.set_motor_dps(gpg.MOTOR_RIGHT, speed * right_percent / 100)
+            if not handle.wait(seconds):
+                if not self._blending():
+                    gpg.set_motor_dps(gpg.MOTOR_LEFT + gpg.MOTOR_RIGHT, 0)
+                handle._finish()
+            return None
+
+        if segment.kind == "drive":
+            (degrees,) = segment.args
+            left_degrees = right_degrees = degrees
+            left_speed = right_speed = gpg.get_speed()
+        else:
+            left_degrees, right_degrees, left_speed, right_speed = gpg._orbit_plan(*segment.args)
+            self._restore_speed = True
+        left_start, right_start = previous if previous is not None else gpg.read_encoders()
+        handle.left_target = left_start + left_degrees
+        handle.right_target = right_start + right_degrees
+        if self._blending():
+            handle.tolerance = max(self.blend_degrees, MotionHandle.TOLERANCE)
+
+        gpg._preempt_profile()
+        gpg.set_motor_limits(gpg.MOTOR_LEFT, dps=left_speed)
+        gpg.set_motor_limits(gpg.MOTOR_RIGHT, dps=right_speed)
+        gpg.set_motor_position(gpg.MOTOR_LEFT, handle.left_target)
+        gpg.set_motor_position(gpg.MOTOR_RIGHT, handle.right_target)
+        handle.started = time.monotonic()
+        gpg._watch_move(handle)
+        handle.wait()
+        if handle.cancelled() or handle.exception() is not None:
+            return None
+        return (handle.left_target, handle.right_target)
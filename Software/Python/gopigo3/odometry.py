@@ -0,0 +1,243 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# Odometry for the GoPiGo3
+#
+# Integrates the wheel encoders into the pose of the robot on a background
+# thread, and keeps the poses of the last few seconds:
+#
+#     odometry = gpg.start_odometry(rate=100)
+#     pose = odometry.pose()
+#     print(pose.x, pose.y, pose.heading)
+#     then = odometry.pose_at(time.monotonic() - 0.25)  # where the robot was when a sensor read something
+#
+# x and y are in mm, from where the robot was when the odometry started (or
+# was reset), x straight ahead. theta is in radians, counterclockwise, so a
+# turn_degrees(90), which turns right, takes it to -pi/2. v is the forward
+# speed in mm/s and omega the turning speed in radians/s.
+#
+# Both encoders are read in one SPI batch. When telemetry is running (see
+# GoPiGo3.start_telemetry) at least as fast, its samples are used instead,
+# so the odometry doesn't add any SPI traffic. GoPiGo3.offset_motor_encoder
+# (and so reset_encoders) tells the odometry that the encoders jumped, and the
+# pose carries on from the next reading.
+
+import math
+import threading
+import time
+
+from .periodic import PeriodicThread
+
+MAX_WHEEL_DPS = 2000  # faster than any wheel turns: a bigger step means the encoders were reset
+
+
+class Pose:
+    """
+    Where the robot was, and how fast it moved, at a given time.
+
+    :var float timestamp: ``time.monotonic()`` of the pose.
+    :var float x: mm ahead of the origin.
+    :var float y: mm left of the origin.
+    :var float theta: Radians counterclockwise from the starting heading, between -pi and pi.
+    :var float v: Forward speed in mm/s.
+    :var float omega: Turning speed in radians/s, counterclockwise.
+    """
+    __slots__ = ("timestamp", "x", "y", "theta", "v", "omega")
+
+    def __init__(self, timestamp, x, y, theta, v=0.0, omega=0.0):
+        self.timestamp = timestamp
+        self.x = x
+        self.y = y
+        self.theta = theta
+        self.v = v
+        self.omega = omega
+
+    @property
+    def heading(self):
+        """
+        ``theta`` in degrees.
+        """
+        return math.degrees(self.theta)
+
+    def __repr__(self):
+        return (f"Pose(timestamp={self.timestamp}, x={self.x:.1f}, y={self.y:.1f}, theta={self.theta:.4f}, "
+                f"v={self.v:.1f}, omega={self.omega:.4f})")
+
+
+def _normalize(angle):
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+def _interpolate(before, after, timestamp):
+    span = after.timestamp - before.timestamp
+    if span <= 0:
+        return after
+    ratio = (timestamp - before.timestamp) / span
+    return Pose(timestamp,
+                before.x + (after.x - before.x) * ratio,
+                before.y + (after.y - before.y) * ratio,
+                _normalize(before.theta + _normalize(after.theta - before.theta) * ratio),
+                before.v + (after.v - before.v) * ratio,
+                before.omega + (after.omega - before.omega) * ratio)
+
+
+class Odometry(PeriodicThread):
+    """
+    Tracks the pose of a :py:class:`~gopigo3.GoPiGo3` from its wheel encoders, on a background thread.
+
+    Use :py:meth:`~gopigo3.GoPiGo3.start_odometry` rather than creating one directly.
+    """
+
+    def __init__(self, gpg, rate=100, history=1000):
+        """
+        :param gopigo3.GoPiGo3 gpg: The robot to track. Its ``WHEEL_CIRCUMFERENCE`` and ``WHEEL_BASE_WIDTH`` are used.
+        :param float rate = 100: Updates per second.
+        :param int history = 1000: How many poses are kept for :py:meth:`pose_at`. 10 seconds at 100 updates per second.
+        :raises ValueError: If ``history`` is less than 1.
+        """
+        if history < 1:
+            raise ValueError("history has to be at least 1, the latest pose is kept in it")
+        PeriodicThread.__init__(self, rate, "gopigo3-odometry")
+        self.gpg = gpg
+        self.updates = 0
+        self.encoder_resets = 0
+        self._lock = threading.Lock()
+        self._times = [0.0] * history
+        self._poses = [None] * history
+        self._start = 0  # index of the oldest pose
+        self._count = 0
+        self._pose = None
+        self._encoders = None
+        self._encoders_offset_at = 0.0
+
+    def reset(self, x=0.0, y=0.0, theta=0.0):
+        """
+        Set the current pose, forgetting the previous ones.
+        """
+        with self._lock:
+            pose = self._pose
+            timestamp = pose.timestamp if pose is not None else time.monotonic()
+            self._pose = Pose(timestamp, x, y, _normalize(theta))
+            self._start = 0
+            self._count = 0
+            self._append(self._pose)
+
+    def encoders_offset(self):
+        """
+        Take the next reading of the encoders as the new reference, rather than integrating the jump.
+
+        Called by :py:meth:`~gopigo3.GoPiGo3.offset_motor_encoder` once the encoders were offset. The readings
+        taken before are dropped.
+        """
+        with self._lock:
+            self._encoders = None
+            self._encoders_offset_at = time.monotonic()
+
+    def pose(self):
+        """
+        :returns: The latest pose, or ``None`` before the first update.
+        :rtype: gopigo3.odometry.Pose
+        """
+        return self._pose
+
+    def pose_at(self, timestamp):
+        """
+        :param float timestamp: A ``time.monotonic()`` time.
+        :returns: The pose at ``timestamp``, interpolated between the two updates around it. The latest pose if
+                  ``timestamp`` is more recent, ``None`` if it's older than the history.
+        :rtype: gopigo3.odometry.Pose
+        """
+        with self._lock:
+            count = self._count
+            if count == 0:
+                return None
+            size = len(self._times)
+            times = self._times
+            start = self._start
+            if timestamp >= times[(start + count - 1) % size]:
+                return self._poses[(start + count - 1) % size]
+            if timestamp < times[start]:
+                return None
+            # the first pose after timestamp
+            low, high = 0, count - 1
+            while low < high:
+                middle = (low + high) // 2
+                if times[(start + middle) % size] <= timestamp:
+                    low = middle + 1
+                else:
+                    high = middle
+            before = self._poses[(start + low - 1) % size]
+            after = self._poses[(start + low) % size]
+        return _interpolate(before, after, timestamp)
+
+    def history(self):
+        """
+        :returns: The poses kept, the oldest first.
+        :rtype: list
+        """
+        with self._lock:
+            size = len(self._poses)
+            return [self._poses[(self._start + index) % size] for index in range(self._count)]
+
+    def _append(self, pose):
+        size = len(self._times)
+        index = (self._start + self._count) % size
+        self._times[index] = pose.timestamp
+        self._poses[index] = pose
+        if self._count < size:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % size
+
+    def update(self):
+        """
+        Read the encoders once and integrate the move since the previous update.
+        """
+        gpg = self.gpg
+        snapshot = gpg.get_motors_snapshot(max_age=1.0 / self.rate)
+        encoders = snapshot.encoders
+        with self._lock:
+            previous = self._encoders
+            pose = self._pose
+            if pose is not None and snapshot.timestamp <= pose.timestamp:
+                return  # the same telemetry sample as last time
+            if snapshot.timestamp <= self._encoders_offset_at:
+                return  # read before the encoders were offset
+            self._encoders = encoders
+            if previous is None:
+                if pose is None:
+                    self._pose = Pose(snapshot.timestamp, 0.0, 0.0, 0.0)
+                    self._append(self._pose)
+                return
+
+            dt = snapshot.timestamp - pose.timestamp
+            left_degrees = encoders[0] - previous[0]
+            right_degrees = encoders[1] - previous[1]
+            if max(abs(left_degrees), abs(right_degrees)) > MAX_WHEEL_DPS * dt + 10:
+                # the encoders were offset without telling the odometry, by another process maybe
+                self.encoder_resets += 1
+                left_degrees = right_degrees = 0
+
+            mm_per_degree = gpg.WHEEL_CIRCUMFERENCE / 360
+            left = left_degrees * mm_per_degree
+            right = right_degrees * mm_per_degree
+            distance = (left + right) / 2
+            turn = (right - left) / gpg.WHEEL_BASE_WIDTH
+            # move along the average heading over the step
+            heading = pose.theta + turn / 2
+            v = (snapshot.left_dps + snapshot.right_dps) / 2 * mm_per_degree
+            omega = (snapshot.right_dps - snapshot.left_dps) * mm_per_degree / gpg.WHEEL_BASE_WIDTH
+            self._pose = Pose(snapshot.timestamp,
+                              pose.x + distance * math.cos(heading),
+                              pose.y + distance * math.sin(heading),
+                              _normalize(pose.theta + turn),
+                              v, omega)
+            self._append(self._pose)
+        self.updates += 1
+
+    def _tick(self):
+        self.update()
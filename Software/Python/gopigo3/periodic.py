@@ -0,0 +1,114 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# Background threads doing something at a fixed rate
+#
+# The telemetry, the odometry, the motion profiles and the others all run
+# the same loop: do one step, then sleep until the next one is due, without
+# trying to catch up when running late. A PeriodicThread has that loop and
+# the start/stop/is_running methods that go with it. Either subclass it and
+# implement _tick(), or give it the function to call:
+#
+#     poller = PeriodicThread(rate=100, name="gopigo3-poll", target=poll_once)
+#     poller.start()
+#     ...
+#     poller.stop()
+#
+# _tick() may return how many seconds to wait before the next step instead,
+# for the loops that adapt their pace or that wait for work.
+
+import threading
+import time
+
+
+class PeriodicThread:
+    """
+    Calls :py:meth:`_tick` ``rate`` times per second on a background thread.
+
+    Exceptions raised by :py:meth:`_tick` are counted in ``errors`` and the loop goes on.
+    """
+
+    def __init__(self, rate=None, name="gopigo3-periodic", target=None, wait_first=False):
+        """
+        :param float rate: Steps per second. ``None`` to run the next step right away, unless :py:meth:`_tick` says otherwise.
+        :param str name: The name of the thread.
+        :param target: Function called at every step, if :py:meth:`_tick` isn't overridden.
+        :param boolean wait_first = False: Whether to wait one period before the first step.
+        """
+        self.rate = rate
+        self.name = name
+        self.target = target
+        self.wait_first = wait_first
+        self.errors = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start the thread, if it isn't running yet.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the thread, and wait for the step under way to end unless called from the thread itself.
+        """
+        self._stop_event.set()
+        self._wake()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _wake(self):
+        """
+        Called by :py:meth:`stop` once the thread is told to stop, to wake up a :py:meth:`_tick` waiting for work.
+        """
+        pass
+
+    def _tick(self):
+        """
+        One step. Calls ``target`` by default, ignoring what it returns.
+
+        :returns: ``None`` to keep the pace of ``rate``, or how many seconds to wait before the next step.
+        """
+        if self.target is not None:
+            self.target()
+        return None
+
+    def _period(self):
+        return 1.0 / self.rate if self.rate else 0.0
+
+    def _run(self):
+        next_time = time.monotonic()
+        if self.wait_first:
+            next_time += self._period()
+            if self._stop_event.wait(next_time - time.monotonic()):
+                return
+        while not self._stop_event.is_set():
+            try:
+                delay = self._tick()
+            except Exception:
+                self.errors += 1
+                delay = None
+            if delay is None:
+                next_time += self._period()
+                delay = next_time - time.monotonic()
+                if delay <= 0:
+                    # running late, don't try to catch up
+                    next_time = time.monotonic()
+                    continue
+            else:
+                next_time = time.monotonic() + delay
+            if delay > 0:
+                self._stop_event.wait(delay)
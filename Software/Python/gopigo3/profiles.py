@@ -0,0 +1,257 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# Velocity profiles for the moves of an EasyGoPiGo3
+#
+# By default a move gives the MCU the final position of each wheel, and the
+# wheels jump to the speed limit right away. With a motion profile, the
+# wheels speed up and slow down smoothly instead:
+#
+#     gpg.enable_motion_profile(acceleration=1500, jerk=15000)
+#     gpg.drive_cm(50)
+#
+# A VelocityProfile is an S-curve: the acceleration ramps up at ``jerk``
+# to ``acceleration``, stays there, and ramps down, so that the speed
+# reaches the speed limit without a kick, then the same in reverse to stop.
+# Without a jerk it's a trapezoid: constant acceleration, cruise, constant
+# deceleration. Short moves don't reach the speed limit.
+#
+# A ProfileStreamer thread follows the profile, sending both wheel speeds
+# and reading both motors in one SPI batch per tick. Each speed is the one
+# of the profile, corrected by how far the wheel is from where the profile
+# wanted it at the last reading. At the end of the profile the MCU gets the
+# final position of each wheel, which it holds.
+
+import math
+import threading
+import time
+
+from .gopigo3 import GoPiGo3
+from .periodic import PeriodicThread
+
+
+class VelocityProfile:
+    """
+    How far and how fast to go at any time to cover ``distance`` within the given limits.
+
+    Units are up to the caller, typically wheel degrees and seconds.
+    """
+
+    def __init__(self, distance, max_velocity, acceleration, jerk=None):
+        """
+        :param float distance: How far to go. Negative to go backward.
+        :param float max_velocity: The cruise speed, if the distance is long enough to reach it.
+        :param float acceleration: The largest acceleration, and deceleration.
+        :param float jerk: How fast the acceleration changes, for an S-curve. ``None`` for a trapezoid.
+        :raises ValueError: If ``max_velocity``, ``acceleration`` or ``jerk`` isn't positive.
+        """
+        if max_velocity <= 0 or acceleration <= 0 or (jerk is not None and jerk <= 0):
+            raise ValueError("max_velocity, acceleration and jerk have to be positive")
+        self.distance = distance
+        self.acceleration = acceleration
+        self.jerk = jerk
+        self._sign = -1 if distance < 0 else 1
+        length = abs(distance)
+
+        velocity = max_velocity
+        if velocity * self._ramp(velocity)[2] > length:
+            # too short to reach max_velocity: find the speed at which speeding up then slowing down covers it
+            low, high = 0.0, velocity
+            for _ in range(60):
+                middle = (low + high) / 2
+                if middle * self._ramp(middle)[2] > length:
+                    high = middle
+                else:
+                    low = middle
+            velocity = low
+        self.velocity = velocity
+        self._jerk_time, self._peak_acceleration, self._ramp_time = self._ramp(velocity)
+        self._length = length
+        self.duration = 2 * self._ramp_time + ((length - velocity * self._ramp_time) / velocity if velocity > 0 else 0)
+
+    def _ramp(self, velocity):
+        """
+        :returns: ``(jerk_time, peak_acceleration, ramp_time)`` of speeding up from 0 to ``velocity``.
+        """
+        if self.jerk is None:
+            return 0.0, self.acceleration, velocity / self.acceleration
+        jerk_time = min(self.acceleration / self.jerk, math.sqrt(velocity / self.jerk))
+        peak_acceleration = self.jerk * jerk_time
+        if peak_acceleration <= 0:
+            return 0.0, self.acceleration, 0.0
+        return jerk_time, peak_acceleration, velocity / peak_acceleration + jerk_time
+
+    def _speeding_up(self, t):
+        """
+        ``(position, velocity)`` at ``t`` seconds into speeding up.
+        """
+        jerk_time = self._jerk_time
+        if t < jerk_time:
+            return self.jerk * t ** 3 / 6, self.jerk * t ** 2 / 2
+        if t <= self._ramp_time - jerk_time:
+            u = t - jerk_time
+            velocity = self._peak_acceleration * jerk_time / 2
+            position = self._peak_acceleration * jerk_time ** 2 / 6
+            return position + velocity * u + self._peak_acceleration * u ** 2 / 2, velocity + self._peak_acceleration * u
+        # the speed curve is symmetric: the end of the ramp mirrors its start
+        position, velocity = self._speeding_up(self._ramp_time - t)
+        return self.velocity * (t - self._ramp_time / 2) + position, self.velocity - velocity
+
+    def sample(self, t):
+        """
+        :param float t: Seconds since the start.
+        :returns: ``(position, velocity)`` at ``t``.
+        :rtype: tuple(float, float)
+        """
+        if t <= 0:
+            return 0.0, 0.0
+        if t >= self.duration:
+            return self.distance, 0.0
+        if t < self._ramp_time:
+            position, velocity = self._speeding_up(t)
+        elif t <= self.duration - self._ramp_time:
+            position = self.velocity * (self._ramp_time / 2 + t - self._ramp_time)
+            velocity = self.velocity
+        else:
+            position, velocity = self._speeding_up(self.duration - t)
+            position = self._length - position
+        return self._sign * position, self._sign * velocity
+
+
+class _ProfiledMove:
+    __slots__ = ("handle", "profile", "starts", "scales", "started", "measured")
+
+    def __init__(self, handle, profile, starts, scales):
+        self.handle = handle
+        self.profile = profile
+        self.starts = starts
+        self.scales = scales
+        self.started = time.monotonic()
+        self.measured = None  # (time, left encoder, right encoder) of the last reading
+
+
+class ProfileStreamer(PeriodicThread):
+    """
+    Runs the moves of an :py:class:`~easygopigo3.EasyGoPiGo3` along velocity profiles, on a background thread.
+
+    Use :py:meth:`~easygopigo3.EasyGoPiGo3.enable_motion_profile` rather than creating one directly.
+    """
+    POSITION_GAIN = 5.0  # 1/s, speed added per degree a wheel lags behind the profile
+
+    def __init__(self, gpg, acceleration=1500, jerk=15000, rate=100):
+        """
+        :param easygopigo3.EasyGoPiGo3 gpg: The robot to move.
+        :param float acceleration = 1500: Largest wheel acceleration, in degrees per second squared.
+        :param float jerk = 15000: How fast the acceleration changes, in degrees per second cubed. ``None`` for trapezoidal profiles.
+        :param float rate = 100: Speed updates per second.
+        """
+        PeriodicThread.__init__(self, rate, "gopigo3-profile")
+        self.gpg = gpg
+        self.acceleration = acceleration
+        self.jerk = jerk
+        self.ticks = 0
+        self._move = None
+        self._condition = threading.Condition()
+        # the GoPiGo3 method: the EasyGoPiGo3 one would take the speeds for a new command and cancel the move
+        self._set_motor_dps = GoPiGo3.set_motor_dps.__get__(gpg)
+
+    def run(self, handle, left_start, right_start, left_degrees, right_degrees, max_velocity):
+        """
+        Move the wheels ``left_degrees`` and ``right_degrees`` from ``left_start`` and ``right_start``, along one
+        profile scaled for each wheel, the wheel going further cruising at ``max_velocity``. ``handle`` gets
+        watched like the moves without a profile.
+        """
+        distance = max(abs(left_degrees), abs(right_degrees))
+        with self._condition:
+            self._move = None
+            if distance == 0 or max_velocity == 0:
+                # nothing to profile, or no speed limit to cruise at
+                profile = None
+            else:
+                profile = VelocityProfile(distance, abs(max_velocity), self.acceleration, self.jerk)
+            if profile is None or profile.velocity == 0:
+                self.gpg.set_motor_position(self.gpg.MOTOR_LEFT, handle.left_target)
+                self.gpg.set_motor_position(self.gpg.MOTOR_RIGHT, handle.right_target)
+            else:
+                self._move = _ProfiledMove(handle, profile, (left_start, right_start),
+                                           (left_degrees / distance, right_degrees / distance))
+                self.start()
+                self._condition.notify()
+        self.gpg._watch_move(handle)
+
+    def preempt(self):
+        """
+        Stop following the current profile, leaving the motors as they are, before another command.
+        """
+        with self._condition:
+            self._move = None
+
+    def _wake(self):
+        with self._condition:
+            self._move = None
+            self._condition.notify_all()
+
+    def _hold(self, move):
+        """
+        Give the MCU the final position of the wheels, which it holds from then on.
+        """
+        gpg = self.gpg
+        with gpg.batch() as batch:
+            batch.set_motor_position(gpg.MOTOR_LEFT, move.handle.left_target)
+            batch.set_motor_position(gpg.MOTOR_RIGHT, move.handle.right_target)
+
+    def _step(self, move):
+        """
+        Send the speeds for now and read the motors, in one batch. Called holding the condition.
+        Returns whether the profile is over.
+        """
+        gpg = self.gpg
+        now = time.monotonic()
+        t = now - move.started
+        if t >= move.profile.duration:
+            self._hold(move)
+            return True
+
+        position, velocity = move.profile.sample(t)
+        speeds = [scale * velocity for scale in move.scales]
+        if move.measured is not None:
+            measured_at, left, right = move.measured
+            expected, _ = move.profile.sample(measured_at - move.started)
+            for index, encoder in enumerate((left, right)):
+                error = move.starts[index] + move.scales[index] * expected - encoder
+                speeds[index] += self.POSITION_GAIN * error
+
+        with gpg.batch() as batch:
+            batch.submit(self._set_motor_dps, gpg.MOTOR_LEFT, speeds[0])
+            batch.submit(self._set_motor_dps, gpg.MOTOR_RIGHT, speeds[1])
+            left = batch.get_motor_encoder(gpg.MOTOR_LEFT)
+            right = batch.get_motor_encoder(gpg.MOTOR_RIGHT)
+        try:
+            move.measured = (time.monotonic(), left.result(), right.result())
+        except Exception:
+            self.errors += 1
+        return False
+
+    def _tick(self):
+        with self._condition:
+            move = self._move
+            if move is None:
+                if not self._stop_event.is_set():
+                    self._condition.wait()
+                return 0
+            if move.handle.done():
+                self._move = None
+                if not move.handle.cancelled():
+                    # reached before the end of the profile, or the motors got disabled: hold the target
+                    self._hold(move)
+                return 0
+            try:
+                if self._step(move):
+                    self._move = None
+            except Exception:
+                self.errors += 1
+            self.ticks += 1
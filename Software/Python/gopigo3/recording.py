@@ -0,0 +1,314 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# Recording and replay of GoPiGo3 SPI traffic
+#
+# A RecordingTransport wraps the transport of a GoPiGo3 and logs every SPI
+# message with its reply. A ReplayTransport answers from such a log, so that
+# a run recorded on the robot can be replayed off the robot:
+#
+#     gpg = EasyGoPiGo3()
+#     gpg.start_recording("run.gpg3spi")
+#     ...                                    # drive around
+#     gpg.stop_recording()
+#
+# and then, anywhere:
+#
+#     gpg = EasyGoPiGo3(transport=GoPiGo3Simulator())
+#     gpg.start_replay("run.gpg3spi")
+#     ...                                    # the same calls, in the same order
+#
+# The log is a sequence of RECORD_SIZE byte records, little endian. The first
+# one is the header:
+#
+#     magic "GPG3SPI\0", version u32, record size u32, max message length u32,
+#     wall clock time of the start f64, zero padding
+#
+# and every following one is a message:
+#
+#     nanoseconds since the start u64 (time.monotonic_ns), length u16,
+#     flags u16, reserved u32, sent bytes, received bytes
+#
+# with both byte fields zero padded to MAX_MESSAGE_LENGTH. Record n starts at
+# byte (n + 1) * RECORD_SIZE, so the file can be mmap'ed and indexed directly.
+
+import mmap
+import struct
+import threading
+import time
+
+from .transport import Transport
+
+MAGIC = b"GPG3SPI\0"
+VERSION = 1
+
+MAX_MESSAGE_LENGTH = 40  # the longest GoPiGo3 message is a 32 byte grove I2C read: 6 + 32
+_HEADER = struct.Struct("<8sIIId")
+_RECORD = struct.Struct("<QHHI")
+RECORD_SIZE = _RECORD.size + 2 * MAX_MESSAGE_LENGTH
+
+FLAG_FAILED = 0x0001  # the transfer raised, the received bytes are meaningless
+
+
+class ReplayError(Exception):
+    """Exception raised when a replayed run doesn't match its recording"""
+
+
+class SPIRecord:
+    """
+    One recorded SPI message.
+
+    :var float timestamp: Seconds since the start of the recording.
+    :var bytes data_out: The bytes sent.
+    :var bytes reply: The bytes received.
+    :var boolean failed: Whether the transfer raised instead of returning ``reply``.
+    """
+    __slots__ = ("timestamp", "data_out", "reply", "failed")
+
+    def __init__(self, timestamp, data_out, reply, failed):
+        self.timestamp = timestamp
+        self.data_out = data_out
+        self.reply = reply
+        self.failed = failed
+
+    def __repr__(self):
+        return (f"SPIRecord(timestamp={self.timestamp:.6f}, data_out={self.data_out.hex()}, "
+                f"reply={self.reply.hex()}, failed={self.failed})")
+
+
+class RecordingTransport(Transport):
+    """
+    Pass every message on to another transport and log it with its reply.
+
+    Use :py:meth:`~gopigo3.GoPiGo3.start_recording` rather than creating one directly.
+    """
+
+    def __init__(self, transport, path):
+        """
+        :param gopigo3.Transport transport: The transport that actually talks to the GoPiGo3.
+        :param str path: The log file. It gets overwritten.
+        """
+        self.transport = transport
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._record = bytearray(RECORD_SIZE)
+        self._start_ns = time.monotonic_ns()
+        self._file = open(path, "wb")
+
+        header = bytearray(RECORD_SIZE)
+        _HEADER.pack_into(header, 0, MAGIC, VERSION, RECORD_SIZE, MAX_MESSAGE_LENGTH, time.time())
+        self._file.write(header)
+
+    @staticmethod
+    def _check_length(data_out):
+        # before the transfer, so that a message that can't be recorded isn't sent either
+        length = len(data_out)
+        if length > MAX_MESSAGE_LENGTH:
+            raise ValueError(f"Can't record a {length} byte message. Up to {MAX_MESSAGE_LENGTH} bytes fit in a record.")
+
+    def _write(self, timestamp_ns, data_out, reply, flags=0):
+        length = len(data_out)
+        record = self._record
+        with self._lock:
+            if self._file is None:
+                return
+            record[:] = bytes(RECORD_SIZE)
+            _RECORD.pack_into(record, 0, timestamp_ns - self._start_ns, length, flags, 0)
+            offset = _RECORD.size
+            record[offset:offset + length] = bytes(b & 0xFF for b in data_out)
+            offset += MAX_MESSAGE_LENGTH
+            if reply is not None:
+                record[offset:offset + length] = bytes(reply[:length])
+            self._file.write(record)
+            self.records += 1
+
+    def transfer(self, data_out):
+        self._check_length(data_out)
+        try:
+            reply = self.transport.transfer(data_out)
+        except Exception:
+            self._write(time.monotonic_ns(), data_out, None, FLAG_FAILED)
+            raise
+        self._write(time.monotonic_ns(), data_out, reply)
+        return reply
+
+    def transfer_many(self, messages):
+        for data_out in messages:
+            self._check_length(data_out)
+        try:
+            replies = self.transport.transfer_many(messages)
+        except Exception:
+            now = time.monotonic_ns()
+            for data_out in messages:
+                self._write(now, data_out, None, FLAG_FAILED)
+            raise
+        now = time.monotonic_ns()
+        for data_out, reply in zip(messages, replies):
+            self._write(now, data_out, reply)
+        return replies
+
+    def transfer_buffer(self, buffer):
+        self._check_length(buffer.tx)
+        try:
+            self.transport.transfer_buffer(buffer)
+        except Exception:
+            self._write(time.monotonic_ns(), buffer.tx, None, FLAG_FAILED)
+            raise
+        self._write(time.monotonic_ns(), buffer.tx, buffer.rx)
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def stop(self):
+        """
+        Close the log, leaving the wrapped transport open.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def close(self):
+        self.stop()
+        self.transport.close()
+
+
+class Recording:
+    """
+    A recorded log, memory mapped. Records are read on access, so logs of any size open instantly.
+
+    .. code-block:: python
+
+        with Recording("run.gpg3spi") as recording:
+            print(len(recording), recording.duration)
+            for record in recording:
+                print(record)
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: The log file.
+        :raises ValueError: If the file isn't a GoPiGo3 SPI recording.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"{path} is not a GoPiGo3 SPI recording")
+        magic, version, record_size, max_length, self.start_time = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a GoPiGo3 SPI recording")
+        if version != VERSION:
+            raise ValueError(f"{path} is a version {version} recording, only version {VERSION} is supported")
+        self.record_size = record_size
+        self.max_length = max_length
+        # a record cut short by a crash is ignored
+        self._count = len(self._map) // record_size - 1
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("record index out of range")
+        offset = (index + 1) * self.record_size
+        timestamp_ns, length, flags, _ = _RECORD.unpack_from(self._map, offset)
+        offset += _RECORD.size
+        data_out = self._map[offset:offset + length]
+        offset += self.max_length
+        reply = self._map[offset:offset + length]
+        return SPIRecord(timestamp_ns / 1e9, data_out, reply, bool(flags & FLAG_FAILED))
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    @property
+    def duration(self):
+        """
+        Seconds between the start of the recording and its last message.
+        """
+        return self[-1].timestamp if self._count else 0.0
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class ReplayTransport(Transport):
+    """
+    Answer the messages of a GoPiGo3 with the replies of a recording, in order.
+    """
+
+    def __init__(self, path, realtime=False, strict=True):
+        """
+        :param str path: The log written by a :py:class:`RecordingTransport`.
+        :param boolean realtime = False: Hold every reply back until as much time passed since the start of the
+                                         replay as since the start of the recording. Otherwise answer as fast as possible.
+        :param boolean strict = True: Raise :py:class:`ReplayError` when a message differs from the recorded one.
+                                      Otherwise the next recorded reply is returned whatever was sent.
+        """
+        self.recording = Recording(path)
+        self.realtime = realtime
+        self.strict = strict
+        self.position = 0
+        self.mismatches = 0
+        self._lock = threading.Lock()
+        self._start = None
+
+    def _next(self, data_out):
+        with self._lock:
+            if self.position >= len(self.recording):
+                raise ReplayError(f"The recording ended after {self.position} messages")
+            record = self.recording[self.position]
+            self.position += 1
+            if self._start is None:
+                self._start = time.monotonic() - record.timestamp
+
+        if bytes(b & 0xFF for b in data_out) != record.data_out:
+            self.mismatches += 1
+            if self.strict:
+                raise ReplayError(f"Message {self.position - 1} differs from the recording: "
+                                  f"sent {bytes(b & 0xFF for b in data_out).hex()}, recorded {record.data_out.hex()}")
+
+        if self.realtime:
+            delay = self._start + record.timestamp - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        if record.failed:
+            raise IOError("Recorded SPI transfer failure")
+        return record.reply
+
+    def transfer(self, data_out):
+        reply = self._next(data_out)
+        return list(reply[:len(data_out)]) + [0] * max(0, len(data_out) - len(reply))
+
+    def transfer_buffer(self, buffer):
+        reply = self._next(buffer.tx)
+        length = min(len(reply), len(buffer.rx))
+        buffer.rx[:length] = reply[:length]
+
+    def remaining(self):
+        """
+        :returns: How many recorded messages haven't been replayed yet.
+        """
+        return len(self.recording) - self.position
+
+    def close(self):
+        self.recording.close()
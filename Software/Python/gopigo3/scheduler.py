@@ -0,0 +1,260 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# Priority scheduling of the SPI messages of a GoPiGo3
+#
+# Without a scheduler, threads get the SPI bus in whatever order they reach
+# the transport lock, so a motor command can wait behind a burst of sensor
+# reads. A SchedulingTransport queues the messages of all threads and sends
+# the most urgent first:
+#
+#     PRIORITY_SAFETY       motor commands
+#     PRIORITY_CONTROL      motor status and encoder reads, LEDs, servos, configuration
+#     PRIORITY_TELEMETRY    voltage and grove reads
+#     PRIORITY_DIAGNOSTICS  manufacturer, board, versions and id
+#
+# A thread can lower (or raise) the priority of its own reads:
+#
+#     gpg.enable_scheduler()
+#     with gpg.spi_priority(gpg.SPI_PRIORITY.DIAGNOSTICS):
+#         log(gpg.get_voltage_battery())
+#
+# motor commands always stay PRIORITY_SAFETY. A read queued while the very
+# same read is already waiting doesn't get sent twice: both callers get the
+# reply of the one transfer, sent with the higher of their priorities.
+#
+# There is no scheduling thread. Whichever thread finds the bus free sends
+# queued messages, the most urgent first, until its own is done, then hands
+# over to the waiting threads.
+
+import heapq
+import threading
+import time
+
+from .instrumentation import LatencyHistogram
+from .transport import Transport
+
+PRIORITY_SAFETY = 0
+PRIORITY_CONTROL = 1
+PRIORITY_TELEMETRY = 2
+PRIORITY_DIAGNOSTICS = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_SAFETY: "safety",
+    PRIORITY_CONTROL: "control",
+    PRIORITY_TELEMETRY: "telemetry",
+    PRIORITY_DIAGNOSTICS: "diagnostics",
+}
+
+
+class _Request:
+    __slots__ = ("priority", "messages", "buffer", "key", "enqueued", "replies", "error", "done")
+
+    def __init__(self, priority, messages, buffer, key):
+        self.priority = priority
+        self.messages = messages
+        self.buffer = buffer
+        self.key = key
+        self.enqueued = time.perf_counter()
+        self.replies = None
+        self.error = None
+        self.done = False
+
+
+class _PriorityStats:
+    __slots__ = ("requests", "coalesced", "delay")
+
+    def __init__(self):
+        self.requests = 0
+        self.coalesced = 0
+        self.delay = LatencyHistogram()
+
+
+class _Priority:
+    __slots__ = ("local", "priority", "previous")
+
+    def __init__(self, local, priority):
+        self.local = local
+        self.priority = priority
+
+    def __enter__(self):
+        self.previous = getattr(self.local, "priority", None)
+        self.local.priority = self.priority
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.local.priority = self.previous
+        return False
+
+
+class SchedulingTransport(Transport):
+    """
+    Send the SPI messages of all threads through another transport, the most urgent first.
+
+    Use :py:meth:`~gopigo3.GoPiGo3.enable_scheduler` rather than creating one directly.
+    """
+
+    def __init__(self, transport, priorities=None):
+        """
+        :param gopigo3.Transport transport: The transport that actually talks to the GoPiGo3.
+        :param dict priorities: SPI message type -> priority, overriding the defaults. Message types without one are ``PRIORITY_CONTROL``.
+        """
+        self.transport = transport
+        from .gopigo3 import GoPiGo3
+        T = GoPiGo3.SPI_MESSAGE_TYPE
+        self._motor_messages = frozenset((T.SET_MOTOR_PWM, T.SET_MOTOR_POSITION, T.SET_MOTOR_POSITION_KP,
+                                          T.SET_MOTOR_POSITION_KD, T.SET_MOTOR_DPS, T.SET_MOTOR_LIMITS,
+                                          T.OFFSET_MOTOR_ENCODER))
+        telemetry = (T.GET_VOLTAGE_5V, T.GET_VOLTAGE_VCC, T.GET_GROVE_VALUE_1, T.GET_GROVE_VALUE_2,
+                     T.GET_GROVE_STATE_1_1, T.GET_GROVE_STATE_1_2, T.GET_GROVE_STATE_2_1, T.GET_GROVE_STATE_2_2,
+                     T.GET_GROVE_VOLTAGE_1_1, T.GET_GROVE_VOLTAGE_1_2, T.GET_GROVE_VOLTAGE_2_1, T.GET_GROVE_VOLTAGE_2_2,
+                     T.GET_GROVE_ANALOG_1_1, T.GET_GROVE_ANALOG_1_2, T.GET_GROVE_ANALOG_2_1, T.GET_GROVE_ANALOG_2_2)
+        diagnostics = (T.GET_MANUFACTURER, T.GET_NAME, T.GET_HARDWARE_VERSION, T.GET_FIRMWARE_VERSION, T.GET_ID)
+        self.priorities = {message_type: PRIORITY_SAFETY for message_type in self._motor_messages}
+        self.priorities.update((message_type, PRIORITY_TELEMETRY) for message_type in telemetry)
+        self.priorities.update((message_type, PRIORITY_DIAGNOSTICS) for message_type in diagnostics)
+        if priorities:
+            self.priorities.update(priorities)
+        # reads which don't change the state of the GoPiGo3, so that two queued at once can share a transfer
+        self._coalescable = frozenset((T.GET_MOTOR_STATUS_LEFT, T.GET_MOTOR_STATUS_RIGHT,
+                                       T.GET_MOTOR_ENCODER_LEFT, T.GET_MOTOR_ENCODER_RIGHT) + telemetry + diagnostics)
+
+        self._condition = threading.Condition()
+        self._queue = []  # (priority, sequence, _Request)
+        self._pending = {}  # bytes sent -> queued coalescable _Request
+        self._sequence = 0
+        self._busy = False
+        self._local = threading.local()
+        self.stats = {priority: _PriorityStats() for priority in PRIORITY_NAMES}
+        self.max_queue_depth = 0
+
+    def priority(self, priority):
+        """
+        :returns: A context manager giving the messages of the calling thread ``priority``, except for motor commands.
+        """
+        return _Priority(self._local, priority)
+
+    def _priority_of(self, messages):
+        override = getattr(self._local, "priority", None)
+        best = None
+        for data_out in messages:
+            message_type = data_out[1] if len(data_out) > 1 else 0
+            if message_type in self._motor_messages:
+                return PRIORITY_SAFETY
+            priority = self.priorities.get(message_type, PRIORITY_CONTROL)
+            if best is None or priority < best:
+                best = priority
+        return override if override is not None else best
+
+    def _schedule(self, messages, buffer=None):
+        priority = self._priority_of(messages)
+        key = None
+        if len(messages) == 1 and len(messages[0]) > 1 and messages[0][1] in self._coalescable:
+            key = bytes(messages[0])
+
+        with self._condition:
+            stats = self.stats.setdefault(priority, _PriorityStats())
+            stats.requests += 1
+            leader = self._pending.get(key) if key is not None else None
+            if leader is not None:
+                stats.coalesced += 1
+                if priority < leader.priority:
+                    self._promote(leader, priority)
+                while not leader.done:
+                    self._condition.wait()
+                return leader, True
+
+            request = _Request(priority, messages, buffer, key)
+            self._sequence += 1
+            heapq.heappush(self._queue, (priority, self._sequence, request))
+            if key is not None:
+                self._pending[key] = request
+            if len(self._queue) > self.max_queue_depth:
+                self.max_queue_depth = len(self._queue)
+
+            while not request.done:
+                if self._busy:
+                    self._condition.wait()
+                    continue
+                self._busy = True
+                try:
+                    self._dispatch(request)
+                finally:
+                    self._busy = False
+                    self._condition.notify_all()
+            return request, False
+
+    def _promote(self, request, priority):
+        for index, entry in enumerate(self._queue):
+            if entry[2] is request:
+                self._queue[index] = (priority,) + entry[1:]
+                heapq.heapify(self._queue)
+                break
+        request.priority = priority
+
+    def _dispatch(self, own):
+        """
+        Send queued requests, the most urgent first, until ``own`` is done. Called holding the condition.
+        """
+        while not own.done:
+            request = heapq.heappop(self._queue)[2]
+            if request.key is not None and self._pending.get(request.key) is request:
+                del self._pending[request.key]
+            self.stats[request.priority].delay.record(time.perf_counter() - request.enqueued)
+
+            self._condition.release()
+            try:
+                if request.buffer is not None:
+                    self.transport.transfer_buffer(request.buffer)
+                    # the buffer belongs to the thread of the request, which may reuse it before the coalesced ones copy the reply
+                    request.replies = [bytes(request.buffer.rx) if request.key is not None else request.buffer.rx]
+                else:
+                    request.replies = self.transport.transfer_many(request.messages)
+            except Exception as e:
+                request.error = e
+            finally:
+                self._condition.acquire()
+            request.done = True
+            self._condition.notify_all()
+
+    def transfer(self, data_out):
+        request, coalesced = self._schedule([data_out])
+        if request.error is not None:
+            raise request.error
+        return list(request.replies[0])
+
+    def transfer_many(self, messages):
+        request, coalesced = self._schedule(list(messages))
+        if request.error is not None:
+            raise request.error
+        return request.replies
+
+    def transfer_buffer(self, buffer):
+        request, coalesced = self._schedule([buffer.tx], buffer)
+        if request.error is not None:
+            raise request.error
+        if coalesced or request.buffer is not buffer:
+            reply = request.replies[0]
+            buffer.rx[:len(reply)] = reply
+
+    def get_stats(self):
+        """
+        :returns: priority name -> ``{"requests": count, "coalesced": count, "delay": summary}``, where ``delay``
+                  is the :py:meth:`~gopigo3.LatencyHistogram.summary` of the time requests spent queued. Plus
+                  ``"max_queue_depth"``.
+        :rtype: dict
+        """
+        stats = {PRIORITY_NAMES.get(priority, str(priority)): {
+                     "requests": entry.requests,
+                     "coalesced": entry.coalesced,
+                     "delay": entry.delay.summary(),
+                 } for priority, entry in sorted(self.stats.items())}
+        stats["max_queue_depth"] = self.max_queue_depth
+        return stats
+
+    def close(self):
+        self.transport.close()
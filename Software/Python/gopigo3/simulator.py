@@ -0,0 +1,548 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# In-process simulation of the GoPiGo3 MCU
+#
+# GoPiGo3Simulator answers every SPI_MESSAGE_TYPE the way the firmware does, so
+# the gopigo3/easygopigo3/easysensors stack can run (and be profiled) on a
+# machine without a GoPiGo3 attached:
+#
+#     from gopigo3 import GoPiGo3, GoPiGo3Simulator
+#     gpg = GoPiGo3(transport=GoPiGo3Simulator())
+#
+# The motor model is deliberately simple: a speed controller with limited
+# acceleration, driven either by a PWM power, a speed target or a position
+# target. It is good enough for code that waits for targets to be reached, it
+# is not meant to predict how a real robot behaves.
+
+import math
+import threading
+import time
+
+from .gopigo3 import GoPiGo3
+from .transport import Transport
+
+
+def _signed(value, bits):
+    if value & (1 << (bits - 1)):
+        value -= 1 << bits
+    return value
+
+
+def _unpack(data, start, length):
+    value = 0
+    for i in range(start, start + length):
+        value = (value << 8) | data[i]
+    return value
+
+
+def _pack(reply, start, length, value):
+    for i in range(length):
+        reply[start + length - 1 - i] = (value >> (8 * i)) & 0xFF
+
+
+class _SimulatedMotor:
+    """
+    State of one simulated motor. Positions and speeds are in encoder ticks.
+    """
+    FLOAT = 0
+    PWM = 1
+    POSITION = 2
+    DPS = 3
+
+    def __init__(self):
+        self.mode = self.FLOAT
+        self.power = 0           # PWM power in percent, when in PWM mode
+        self.target = 0          # ticks in POSITION mode, ticks/s in DPS mode
+        self.limit_power = 0     # 0 means no limit
+        self.limit_dps = 0       # ticks/s, 0 means no limit
+        self.kp = 25
+        self.kd = 70
+        self.position = 0.0      # ticks
+        self.offset = 0          # ticks subtracted from the position when reporting the encoder
+        self.speed = 0.0         # ticks/s
+
+    def step(self, dt, max_speed, acceleration, position_gain, disabled):
+        if disabled or self.mode == self.FLOAT:
+            # coast to a stop
+            desired = 0.0
+        elif self.mode == self.PWM:
+            desired = max_speed * self.power / 100.0
+        elif self.mode == self.DPS:
+            desired = float(self.target)
+        else:
+            desired = (self.target - self.position) * position_gain
+
+        limit = max_speed
+        if self.limit_power:
+            limit = min(limit, max_speed * self.limit_power / 100.0)
+        if self.limit_dps and not (self.mode == self.PWM or disabled or self.mode == self.FLOAT):
+            limit = min(limit, self.limit_dps)
+        desired = max(-limit, min(limit, desired))
+
+        change = acceleration * dt
+        if desired > self.speed + change:
+            self.speed += change
+        elif desired < self.speed - change:
+            self.speed -= change
+        else:
+            self.speed = desired
+
+        previous_error = self.target - self.position
+        self.position += self.speed * dt
+        if self.mode == self.POSITION and not disabled:
+            error = self.target - self.position
+            if error == 0 or (error > 0) != (previous_error > 0) or abs(error) < 0.5:
+                # the target was reached (or crossed) during this step
+                self.position = float(self.target)
+                self.speed = 0.0
+
+    def reported_power(self, max_speed, disabled):
+        if disabled or self.mode == self.FLOAT:
+            return GoPiGo3.MOTOR_FLOAT
+        if self.mode == self.PWM:
+            return self.power
+        return int(max(-100, min(100, self.speed * 100.0 / max_speed)))
+
+
+class _SimulatedGrovePort:
+    """
+    State of one simulated grove port (two signal pins).
+    """
+
+    def __init__(self):
+        self.type = GoPiGo3.GROVE_TYPE.CUSTOM
+        self.us_distance = 500               # mm
+        self.remote_code = None              # last unread IR code
+        self.ev3_remote = [0, 0, 0, 0]
+        self.i2c_devices = {}                # 7-bit address -> callable
+        self.i2c_done_at = 0.0               # when the running I2C transaction completes
+        self.i2c_state = GoPiGo3.GROVE_STATE.NO_DATA
+        self.i2c_data = b""
+
+
+class GoPiGo3Simulator(Transport):
+    """
+    A pure-Python stand-in for the GoPiGo3 MCU that can be handed to :py:class:`~gopigo3.GoPiGo3` as its ``transport``.
+
+    Besides answering SPI messages, the simulator exposes the simulated world so that tests and benchmarks
+    can look at the outputs (``leds``, ``servos``, motor positions) and drive the inputs (battery voltage,
+    analog/digital pin values, ultrasonic distance, IR codes and I2C devices).
+    """
+    MANUFACTURER = "Modular Robotics"
+    BOARD = "GoPiGo3"
+    HARDWARE_VERSION = 3002000  # 3.2.0
+    FIRMWARE_VERSION = 1000000  # 1.0.0
+
+    MAX_DPS = 1000              # top speed of an unloaded motor, in degrees per second
+    ACCELERATION = 8000         # degrees per second squared
+    POSITION_GAIN = 10.0        # 1/s, how hard position control chases its target
+    LOW_VOLTAGE_LIMIT = 7.0     # below this, the motors get disabled like on the real board
+    MAX_STEP = 0.005            # seconds of simulated time per motor integration step
+
+    def __init__(self, addr=8, serial_number="0123456789ABCDEF0123456789ABCDEF",
+                 ticks_per_degree=GoPiGo3.MOTOR_TICKS_PER_DEGREE, clock=None):
+        """
+        :param int addr = 8: The SPI address the simulated board answers to. Messages sent to any other address go unanswered.
+        :param str serial_number: 32 character HEX string returned by :py:meth:`~gopigo3.GoPiGo3.get_id`.
+        :param float ticks_per_degree: Encoder ticks per wheel degree, which has to match the ``MOTOR_TICKS_PER_DEGREE`` of the GoPiGo3 object.
+        :param clock: Function returning the current time in seconds. Defaults to ``time.monotonic``. Tests can pass their own to control simulated time.
+        """
+        self.address = addr
+        self.serial_number = bytes.fromhex(serial_number)
+        self.ticks_per_degree = ticks_per_degree
+        self.clock = clock if clock is not None else time.monotonic
+
+        self.voltage_battery = 9.6
+        self.voltage_5v = 5.0
+
+        self.leds = {}          # LED bit -> (red, green, blue)
+        self.servos = {}        # servo bit -> pulse width in us
+        self.motors = [_SimulatedMotor(), _SimulatedMotor()]
+        self.grove = [_SimulatedGrovePort(), _SimulatedGrovePort()]
+
+        # per grove pin (GROVE_1_1, GROVE_1_2, GROVE_2_1, GROVE_2_2)
+        self.pin_mode = [GoPiGo3.GROVE_INPUT_DIGITAL] * 4
+        self.pin_output = [GoPiGo3.GROVE_LOW] * 4
+        self.pin_pwm_duty = [0.0] * 4
+        self.pin_input_digital = [GoPiGo3.GROVE_LOW] * 4
+        self.pin_input_analog = [0] * 4
+        self.pwm_frequency = [24000, 24000]
+
+        self.transfer_count = 0
+        self._lock = threading.Lock()
+        self._last_update = self.clock()
+
+        T = GoPiGo3.SPI_MESSAGE_TYPE
+        self._handlers = {
+            T.GET_MANUFACTURER: self._get_manufacturer,
+            T.GET_NAME: self._get_name,
+            T.GET_HARDWARE_VERSION: self._get_hardware_version,
+            T.GET_FIRMWARE_VERSION: self._get_firmware_version,
+            T.GET_ID: self._get_id,
+            T.SET_LED: self._set_led,
+            T.GET_VOLTAGE_5V: self._get_voltage_5v,
+            T.GET_VOLTAGE_VCC: self._get_voltage_vcc,
+            T.SET_SERVO: self._set_servo,
+            T.SET_MOTOR_PWM: self._set_motor_pwm,
+            T.SET_MOTOR_POSITION: self._set_motor_position,
+            T.SET_MOTOR_POSITION_KP: self._set_motor_position_kp,
+            T.SET_MOTOR_POSITION_KD: self._set_motor_position_kd,
+            T.SET_MOTOR_DPS: self._set_motor_dps,
+            T.SET_MOTOR_LIMITS: self._set_motor_limits,
+            T.OFFSET_MOTOR_ENCODER: self._offset_motor_encoder,
+            T.GET_MOTOR_ENCODER_LEFT: self._get_motor_encoder,
+            T.GET_MOTOR_ENCODER_RIGHT: self._get_motor_encoder,
+            T.GET_MOTOR_STATUS_LEFT: self._get_motor_status,
+            T.GET_MOTOR_STATUS_RIGHT: self._get_motor_status,
+            T.SET_GROVE_TYPE: self._set_grove_type,
+            T.SET_GROVE_MODE: self._set_grove_mode,
+            T.SET_GROVE_STATE: self._set_grove_state,
+            T.SET_GROVE_PWM_DUTY: self._set_grove_pwm_duty,
+            T.SET_GROVE_PWM_FREQUENCY: self._set_grove_pwm_frequency,
+            T.GET_GROVE_VALUE_1: self._get_grove_value,
+            T.GET_GROVE_VALUE_2: self._get_grove_value,
+            T.START_GROVE_I2C_1: self._start_grove_i2c,
+            T.START_GROVE_I2C_2: self._start_grove_i2c,
+        }
+        for message_type in range(T.GET_GROVE_STATE_1_1, T.GET_GROVE_STATE_2_2 + 1):
+            self._handlers[message_type] = self._get_grove_state
+        for message_type in range(T.GET_GROVE_VOLTAGE_1_1, T.GET_GROVE_VOLTAGE_2_2 + 1):
+            self._handlers[message_type] = self._get_grove_voltage
+        for message_type in range(T.GET_GROVE_ANALOG_1_1, T.GET_GROVE_ANALOG_2_2 + 1):
+            self._handlers[message_type] = self._get_grove_analog
+
+    ###########################################################################
+    # Transport interface
+
+    def transfer(self, data_out):
+        data = [b & 0xFF for b in data_out]
+        reply = [0] * len(data)
+        with self._lock:
+            self.transfer_count += 1
+            self._update()
+            if len(data) < 2 or data[0] != self.address:
+                return reply
+            handler = self._handlers.get(data[1])
+            if handler is not None:
+                handler(data, reply)
+        return reply
+
+    ###########################################################################
+    # Simulated world
+
+    def encoder_degrees(self, port):
+        """
+        Return the encoder of a motor (``GoPiGo3.MOTOR_LEFT`` or ``GoPiGo3.MOTOR_RIGHT``) in degrees, as the MCU would report it.
+        """
+        with self._lock:
+            self._update()
+            motor = self.motors[0 if port == GoPiGo3.MOTOR_LEFT else 1]
+            return (motor.position - motor.offset) / self.ticks_per_degree
+
+    def set_grove_analog(self, pin, value):
+        """
+        Set the 12-bit raw ADC reading of one or more grove pins.
+        """
+        for i in self._pin_indexes(pin):
+            self.pin_input_analog[i] = max(0, min(4095, int(value)))
+
+    def set_grove_digital(self, pin, state):
+        """
+        Set the digital input state of one or more grove pins.
+        """
+        for i in self._pin_indexes(pin):
+            self.pin_input_digital[i] = 1 if state else 0
+
+    def set_us_distance(self, port, distance_mm):
+        """
+        Set the distance in mm reported by an ultrasonic sensor on a grove port.
+        0 simulates a sensor that doesn't respond and 1 an object out of range.
+        """
+        for i in self._port_indexes(port):
+            self.grove[i].us_distance = int(distance_mm)
+
+    def press_remote_key(self, port, code):
+        """
+        Queue an IR remote code on a grove port configured as ``IR_DI_REMOTE``.
+        """
+        for i in self._port_indexes(port):
+            self.grove[i].remote_code = int(code)
+
+    def attach_i2c_device(self, port, address, device):
+        """
+        Connect a simulated I2C device to a grove port.
+
+        :param int port: ``GoPiGo3.GROVE_1`` or ``GoPiGo3.GROVE_2``.
+        :param int address: The 7-bit I2C address of the device.
+        :param device: Called as ``device(data_written, bytes_to_read)`` for every transaction. It has to return
+            ``bytes_to_read`` bytes, or ``None`` to NACK the transaction.
+        """
+        for i in self._port_indexes(port):
+            self.grove[i].i2c_devices[address & 0x7F] = device
+
+    def detach_i2c_device(self, port, address):
+        for i in self._port_indexes(port):
+            self.grove[i].i2c_devices.pop(address & 0x7F, None)
+
+    ###########################################################################
+    # Internals
+
+    @staticmethod
+    def _pin_indexes(pin):
+        return [i for i in range(4) if pin & (1 << i)]
+
+    @staticmethod
+    def _port_indexes(port):
+        return [p for p in range(2) if ((port >> (p * 2)) & 3) == 3]
+
+    @staticmethod
+    def _motor_indexes(port):
+        return [i for i in range(2) if port & (1 << i)]
+
+    def _motors_disabled(self):
+        return self.voltage_battery < self.LOW_VOLTAGE_LIMIT
+
+    def _update(self):
+        now = self.clock()
+        dt = now - self._last_update
+        self._last_update = now
+        if dt <= 0:
+            return
+
+        max_speed = self.MAX_DPS * self.ticks_per_degree
+        acceleration = self.ACCELERATION * self.ticks_per_degree
+        disabled = self._motors_disabled()
+        steps = max(1, int(math.ceil(dt / self.MAX_STEP)))
+        step = dt / steps
+        for motor in self.motors:
+            if motor.speed == 0 and (motor.mode == motor.FLOAT or disabled):
+                continue
+            for _ in range(steps):
+                motor.step(step, max_speed, acceleration, self.POSITION_GAIN, disabled)
+
+    def _ok(self, reply):
+        reply[3] = 0xA5
+
+    def _string(self, reply, text):
+        self._ok(reply)
+        encoded = text.encode("ascii")[:20]
+        for i, c in enumerate(encoded):
+            if 4 + i < len(reply):
+                reply[4 + i] = c
+
+    def _get_manufacturer(self, data, reply):
+        self._string(reply, self.MANUFACTURER)
+
+    def _get_name(self, data, reply):
+        self._string(reply, self.BOARD)
+
+    def _get_hardware_version(self, data, reply):
+        self._ok(reply)
+        _pack(reply, 4, 4, self.HARDWARE_VERSION)
+
+    def _get_firmware_version(self, data, reply):
+        self._ok(reply)
+        _pack(reply, 4, 4, self.FIRMWARE_VERSION)
+
+    def _get_id(self, data, reply):
+        self._ok(reply)
+        for i, c in enumerate(self.serial_number[:16]):
+            reply[4 + i] = c
+
+    def _set_led(self, data, reply):
+        for bit in range(8):
+            if data[2] & (1 << bit):
+                self.leds[1 << bit] = (data[3], data[4], data[5])
+
+    def _get_voltage_5v(self, data, reply):
+        self._ok(reply)
+        _pack(reply, 4, 2, int(self.voltage_5v * 1000))
+
+    def _get_voltage_vcc(self, data, reply):
+        self._ok(reply)
+        _pack(reply, 4, 2, int(self.voltage_battery * 1000))
+
+    def _set_servo(self, data, reply):
+        us = _unpack(data, 3, 2)
+        for bit in (GoPiGo3.SERVO_1, GoPiGo3.SERVO_2):
+            if data[2] & bit:
+                self.servos[bit] = us
+
+    def _set_motor_pwm(self, data, reply):
+        power = _signed(data[3], 8)
+        for i in self._motor_indexes(data[2]):
+            motor = self.motors[i]
+            if power == GoPiGo3.MOTOR_FLOAT:
+                motor.mode = motor.FLOAT
+            else:
+                motor.mode = motor.PWM
+                motor.power = max(-100, min(100, power))
+
+    def _set_motor_position(self, data, reply):
+        position = _signed(_unpack(data, 3, 4), 32)
+        for i in self._motor_indexes(data[2]):
+            motor = self.motors[i]
+            motor.mode = motor.POSITION
+            motor.target = position + motor.offset
+
+    def _set_motor_position_kp(self, data, reply):
+        for i in self._motor_indexes(data[2]):
+            self.motors[i].kp = data[3]
+
+    def _set_motor_position_kd(self, data, reply):
+        for i in self._motor_indexes(data[2]):
+            self.motors[i].kd = data[3]
+
+    def _set_motor_dps(self, data, reply):
+        dps = _signed(_unpack(data, 3, 2), 16)
+        for i in self._motor_indexes(data[2]):
+            motor = self.motors[i]
+            motor.mode = motor.DPS
+            motor.target = dps
+
+    def _set_motor_limits(self, data, reply):
+        for i in self._motor_indexes(data[2]):
+            self.motors[i].limit_power = data[3]
+            self.motors[i].limit_dps = _unpack(data, 4, 2)
+
+    def _offset_motor_encoder(self, data, reply):
+        offset = _signed(_unpack(data, 3, 4), 32)
+        for i in self._motor_indexes(data[2]):
+            self.motors[i].offset += offset
+
+    def _motor_for_message(self, message_type):
+        T = GoPiGo3.SPI_MESSAGE_TYPE
+        if message_type in (T.GET_MOTOR_ENCODER_LEFT, T.GET_MOTOR_STATUS_LEFT):
+            return self.motors[0]
+        return self.motors[1]
+
+    def _get_motor_encoder(self, data, reply):
+        motor = self._motor_for_message(data[1])
+        self._ok(reply)
+        _pack(reply, 4, 4, int(round(motor.position - motor.offset)))
+
+    def _get_motor_status(self, data, reply):
+        motor = self._motor_for_message(data[1])
+        disabled = self._motors_disabled()
+        self._ok(reply)
+        reply[4] = 0x01 if disabled else 0x00
+        reply[5] = motor.reported_power(self.MAX_DPS * self.ticks_per_degree, disabled) & 0xFF
+        _pack(reply, 6, 4, int(round(motor.position - motor.offset)))
+        _pack(reply, 10, 2, int(motor.speed))
+
+    def _set_grove_type(self, data, reply):
+        for i in self._port_indexes(data[2]):
+            port = self.grove[i]
+            port.type = data[3]
+            port.i2c_state = GoPiGo3.GROVE_STATE.NO_DATA
+            port.i2c_data = b""
+
+    def _set_grove_mode(self, data, reply):
+        for i in self._pin_indexes(data[2]):
+            self.pin_mode[i] = data[3]
+
+    def _set_grove_state(self, data, reply):
+        for i in self._pin_indexes(data[2]):
+            self.pin_output[i] = 1 if data[3] else 0
+
+    def _set_grove_pwm_duty(self, data, reply):
+        duty = _unpack(data, 3, 2) / 10.0
+        for i in self._pin_indexes(data[2]):
+            self.pin_pwm_duty[i] = duty
+
+    def _set_grove_pwm_frequency(self, data, reply):
+        for i in self._port_indexes(data[2]):
+            self.pwm_frequency[i] = _unpack(data, 3, 2)
+
+    def _get_grove_value(self, data, reply):
+        port_index = data[1] - GoPiGo3.SPI_MESSAGE_TYPE.GET_GROVE_VALUE_1
+        port = self.grove[port_index]
+        T = GoPiGo3.GROVE_TYPE
+        S = GoPiGo3.GROVE_STATE
+        self._ok(reply)
+        if port.type == T.CUSTOM:
+            reply[4] = 0
+            return
+
+        reply[4] = port.type
+        if port.type == T.IR_DI_REMOTE:
+            if port.remote_code is None:
+                reply[5] = S.NO_DATA
+            else:
+                reply[5] = S.VALID_DATA
+                reply[6] = port.remote_code
+                port.remote_code = None
+        elif port.type == T.IR_EV3_REMOTE:
+            reply[5] = S.VALID_DATA
+            for i, value in enumerate(port.ev3_remote):
+                if 6 + i < len(reply):
+                    reply[6 + i] = value & 0xFF
+        elif port.type == T.US:
+            reply[5] = S.VALID_DATA
+            _pack(reply, 6, 2, port.us_distance)
+        elif port.type == T.I2C:
+            if self.clock() < port.i2c_done_at:
+                reply[5] = S.NO_DATA
+                return
+            reply[5] = port.i2c_state
+            if port.i2c_state == S.VALID_DATA:
+                for i, value in enumerate(port.i2c_data):
+                    if 6 + i < len(reply):
+                        reply[6 + i] = value
+
+    def _get_grove_state(self, data, reply):
+        i = data[1] - GoPiGo3.SPI_MESSAGE_TYPE.GET_GROVE_STATE_1_1
+        self._ok(reply)
+        reply[4] = GoPiGo3.GROVE_STATE.VALID_DATA
+        if self.pin_mode[i] == GoPiGo3.GROVE_OUTPUT_DIGITAL:
+            reply[5] = self.pin_output[i]
+        else:
+            reply[5] = self.pin_input_digital[i]
+
+    def _get_grove_voltage(self, data, reply):
+        i = data[1] - GoPiGo3.SPI_MESSAGE_TYPE.GET_GROVE_VOLTAGE_1_1
+        self._ok(reply)
+        reply[4] = GoPiGo3.GROVE_STATE.VALID_DATA
+        _pack(reply, 5, 2, int(self.pin_input_analog[i] * 5000 / 4095))
+
+    def _get_grove_analog(self, data, reply):
+        i = data[1] - GoPiGo3.SPI_MESSAGE_TYPE.GET_GROVE_ANALOG_1_1
+        self._ok(reply)
+        reply[4] = GoPiGo3.GROVE_STATE.VALID_DATA
+        _pack(reply, 5, 2, self.pin_input_analog[i])
+
+    def _start_grove_i2c(self, data, reply):
+        port = self.grove[data[1] - GoPiGo3.SPI_MESSAGE_TYPE.START_GROVE_I2C_1]
+        self._ok(reply)
+        now = self.clock()
+        if port.type != GoPiGo3.GROVE_TYPE.I2C or now < port.i2c_done_at:
+            # not configured for I2C, or still busy with the previous transaction
+            reply[4] = 1
+            return
+
+        address = data[2] >> 1
+        in_bytes = data[3]
+        out_bytes = data[4]
+        written = bytes(data[5:5 + out_bytes])
+
+        duration = 0
+        if out_bytes:
+            duration += 1 + out_bytes
+        if in_bytes:
+            duration += 1 + in_bytes
+        port.i2c_done_at = now + duration * 0.000115
+
+        device = port.i2c_devices.get(address)
+        result = device(written, in_bytes) if device is not None else None
+        if result is None:
+            port.i2c_state = GoPiGo3.GROVE_STATE.I2C_ERROR
+            port.i2c_data = b""
+        else:
+            port.i2c_state = GoPiGo3.GROVE_STATE.VALID_DATA
+            port.i2c_data = bytes(result)[:in_bytes]
+        reply[4] = 0
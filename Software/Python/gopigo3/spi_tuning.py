@@ -0,0 +1,252 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# SPI clock tuning for the GoPiGo3
+#
+# Sweeps the SPI clock, runs a few thousand GET_ID and GET_MOTOR_STATUS
+# transactions at every rate and keeps the rate one step below the fastest
+# one the link handles without errors: a clock that passed a single sweep
+# can still fail on a warmer day. The result is stored in ~/.gpg3_spi.json,
+# next to ~/.gpg3_config.json. The GoPiGo3 constructor only uses it when
+# asked to, with use_tuned_spi=True or GOPIGO3_TUNED_SPI=1 in the environment.
+#
+#     sudo gopigo3-tune-spi              # tune and save
+#     gopigo3-tune-spi --no-save         # benchmark only
+
+import time
+
+# Tried from the slowest to the fastest. 500 kHz is what the GoPiGo3 has always used.
+DEFAULT_SPEEDS = (500000, 1000000, 2000000, 4000000, 6000000, 8000000)
+
+SPI_CONFIG_FILE_NAME = ".gpg3_spi.json"
+
+
+def spi_config_file_path(config_file_path=None):
+    """
+    :param str config_file_path: Path of the robot constants file. If None, uses ~/.gpg3_config.json.
+    :returns: Path of the file holding the tuned SPI clocks, in the same directory as ``config_file_path``.
+    :rtype: str
+    """
+    import os
+    if config_file_path is None:
+        return os.path.join(os.path.expanduser('~'), SPI_CONFIG_FILE_NAME)
+    return os.path.join(os.path.dirname(os.path.abspath(config_file_path)), SPI_CONFIG_FILE_NAME)
+
+
+def _device_key(bus, device):
+    return f"spidev{bus}.{device}"
+
+
+def load_spi_speed(bus, device, config_file_path=None):
+    """
+    :param int bus: SPI bus.
+    :param int device: SPI chip select.
+    :param str config_file_path: Path of the robot constants file. If None, uses ~/.gpg3_config.json.
+    :returns: The tuned SPI clock of the device in Hz, or ``None`` if it hasn't been tuned or the file can't be read.
+    """
+    import json
+    try:
+        with open(spi_config_file_path(config_file_path), 'r') as json_file:
+            speed_hz = json.load(json_file)[_device_key(bus, device)]["speed_hz"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(speed_hz, int) or speed_hz <= 0:
+        return None
+    return speed_hz
+
+
+def save_spi_speed(bus, device, result, config_file_path=None):
+    """
+    Store the tuned SPI clock of a device. The entries of the other devices are kept.
+
+    :param int bus: SPI bus.
+    :param int device: SPI chip select.
+    :param LinkStats result: Measurements of the chosen clock.
+    :param str config_file_path: Path of the robot constants file. If None, uses ~/.gpg3_config.json.
+    """
+    import json
+    path = spi_config_file_path(config_file_path)
+    try:
+        with open(path, 'r') as json_file:
+            data = json.load(json_file)
+        if not isinstance(data, dict):
+            data = {}
+    except (OSError, ValueError):
+        data = {}
+
+    data[_device_key(bus, device)] = {
+        "speed_hz": result.speed_hz,
+        "error_rate": result.error_rate,
+        "mean_latency_us": round(result.mean_latency * 1e6, 1),
+        "tuned": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(path, 'w') as json_file:
+        json.dump(data, json_file, indent=4)
+
+
+class LinkStats:
+    """
+    What :py:func:`measure_link` found at one SPI clock.
+
+    :var int speed_hz: The SPI clock.
+    :var int transactions: How many transactions were sent.
+    :var int errors: Replies without the 0xA5 marker, or with a serial number other than the reference one.
+    :var float mean_latency: Mean duration of a transaction, in seconds.
+    :var float max_latency: Longest transaction, in seconds.
+    """
+    __slots__ = ("speed_hz", "transactions", "errors", "mean_latency", "max_latency")
+
+    def __init__(self, speed_hz, transactions, errors, mean_latency, max_latency):
+        self.speed_hz = speed_hz
+        self.transactions = transactions
+        self.errors = errors
+        self.mean_latency = mean_latency
+        self.max_latency = max_latency
+
+    @property
+    def error_rate(self):
+        return self.errors / self.transactions if self.transactions else 0.0
+
+    @property
+    def reliable(self):
+        return self.transactions > 0 and self.errors == 0
+
+    def __repr__(self):
+        return (f"LinkStats(speed_hz={self.speed_hz}, transactions={self.transactions}, errors={self.errors}, "
+                f"mean_latency={self.mean_latency * 1e6:.1f}us, max_latency={self.max_latency * 1e6:.1f}us)")
+
+
+def measure_link(gpg, speed_hz, transactions=2000, reference_id=None):
+    """
+    Run ``transactions`` SPI transactions at ``speed_hz``, alternating GET_ID and GET_MOTOR_STATUS_LEFT.
+
+    :param gopigo3.GoPiGo3 gpg: The GoPiGo3 to talk to. Its transport must have a ``speed_hz`` attribute, like :py:class:`~gopigo3.SpiDevTransport`.
+    :param int speed_hz: The SPI clock to measure.
+    :param int transactions = 2000: How many transactions to send.
+    :param bytes reference_id: The 16 bytes of the serial number, read at a safe clock. GET_ID replies that differ count as errors.
+    :returns: The measurements.
+    :rtype: LinkStats
+
+    The clock of the transport is restored before returning.
+    """
+    transport = gpg.transport
+    previous_speed = transport.speed_hz
+    id_buffer = gpg._spi_buffer(gpg.SPI_MESSAGE_TYPE.GET_ID, 20)
+    status_buffer = gpg._spi_buffer(gpg.SPI_MESSAGE_TYPE.GET_MOTOR_STATUS_LEFT, 12)
+    errors = 0
+    total = 0.0
+    longest = 0.0
+    transport.speed_hz = speed_hz
+    try:
+        for i in range(transactions):
+            buffer = id_buffer if i % 2 == 0 else status_buffer
+            start = time.perf_counter()
+            try:
+                reply = gpg.spi_transfer_buffer(buffer)
+            except OSError:
+                errors += 1
+                continue
+            elapsed = time.perf_counter() - start
+            total += elapsed
+            if elapsed > longest:
+                longest = elapsed
+            if reply[3] != 0xA5 or (buffer is id_buffer and reference_id is not None and reply[4:20] != reference_id):
+                errors += 1
+    finally:
+        transport.speed_hz = previous_speed
+    return LinkStats(speed_hz, transactions, errors, total / transactions if transactions else 0.0, longest)
+
+
+def tune_spi_speed(gpg, speeds=DEFAULT_SPEEDS, transactions=2000, save=True, config_file_path=None,
+                   bus=None, device=None, log=None, margin=1):
+    """
+    Find a SPI clock the link to the GoPiGo3 handles without errors, with a margin.
+
+    The clocks are tried from the slowest to the fastest and the sweep stops at the first one
+    with errors. The chosen clock is ``margin`` clocks below the fastest reliable one, but not
+    below the slowest clock tried.
+
+    :param gopigo3.GoPiGo3 gpg: The GoPiGo3 to tune. Its transport must have a ``speed_hz`` attribute, like :py:class:`~gopigo3.SpiDevTransport`.
+    :param speeds: The SPI clocks to try, in Hz.
+    :param int transactions = 2000: Transactions sent at every clock.
+    :param boolean save = True: Store the chosen clock with :py:func:`save_spi_speed`. ``bus`` and ``device`` are required then.
+    :param str config_file_path: Path of the robot constants file. If None, uses ~/.gpg3_config.json.
+    :param int bus: SPI bus of ``gpg``, for saving.
+    :param int device: SPI chip select of ``gpg``, for saving.
+    :param log: Optional function called with the :py:class:`LinkStats` of every clock as soon as it's measured.
+    :param int margin = 1: How many clocks to step down from the fastest reliable one.
+    :returns: ``(best, results)``: the :py:class:`LinkStats` of the chosen clock, or ``None`` if no clock was reliable, and the list of all measurements.
+    :raises ValueError: If the transport of ``gpg`` has no adjustable clock, or ``margin`` is negative.
+
+    The clock of the transport is set to the chosen one.
+    """
+    if not hasattr(gpg.transport, "speed_hz"):
+        raise ValueError("The transport of this GoPiGo3 has no adjustable SPI clock")
+    if save and (bus is None or device is None):
+        raise ValueError("bus and device are required to save the tuned SPI clock")
+    if margin < 0:
+        raise ValueError("margin can't be negative")
+
+    reference_id = bytes.fromhex(gpg.get_id())
+
+    results = []
+    reliable = []
+    for speed_hz in sorted(speeds):
+        result = measure_link(gpg, speed_hz, transactions, reference_id)
+        results.append(result)
+        if log is not None:
+            log(result)
+        if not result.reliable:
+            break
+        reliable.append(result)
+
+    best = None
+    if reliable:
+        best = reliable[max(len(reliable) - 1 - margin, 0)]
+        gpg.transport.speed_hz = best.speed_hz
+        if save:
+            save_spi_speed(bus, device, best, config_file_path)
+    return best, results
+
+
+def main():
+    import argparse
+    from .gopigo3 import GoPiGo3, SPI_BUS, SPI_DEVICE, SPI_SPEED_HZ
+
+    parser = argparse.ArgumentParser(description="Find the fastest reliable SPI clock for the GoPiGo3")
+    parser.add_argument("--bus", type=int, default=SPI_BUS)
+    parser.add_argument("--device", type=int, default=SPI_DEVICE)
+    parser.add_argument("--transactions", type=int, default=2000, help="transactions per clock rate")
+    parser.add_argument("--speeds", type=int, nargs="+", default=list(DEFAULT_SPEEDS), help="clock rates to try, in Hz")
+    parser.add_argument("--config-file", default=None, help="robot constants file, the result is saved next to it")
+    parser.add_argument("--margin", type=int, default=1, help="clock rates to step down from the fastest reliable one")
+    parser.add_argument("--no-save", action="store_true", help="only measure, don't store the result")
+    args = parser.parse_args()
+
+    gpg = GoPiGo3(bus=args.bus, device=args.device, speed_hz=SPI_SPEED_HZ, config_file_path=args.config_file)
+
+    print(f"{'clock':>10}  {'errors':>8}  {'mean':>10}  {'max':>10}")
+
+    def log(result):
+        print(f"{result.speed_hz / 1e6:7.2f}MHz  {result.errors:8}  {result.mean_latency * 1e6:8.1f}us  {result.max_latency * 1e6:8.1f}us")
+
+    best, results = tune_spi_speed(gpg, args.speeds, args.transactions, save=not args.no_save,
+                                   config_file_path=args.config_file, bus=args.bus, device=args.device, log=log,
+                                   margin=args.margin)
+    if best is None:
+        print("No clock rate was reliable. The GoPiGo3 keeps using the default clock.")
+        return 1
+    print(f"Chosen clock: {best.speed_hz} Hz")
+    if not args.no_save:
+        print(f"Saved to {spi_config_file_path(args.config_file)}")
+        print("Pass use_tuned_spi=True to the GoPiGo3, or set GOPIGO3_TUNED_SPI=1, to use it.")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# Background telemetry for the GoPiGo3
+#
+# A TelemetryPoller reads the motor status of both motors, both voltages and
+# optionally the grove values at a fixed rate, all in one SPI batch, and
+# publishes the result as an immutable TelemetrySnapshot. Publishing is a
+# single reference assignment, so readers never take a lock and never see a
+# half-written snapshot.
+#
+# The GoPiGo3 getters use the snapshot when they are given a max_age:
+#
+#     gpg.start_telemetry(rate=100)
+#     gpg.get_motor_encoder(gpg.MOTOR_LEFT, max_age=0.02)
+#
+# The snapshots can be published to other processes too, see
+# gopigo3.telemetry_bus.
+
+import time
+
+from .periodic import PeriodicThread
+
+
+class TelemetrySnapshot:
+    """
+    One sample of the GoPiGo3 state.
+
+    :var float timestamp: ``time.monotonic()`` right after the sample was read.
+    :var dict motor_status: ``MOTOR_LEFT``/``MOTOR_RIGHT`` -> ``[flags, power, encoder, dps]`` as returned by :py:meth:`~gopigo3.GoPiGo3.get_motor_status`.
+    :var float voltage_battery: Battery voltage.
+    :var float voltage_5v: 5V circuit voltage.
+    :var dict grove_values: Grove port -> value returned by :py:meth:`~gopigo3.GoPiGo3.get_grove_value`, or ``None`` if the read failed.
+    """
+    __slots__ = ("timestamp", "motor_status", "voltage_battery", "voltage_5v", "grove_values")
+
+    def __init__(self, timestamp, motor_status, voltage_battery, voltage_5v, grove_values):
+        self.timestamp = timestamp
+        self.motor_status = motor_status
+        self.voltage_battery = voltage_battery
+        self.voltage_5v = voltage_5v
+        self.grove_values = grove_values
+
+    def age(self):
+        """
+        :returns: How many seconds ago the snapshot was taken.
+        :rtype: float
+        """
+        return time.monotonic() - self.timestamp
+
+
+class MotorsSnapshot:
+    """
+    The state of both motors, read together. See :py:meth:`~gopigo3.GoPiGo3.get_motors_snapshot`.
+
+    Each motor has ``flags``, ``power``, ``encoder`` (degrees) and ``dps`` fields, with the same meaning as
+    the values returned by :py:meth:`~gopigo3.GoPiGo3.get_motor_status`.
+
+    :var float timestamp: ``time.monotonic()`` right after the motors were read.
+    """
+    __slots__ = ("timestamp",
+                 "left_flags", "left_power", "left_encoder", "left_dps",
+                 "right_flags", "right_power", "right_encoder", "right_dps")
+
+    def __init__(self, timestamp, left_status, right_status):
+        """
+        :param float timestamp: When the motors were read.
+        :param left_status: ``[flags, power, encoder, dps]`` of the left motor.
+        :param right_status: ``[flags, power, encoder, dps]`` of the right motor.
+        """
+        self.timestamp = timestamp
+        self.left_flags, self.left_power, self.left_encoder, self.left_dps = left_status
+        self.right_flags, self.right_power, self.right_encoder, self.right_dps = right_status
+
+    @property
+    def encoders(self):
+        """
+        ``(left_encoder, right_encoder)``
+        """
+        return (self.left_encoder, self.right_encoder)
+
+    @property
+    def dps(self):
+        """
+        ``(left_dps, right_dps)``
+        """
+        return (self.left_dps, self.right_dps)
+
+    def __repr__(self):
+        return (f"MotorsSnapshot(timestamp={self.timestamp}, "
+                f"left=[{self.left_flags}, {self.left_power}, {self.left_encoder}, {self.left_dps}], "
+                f"right=[{self.right_flags}, {self.right_power}, {self.right_encoder}, {self.right_dps}])")
+
+
+class TelemetryPoller(PeriodicThread):
+    """
+    Samples a :py:class:`~gopigo3.GoPiGo3` on a background thread.
+
+    Use :py:meth:`~gopigo3.GoPiGo3.start_telemetry` rather than creating one directly.
+    """
+
+    def __init__(self, gpg, rate=100, grove_ports=(), publisher=None):
+        """
+        :param gopigo3.GoPiGo3 gpg: The GoPiGo3 to sample.
+        :param float rate = 100: Samples per second.
+        :param grove_ports: Grove ports (``GROVE_1`` and/or ``GROVE_2``) whose value gets sampled too.
+        :param gopigo3.TelemetryPublisher publisher: Also publish every sample to shared memory. It's closed when the poller stops.
+        """
+        PeriodicThread.__init__(self, rate, "gopigo3-telemetry")
+        self.gpg = gpg
+        self.grove_ports = tuple(grove_ports)
+        self.publisher = publisher
+        self.snapshot = None
+        self.samples = 0
+
+    def stop(self):
+        PeriodicThread.stop(self)
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
+
+    def fresh_snapshot(self, max_age):
+        """
+        :returns: The latest snapshot if it's at most ``max_age`` seconds old, otherwise ``None``.
+        """
+        snapshot = self.snapshot
+        if snapshot is None or time.monotonic() - snapshot.timestamp > max_age:
+            return None
+        return snapshot
+
+    def poll_once(self):
+        """
+        Take one sample and publish it.
+        """
+        gpg = self.gpg
+        with gpg.spi_priority(gpg.SPI_PRIORITY.TELEMETRY), gpg.batch() as batch:
+            left = batch.get_motor_status(gpg.MOTOR_LEFT)
+            right = batch.get_motor_status(gpg.MOTOR_RIGHT)
+            battery = batch.get_voltage_battery()
+            five_volts = batch.get_voltage_5v()
+            groves = [(port, batch.get_grove_value(port)) for port in self.grove_ports]
+
+        try:
+            motor_status = {gpg.MOTOR_LEFT: left.result(), gpg.MOTOR_RIGHT: right.result()}
+            voltage_battery = battery.result()
+            voltage_5v = five_volts.result()
+        except Exception:
+            # keep the previous snapshot, it will age out if the errors persist
+            self.errors += 1
+            return
+
+        grove_values = {}
+        for port, future in groves:
+            grove_values[port] = None if future.exception() is not None else future.result()
+
+        snapshot = TelemetrySnapshot(time.monotonic(), motor_status, voltage_battery, voltage_5v, grove_values)
+        self.snapshot = snapshot
+        self.samples += 1
+        publisher = self.publisher
+        if publisher is not None:
+            publisher.publish(snapshot)
+
+    def _tick(self):
+        self.poll_once()
@@ -0,0 +1,269 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# Shared memory telemetry for the GoPiGo3
+#
+# One process samples the GoPiGo3 and publishes every TelemetrySnapshot into
+# a small memory mapped file. Any number of other processes read it from
+# there, without touching the SPI bus and without a single system call:
+#
+#     gpg.start_telemetry(rate=100, publish=True)     # in the process polling
+#
+#     gpg.use_shared_telemetry()                      # in the others
+#     gpg.get_motor_encoder(gpg.MOTOR_LEFT, max_age=0.02)
+#
+# or, without a GoPiGo3 object:
+#
+#     reader = TelemetryReader()
+#     snapshot = reader.read()
+#
+# The block is protected by a sequence lock. The publisher makes the sequence
+# number odd, writes the sample and makes it even again. A reader copies the
+# sample and only keeps the copy if the sequence number was the same even
+# number before and after, retrying otherwise. Readers never block the
+# publisher and the publisher never waits for readers. The publisher holds
+# an exclusive flock() on the file, so a second one fails instead of
+# interleaving its samples with the first one's.
+#
+# /dev/shm is writable by everyone, so the file isn't trusted blindly: it's
+# opened without following symbolic links, and it has to be a regular file
+# that no one but its owner can write to. The publisher only writes to a file
+# of its own user, a reader also accepts one of root.
+#
+# Layout, little endian:
+#
+#     0    magic "GPG3TEL\0", version u32, size u32
+#     64   sequence u64
+#     128  monotonic time f64, wall clock time f64,
+#          left motor flags, power, encoder, dps i32, same for the right motor,
+#          battery voltage f64, 5V voltage f64,
+#          and for GROVE_1 then GROVE_2: kind u8, length u8, value i32, bytes 32
+#
+# time.monotonic() is the same clock in every process, so the age of a
+# snapshot can be checked in the reading process.
+
+import fcntl
+import mmap
+import os
+import stat
+import struct
+import time
+
+from .telemetry import TelemetrySnapshot
+
+DEFAULT_PATH = "/dev/shm/gopigo3-telemetry"
+
+MAGIC = b"GPG3TEL\0"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sII")
+_SEQUENCE = struct.Struct("<Q")
+_SAMPLE = struct.Struct("<dd8idd")
+_GROVE = struct.Struct("<BBxxi32s")
+_SEQUENCE_OFFSET = 64
+_SAMPLE_OFFSET = 128
+_SAMPLE_SIZE = _SAMPLE.size + 2 * _GROVE.size
+SIZE = _SAMPLE_OFFSET + _SAMPLE_SIZE
+
+# grove value kinds
+_GROVE_NONE = 0
+_GROVE_INT = 1
+_GROVE_BYTES = 2
+
+# the keys of TelemetrySnapshot.motor_status and .grove_values, as in GoPiGo3
+_MOTOR_LEFT = 0x01
+_MOTOR_RIGHT = 0x02
+_GROVE_PORTS = (0x01 + 0x02, 0x04 + 0x08)  # GROVE_1, GROVE_2
+
+
+def _open_trusted(path, flags, owners):
+    """
+    Open ``path`` without following a symbolic link, and check that it's safe to use.
+
+    :param tuple owners: The users the file may belong to.
+    :returns: The file descriptor.
+    :raises PermissionError: If the file isn't a regular file of one of ``owners``, or others can write to it.
+    """
+    fd = os.open(path, flags | os.O_NOFOLLOW, 0o644)
+    status = os.fstat(fd)
+    if not stat.S_ISREG(status.st_mode) or status.st_uid not in owners or status.st_mode & 0o022:
+        os.close(fd)
+        raise PermissionError(f"{path} isn't a file of this user, or others can write to it. Not using it.")
+    return fd
+
+
+class TelemetryPublisher:
+    """
+    Writes telemetry snapshots to shared memory, for :py:class:`TelemetryReader` in other processes.
+
+    Use :py:meth:`~gopigo3.GoPiGo3.start_telemetry` with ``publish=True`` rather than creating one directly.
+    Only one publisher at a time may publish to a given path: it holds a lock on the file until it's closed.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        """
+        :param str path = DEFAULT_PATH: The shared memory file. It's created if needed, and readers
+                                        that already opened it keep working.
+        :raises IOError: If another publisher already publishes to ``path``.
+        :raises PermissionError: If ``path`` belongs to another user, others can write to it, or it's a symbolic link.
+        """
+        self.path = path
+        self.samples = 0
+        fd = _open_trusted(path, os.O_RDWR | os.O_CREAT, (os.geteuid(),))
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise IOError(f"Another publisher already publishes to {path}") from None
+            if os.fstat(fd).st_size != SIZE:
+                os.ftruncate(fd, SIZE)
+            self._map = mmap.mmap(fd, SIZE)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+        magic, version, size = _HEADER.unpack_from(self._map, 0)
+        if (magic, version, size) != (MAGIC, VERSION, SIZE):
+            self._map[:] = bytes(SIZE)
+            _HEADER.pack_into(self._map, 0, MAGIC, VERSION, SIZE)
+        # carry on from the previous publisher, even if it died halfway through a sample
+        (sequence,) = _SEQUENCE.unpack_from(self._map, _SEQUENCE_OFFSET)
+        self._sequence = sequence + (sequence & 1)
+        self._sample = bytearray(_SAMPLE_SIZE)
+
+    def publish(self, snapshot):
+        """
+        :param gopigo3.TelemetrySnapshot snapshot: The sample to publish.
+        """
+        left = snapshot.motor_status.get(_MOTOR_LEFT) or (0, 0, 0, 0)
+        right = snapshot.motor_status.get(_MOTOR_RIGHT) or (0, 0, 0, 0)
+        self.samples += 1
+        sample = self._sample
+        _SAMPLE.pack_into(sample, 0, snapshot.timestamp, time.time(),
+                          *left, *right, snapshot.voltage_battery, snapshot.voltage_5v)
+        offset = _SAMPLE.size
+        for port in _GROVE_PORTS:
+            value = snapshot.grove_values.get(port)
+            if value is None:
+                _GROVE.pack_into(sample, offset, _GROVE_NONE, 0, 0, b"")
+            elif isinstance(value, int):
+                _GROVE.pack_into(sample, offset, _GROVE_INT, 0, value, b"")
+            else:
+                data = bytes(value[:32])
+                _GROVE.pack_into(sample, offset, _GROVE_BYTES, len(data), 0, data)
+            offset += _GROVE.size
+
+        # the sample is prepared beforehand, so the sequence stays odd as briefly as possible
+        self._sequence += 1
+        _SEQUENCE.pack_into(self._map, _SEQUENCE_OFFSET, self._sequence)
+        self._map[_SAMPLE_OFFSET:SIZE] = sample
+        self._sequence += 1
+        _SEQUENCE.pack_into(self._map, _SEQUENCE_OFFSET, self._sequence)
+
+    def close(self):
+        self._map.close()
+        if self._fd is not None:
+            os.close(self._fd)  # releases the lock
+            self._fd = None
+
+
+class TelemetryReader:
+    """
+    Reads the telemetry published by a :py:class:`TelemetryPublisher`, possibly in another process.
+
+    It can stand in for the :py:class:`TelemetryPoller` of a GoPiGo3, see :py:meth:`~gopigo3.GoPiGo3.use_shared_telemetry`.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, retries=1000):
+        """
+        :param str path = DEFAULT_PATH: The shared memory file.
+        :param int retries = 1000: Attempts at getting a consistent copy before :py:meth:`read` gives up.
+        :raises OSError: If nothing was ever published to ``path``.
+        :raises PermissionError: If ``path`` belongs to someone else than this user or root, others can write to it,
+                                 or it's a symbolic link.
+        :raises ValueError: If ``path`` isn't a GoPiGo3 telemetry file.
+        """
+        self.path = path
+        self.retries = retries
+        fd = _open_trusted(path, os.O_RDONLY, (os.geteuid(), 0))
+        try:
+            self._map = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        if len(self._map) < SIZE or _HEADER.unpack_from(self._map, 0) != (MAGIC, VERSION, SIZE):
+            self._map.close()
+            raise ValueError(f"{path} is not a GoPiGo3 telemetry file")
+        self.retries_needed = 0
+        self._sequence = 0
+        self._snapshot = None
+
+    def read(self):
+        """
+        :returns: The latest published snapshot, or ``None`` if nothing was published yet or the publisher
+                  kept rewriting it for ``retries`` attempts.
+        :rtype: gopigo3.TelemetrySnapshot
+        """
+        memory = self._map
+        for attempt in range(self.retries):
+            (before,) = _SEQUENCE.unpack_from(memory, _SEQUENCE_OFFSET)
+            if before == self._sequence:
+                return self._snapshot
+            if before & 1:
+                if attempt >= 10:
+                    time.sleep(0)  # let a descheduled publisher finish
+                continue
+            sample = memory[_SAMPLE_OFFSET:SIZE]
+            (after,) = _SEQUENCE.unpack_from(memory, _SEQUENCE_OFFSET)
+            if before == after:
+                self._snapshot = self._decode(sample)
+                self._sequence = before
+                self.retries_needed += attempt
+                return self._snapshot
+        return None
+
+    @staticmethod
+    def _decode(sample):
+        values = _SAMPLE.unpack_from(sample, 0)
+        timestamp = values[0]
+        motor_status = {_MOTOR_LEFT: list(values[2:6]), _MOTOR_RIGHT: list(values[6:10])}
+        voltage_battery, voltage_5v = values[10:12]
+        grove_values = {}
+        offset = _SAMPLE.size
+        for port in _GROVE_PORTS:
+            kind, length, value, data = _GROVE.unpack_from(sample, offset)
+            if kind == _GROVE_INT:
+                grove_values[port] = value
+            elif kind == _GROVE_BYTES:
+                grove_values[port] = list(data[:length])
+            offset += _GROVE.size
+        return TelemetrySnapshot(timestamp, motor_status, voltage_battery, voltage_5v, grove_values)
+
+    @property
+    def samples(self):
+        """
+        How many samples were published since the file was created, as of the last :py:meth:`read`.
+        """
+        return self._sequence // 2
+
+    def fresh_snapshot(self, max_age):
+        """
+        :returns: The latest snapshot if it's at most ``max_age`` seconds old, otherwise ``None``.
+        """
+        snapshot = self.read()
+        if snapshot is None or time.monotonic() - snapshot.timestamp > max_age:
+            return None
+        return snapshot
+
+    def close(self):
+        self._map.close()
+
+    def stop(self):
+        """
+        Same as :py:meth:`close`, so that :py:meth:`~gopigo3.GoPiGo3.stop_telemetry` works on a reader too.
+        """
+        self.close()
@@ -0,0 +1,182 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# SPI transports for the GoPiGo3
+#
+# A transport is the only thing that sits between a GoPiGo3 object and the
+# GoPiGo3 MCU. The GoPiGo3 class builds every message and decodes every reply,
+# a transport only moves the bytes.
+
+import struct
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# struct spi_ioc_transfer from linux/spi/spidev.h
+# tx_buf, rx_buf, len, speed_hz, delay_usecs, bits_per_word, cs_change, tx_nbits, rx_nbits, word_delay_usecs, pad
+# A speed_hz or bits_per_word of 0 means the settings of the opened spidev device are used.
+_SPI_IOC_TRANSFER = struct.Struct("=QQIIHBBBBBB")
+
+# SPI_IOC_MESSAGE(n) only has 14 bits to encode the size of the transfer array
+SPI_IOC_MAX_TRANSFERS = ((1 << 14) - 1) // _SPI_IOC_TRANSFER.size
+
+
+def spi_ioc_message(count):
+    """
+    Return the SPI_IOC_MESSAGE(count) ioctl request number
+    """
+    # _IOW(SPI_IOC_MAGIC, 0, char[SPI_MSGSIZE(count)])
+    return (1 << 30) | ((count * _SPI_IOC_TRANSFER.size) << 16) | (ord('k') << 8)
+
+
+_SPI_IOC_MESSAGE_1 = spi_ioc_message(1)
+
+
+class SPIBuffer:
+    """
+    A preallocated pair of transmit/receive buffers for one SPI message.
+
+    The GoPiGo3 keeps one of these per message type and reuses it for every transaction,
+    so that reading a value doesn't allocate new lists.
+    """
+    __slots__ = ("tx", "rx", "ioc")
+
+    def __init__(self, data_out):
+        """
+        :param data_out: The bytes to send. They can be changed later on through ``tx``.
+        """
+        self.tx = bytearray(data_out)
+        self.rx = bytearray(len(self.tx))
+        self.ioc = None  # left to the transport, to cache whatever it needs to send this buffer
+
+
+class Transport:
+    """
+    Base class for the link between a :py:class:`~gopigo3.GoPiGo3` object and the GoPiGo3 MCU.
+
+    Subclasses have to implement :py:meth:`transfer`. Everything else is optional.
+    """
+
+    def transfer(self, data_out):
+        """
+        Conduct a single SPI transaction
+
+        Keyword arguments:
+        data_out -- a list of bytes to send. The length of the list will determine how many bytes are transferred.
+
+        Returns a list of the bytes read.
+        """
+        raise NotImplementedError
+
+    def transfer_many(self, messages):
+        """
+        Conduct several SPI transactions, one after the other
+
+        Keyword arguments:
+        messages -- a list of messages, each one a list of bytes to send.
+
+        Returns a list with the bytes read for each message.
+        """
+        return [self.transfer(data_out) for data_out in messages]
+
+    def transfer_buffer(self, buffer):
+        """
+        Conduct a single SPI transaction with preallocated buffers
+
+        Keyword arguments:
+        buffer -- an SPIBuffer. The bytes of ``buffer.tx`` are sent and the bytes read are written to ``buffer.rx``.
+        """
+        buffer.rx[:] = bytes(self.transfer(list(buffer.tx)))
+
+    def close(self):
+        """
+        Release whatever the transport holds on to.
+        """
+        pass
+
+
+class SpiDevTransport(Transport):
+    """
+    Talk to a real GoPiGo3 through an opened ``spidev.SpiDev`` object.
+    """
+
+    def __init__(self, spi, batch_delay_us=10, speed_hz=0, lock=None):
+        """
+        :param spidev.SpiDev spi: An already opened and configured SPI device.
+        :param int batch_delay_us = 10: Time the chip select stays asserted after each message of a batch, giving the MCU a moment before the next message starts.
+        :param int speed_hz = 0: SPI clock of every transfer. 0 uses the clock the device was configured with.
+        :param lock = None: Lock serializing the transfers. Transports sharing ``spi`` have to share the lock too. By default the transport gets its own.
+        """
+        self.spi = spi
+        self.batch_delay_us = batch_delay_us
+        self.speed_hz = speed_hz
+        self.lock = lock if lock is not None else threading.Lock()
+
+    def transfer(self, data_out):
+        with self.lock:
+            return self.spi.xfer2(data_out, self.speed_hz)
+
+    def transfer_many(self, messages):
+        """
+        Send all the messages with a single SPI_IOC_MESSAGE ioctl. The chip select is toggled
+        between messages, so the MCU sees exactly the same transactions as with :py:meth:`transfer`.
+        """
+        if fcntl is None or not hasattr(self.spi, "fileno") or len(messages) < 2:
+            return super().transfer_many(messages)
+
+        replies = []
+        with self.lock:
+            for start in range(0, len(messages), SPI_IOC_MAX_TRANSFERS):
+                replies.extend(self._ioc_message(messages[start:start + SPI_IOC_MAX_TRANSFERS]))
+        return replies
+
+    def _ioc_message(self, messages):
+        import ctypes
+        count = len(messages)
+        request = bytearray(_SPI_IOC_TRANSFER.size * count)
+        buffers = []
+        for i, data_out in enumerate(messages):
+            length = len(data_out)
+            tx = (ctypes.c_uint8 * length)(*[b & 0xFF for b in data_out])
+            rx = (ctypes.c_uint8 * length)()
+            buffers.append((tx, rx))
+            # cs_change on anything but the last transfer releases the chip select in between
+            cs_change = 1 if i < count - 1 else 0
+            _SPI_IOC_TRANSFER.pack_into(request, i * _SPI_IOC_TRANSFER.size,
+                                        ctypes.addressof(tx), ctypes.addressof(rx), length,
+                                        self.speed_hz, self.batch_delay_us, 0,
+                                        cs_change, 0, 0, 0, 0)
+        fcntl.ioctl(self.spi.fileno(), spi_ioc_message(count), bytes(request))
+        return [list(rx) for tx, rx in buffers]
+
+    def transfer_buffer(self, buffer):
+        """
+        Send the buffer with a SPI_IOC_MESSAGE(1) ioctl straight from and into its bytearrays,
+        skipping the list conversions of ``xfer2``.
+        """
+        ioc = buffer.ioc
+        if ioc is None or ioc[3] != self.speed_hz:
+            import ctypes
+            if fcntl is None or not hasattr(self.spi, "fileno"):
+                buffer.rx[:] = bytes(self.transfer(list(buffer.tx)))
+                return
+            length = len(buffer.tx)
+            # the ctypes views keep the bytearrays from being resized while their address is in use
+            tx = (ctypes.c_char * length).from_buffer(buffer.tx)
+            rx = (ctypes.c_char * length).from_buffer(buffer.rx)
+            request = bytearray(_SPI_IOC_TRANSFER.size)
+            _SPI_IOC_TRANSFER.pack_into(request, 0, ctypes.addressof(tx), ctypes.addressof(rx), length,
+                                        self.speed_hz, 0, 0, 0, 0, 0, 0, 0)
+            ioc = buffer.ioc = (request, tx, rx, self.speed_hz)
+        with self.lock:
+            fcntl.ioctl(self.spi.fileno(), _SPI_IOC_MESSAGE_1, ioc[0], True)
+
+    def close(self):
+        self.spi.close()
@@ -0,0 +1,81 @@
+# https://www.dexterindustries.com/GoPiGo/
+# https://github.com/DexterInd/GoPiGo3
+#
+# Copyright (c) 2026 Modular Robotics
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GoPiGo3/blob/master/LICENSE.md
+#
+# Write cache for the GoPiGo3
+#
+# Remembers the last value written to each LED, servo, motor target and grove
+# pin, so that writing the same value again can be skipped. The setters take
+# bit masks (LED_EYE_LEFT + LED_EYE_RIGHT, GROVE_1, ...), so the values are
+# kept per bit: a write is only skipped when every addressed bit already
+# holds the value.
+#
+# The cache only knows about the writes of its own GoPiGo3 object. It can't
+# see another process writing to the board, or the board being reset, which
+# is why it's off unless GoPiGo3.enable_write_cache() is called.
+
+_MISSING = object()
+
+
+def _bits(mask):
+    bit = 1
+    while bit <= mask:
+        if mask & bit:
+            yield bit
+        bit <<= 1
+
+
+class WriteCache:
+    """
+    Last written value per register and port bit, with counts of the writes sent and skipped.
+
+    Use :py:meth:`~gopigo3.GoPiGo3.enable_write_cache` rather than creating one directly.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self.sent = {}
+        self.skipped = {}
+
+    def unchanged(self, register, mask, value):
+        """
+        :returns: ``True`` if every bit of ``mask`` already holds ``value``, in which case the write gets counted as skipped.
+        """
+        values = self._values
+        if mask <= 0:
+            return False
+        for bit in _bits(mask):
+            if values.get((register, bit), _MISSING) != value:
+                return False
+        self.skipped[register] = self.skipped.get(register, 0) + 1
+        return True
+
+    def update(self, register, mask, value):
+        """
+        Record that ``value`` was sent to every bit of ``mask``.
+        """
+        for bit in _bits(mask):
+            self._values[(register, bit)] = value
+        self.sent[register] = self.sent.get(register, 0) + 1
+
+    def forget(self, register=None, mask=None):
+        """
+        Forget the values of a register, or of some bits of it. Without a register, everything is forgotten.
+        """
+        if register is None:
+            self._values.clear()
+            return
+        for key in list(self._values):
+            if key[0] == register and (mask is None or key[1] & mask):
+                del self._values[key]
+
+    def stats(self):
+        """
+        :returns: register -> ``{"sent": count, "skipped": count}``
+        :rtype: dict
+        """
+        return {register: {"sent": self.sent.get(register, 0), "skipped": self.skipped.get(register, 0)}
+                for register in set(self.sent) | set(self.skipped)}
@@ -0,0 +1,109 @@
+####################################################
+# The moves of an EasyGoPiGo3 when the motors can't be read anymore:
+# instead of waiting forever, a blocking drive_cm raises the read error,
+# and so do the handles of the moves that were under way. A stop floats
+# the motors without waiting for them to stop turning.
+#
+# No GoPiGo3 is needed, the robot is simulated. From Software/Python:
+#
+#   python3 motion_tests/test_motion_errors.py
+#   python3 -m pytest motion_tests
+####################################################
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# the gopigo3 package next to this directory, rather than an installed one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gopigo3.easygopigo3 import EasyGoPiGo3
+from gopigo3.motion import MotionMonitor
+from gopigo3.simulator import GoPiGo3Simulator
+
+
+def make_robot():
+    config = os.path.join(tempfile.mkdtemp(), "gpg3_config.json")
+    gpg = EasyGoPiGo3(transport=GoPiGo3Simulator(), config_file_path=config)
+    gpg.set_speed(300)
+    return gpg
+
+
+def fail_reads(gpg, after=0, count=None):
+    """
+    Make the reads of the motors fail from ``after`` seconds from now, ``count`` times or for good.
+    """
+    read = gpg.get_motors_snapshot
+    failing_from = time.monotonic() + after
+    failures = [0]
+
+    def get_motors_snapshot(*args, **kwargs):
+        if time.monotonic() >= failing_from and (count is None or failures[0] < count):
+            failures[0] += 1
+            raise IOError("SPI read failed")
+        return read(*args, **kwargs)
+    gpg.get_motors_snapshot = get_motors_snapshot
+
+
+def run_with_timeout(function, timeout):
+    """
+    :returns: ``(returned, exception)`` of ``function()``, ``returned`` being False if it's still running after ``timeout``.
+    """
+    outcome = {}
+
+    def target():
+        try:
+            function()
+        except Exception as e:
+            outcome["exception"] = e
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive(), outcome.get("exception")
+
+
+def test_blocking_drive_raises_when_reads_fail():
+    gpg = make_robot()
+    fail_reads(gpg, after=0.2)
+    returned, exception = run_with_timeout(lambda: gpg.drive_cm(30), 5)
+    assert returned, "drive_cm didn't return"
+    assert isinstance(exception, IOError), exception
+    gpg.stop(mode="brake")
+
+
+def test_pending_move_fails_when_reads_fail():
+    gpg = make_robot()
+    move = gpg.drive_cm(30, blocking=False)
+    fail_reads(gpg, after=0.2)
+    returned, exception = run_with_timeout(move.wait, 5)
+    assert returned, "wait() didn't return"
+    assert isinstance(exception, IOError), exception
+    assert isinstance(move.exception(), IOError)
+    assert not move.cancelled()
+    gpg.stop(mode="brake")
+
+
+def test_a_few_failed_reads_dont_fail_the_move():
+    gpg = make_robot()
+    move = gpg.drive_cm(5, blocking=False)
+    fail_reads(gpg, count=MotionMonitor.MAX_ERRORS - 1)
+    assert move.result(5)
+
+
+def test_stop_floats_the_motors_when_reads_fail():
+    gpg = make_robot()
+    gpg.forward()
+    fail_reads(gpg)
+    returned, exception = run_with_timeout(lambda: gpg.stop(timeout=2), 5)
+    assert returned and exception is None, exception
+    assert gpg.get_motor_status(gpg.MOTOR_LEFT)[1] == gpg.MOTOR_FLOAT
+
+
+if __name__ == "__main__":
+    test_blocking_drive_raises_when_reads_fail()
+    test_pending_move_fails_when_reads_fail()
+    test_a_few_failed_reads_dont_fail_the_move()
+    test_stop_floats_the_motors_when_reads_fail()
+    print("Done")
@@ -0,0 +1,114 @@
+####################################################
+# Automated version of test_heavy_mutex.py and test_heavy_mutex_2.py:
+# several processes keep acquiring and releasing the resource locks
+# through easysensors._ifMutexAcquire, and the benchmark prints the
+# throughput and the tail latency of getting a lock.
+#
+# With --mode shared every process uses the same resource, as when
+# everything went through the single I2C mutex. With --mode split the
+# processes are spread over the grove ports, the serial pins and the
+# MCU link, as the sensors do now. It uses the gopigo3 package of this
+# checkout, not an installed one. From Software/Python:
+#
+#   python3 mutex_tests/contention_benchmark.py
+#   python3 mutex_tests/contention_benchmark.py --processes 8 --hold-ms 0.5,5 --mode split
+#
+# No GoPiGo3 is needed. The lock files go to a temporary directory
+# unless --lock-dir is given, so it runs without root too. --profile
+# also prints the contention report of each process.
+####################################################
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+# the gopigo3 package next to this directory, rather than an installed one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gopigo3 import locks
+from gopigo3.instrumentation import LatencyHistogram, format_contention_report
+
+SPLIT_RESOURCES = [locks.RESOURCE_GROVE_1, locks.RESOURCE_GROVE_2, locks.RESOURCE_SERIAL, locks.RESOURCE_MCU_SPI]
+
+
+def worker(index, resource, hold, duration, lock_dir, profile, start_at, results):
+    locks.LOCK_DIR = lock_dir
+    from gopigo3.easysensors import _ifMutexAcquire, _ifLockedRelease
+    manager = locks.get_lock_manager()
+    if profile:
+        manager.enable_profiling()
+
+    waits = LatencyHistogram()
+    operations = 0
+    time.sleep(max(0, start_at - time.time()))
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        start = time.perf_counter()
+        locked = _ifMutexAcquire(True, resource)
+        waits.record(time.perf_counter() - start)
+        try:
+            time.sleep(hold)
+        finally:
+            _ifLockedRelease(locked, resource)
+        operations += 1
+    report = manager.profiler.as_dict() if profile else None
+    results.put((index, resource, hold, operations, waits, report))
+
+
+def run(processes, holds, mode, duration, lock_dir, profile):
+    results = multiprocessing.Queue()
+    start_at = time.time() + 0.5  # every process starts together, once they are all up
+    workers = []
+    for index in range(processes):
+        resource = SPLIT_RESOURCES[index % len(SPLIT_RESOURCES)] if mode == "split" else locks.RESOURCE_GROVE_1
+        hold = holds[index % len(holds)]
+        process = multiprocessing.Process(target=worker,
+                                          args=(index, resource, hold, duration, lock_dir, profile, start_at, results))
+        process.start()
+        workers.append(process)
+    outcomes = sorted(results.get() for _ in workers)
+    for process in workers:
+        process.join()
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process lock contention benchmark")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--hold-ms", default="0.5,5", help="comma separated hold times, given to the processes in turn")
+    parser.add_argument("--mode", choices=("shared", "split", "both"), default="both")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds")
+    parser.add_argument("--lock-dir", default=None)
+    parser.add_argument("--profile", action="store_true")
+    args = parser.parse_args()
+
+    holds = [float(value) / 1000 for value in args.hold_ms.split(",")]
+    lock_dir = args.lock_dir or tempfile.mkdtemp(prefix="gopigo3-locks-")
+    modes = ("shared", "split") if args.mode == "both" else (args.mode,)
+
+    for mode in modes:
+        outcomes = run(args.processes, holds, mode, args.duration, lock_dir, args.profile)
+        total = LatencyHistogram()
+        print(f"{mode}: {args.processes} processes for {args.duration:.1f}s")
+        print(f"  {'process':<9}{'resource':<10}{'hold ms':>8}{'ops/s':>9}{'wait p50':>10}{'p99':>9}{'max':>9}  (us)")
+        operations = 0
+        for index, resource, hold, count, waits, report in outcomes:
+            total.merge(waits)
+            operations += count
+            summary = waits.summary()
+            print(f"  {index:<9}{resource:<10}{hold * 1000:>8.1f}{count / args.duration:>9.1f}"
+                  f"{summary['p50_us'] or 0:>10}{summary['p99_us'] or 0:>9}{summary['max_us'] or 0:>9}")
+        summary = total.summary()
+        print(f"  total {operations / args.duration:.1f} ops/s, wait p50 {summary['p50_us']}us, "
+              f"p90 {summary['p90_us']}us, p99 {summary['p99_us']}us, max {summary['max_us']}us")
+        if args.profile:
+            for outcome in outcomes:
+                print(format_contention_report(outcome[5]))
+        print()
+
+
+if __name__ == "__main__":
+    main()